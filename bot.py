@@ -33,15 +33,23 @@ from models.subcategory import SubcategoryAdmin
 from models.user import UserAdmin
 from processing.processing import processing_router
 from repositories.button_media import ButtonMediaRepository
+from repositories.item_stock import ItemStockRepository
+from repositories.user_cache import UserCacheRepository
+from services.announcement import AnnouncementService
+from services.ledger import LedgerService
 from services.media import MediaService
+from services.multibot import MultibotService
 from services.notification import NotificationService
+from services.outbox import OutboxService
 from services.wallet import WalletService
-from utils.telegram import create_bot, create_telegram_session
+from utils.metrics import metrics
+from utils.telegram import close_bots, get_bot
 from utils.utils import validate_i18n
 
 redis = Redis(host=config.REDIS_HOST, password=config.REDIS_PASSWORD)
-session = create_telegram_session()
-bot = create_bot(config.TOKEN, session)
+UserCacheRepository.set_redis_client(redis)
+MultibotService.set_redis_client(redis)
+bot = get_bot(config.TOKEN)
 dp = Dispatcher(storage=RedisStorage(redis))
 
 
@@ -75,6 +83,10 @@ async def _startup() -> None:
     await MediaService.update_inaccessible_media(bot)
     validate_i18n()
     await ButtonMediaRepository.init_buttons_media()
+    await ItemStockRepository.init_stock()
+    LedgerService.start_verification()
+    await AnnouncementService.resume_broadcast_jobs(bot)
+    OutboxService.start_dispatcher()
     if config.CRYPTO_FORWARDING_MODE:
         for cryptocurrency in Cryptocurrency:
             forwarding_address = cryptocurrency.get_forwarding_address()
@@ -97,7 +109,9 @@ async def _shutdown() -> None:
     logging.warning('Shutting down..')
     await bot.delete_webhook()
     await dp.storage.close()
-    await bot.session.close()
+    await LedgerService.stop_verification()
+    await OutboxService.stop_dispatcher()
+    await close_bots()
     logging.warning('Bye!')
 
 
@@ -145,6 +159,15 @@ async def webhook(request: Request):
         return {"status": "error"}, status.HTTP_500_INTERNAL_SERVER_ERROR
 
 
+@app.get("/metrics")
+async def metrics_endpoint(request: Request):
+    if not config.METRICS_TOKEN:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
+    if request.headers.get("X-Metrics-Token") != config.METRICS_TOKEN:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Unauthorized")
+    return metrics.snapshot()
+
+
 @app.exception_handler(Exception)
 async def exception_handler(request: Request, exc: Exception):
     traceback_str = traceback.format_exc()
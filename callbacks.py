@@ -3,6 +3,7 @@ from aiogram.filters.callback_data import CallbackData
 from enums.add_type import AddType
 from enums.announcement_type import AnnouncementType
 from enums.bot_entity import BotEntity
+from enums.broadcast_action import BroadcastAction
 from enums.buy_status import BuyStatus
 from enums.cart_action import CartAction
 from enums.coupon_type import CouponType
@@ -133,10 +134,17 @@ class AdminMenuCallback(BaseCallback, prefix="admin_menu"):
 
 class AnnouncementCallback(BaseCallback, prefix="announcement"):
     announcement_type: AnnouncementType | None
+    broadcast_job_id: int | None = None
+    broadcast_action: BroadcastAction | None = None
 
     @staticmethod
-    def create(level: int, announcement_type: AnnouncementType | None = None, page: int = 0):
-        return AnnouncementCallback(level=level, announcement_type=announcement_type, page=page)
+    def create(level: int,
+               announcement_type: AnnouncementType | None = None,
+               page: int = 0,
+               broadcast_job_id: int | None = None,
+               broadcast_action: BroadcastAction | None = None):
+        return AnnouncementCallback(level=level, announcement_type=announcement_type, page=page,
+                                    broadcast_job_id=broadcast_job_id, broadcast_action=broadcast_action)
 
 
 class InventoryManagementCallback(BaseCallback, SortingCallback, prefix="inventory_management"):
@@ -26,6 +26,14 @@ DB_PASS = os.environ.get("POSTGRES_PASSWORD")
 DB_PORT = int(os.environ.get("DB_PORT", "5432"))
 DB_HOST = os.environ.get("DB_HOST", "postgres")
 DB_NAME = os.environ.get("POSTGRES_DB", "aiogram-shop-bot")
+DB_ECHO = os.environ.get("DB_ECHO", False) == 'true'
+DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.environ.get("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.environ.get("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.environ.get("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.environ.get("DB_POOL_PRE_PING", "true") == 'true'
+DB_STATEMENT_CACHE_SIZE = int(os.environ.get("DB_STATEMENT_CACHE_SIZE", "100"))
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN")
 PAGE_ENTRIES = int(os.environ.get("PAGE_ENTRIES", "8"))
 MULTIBOT = os.environ.get("MULTIBOT", False) == 'true'
 CURRENCY = Currency(os.environ.get("CURRENCY", "USD"))
@@ -35,7 +43,9 @@ KRYPTO_EXPRESS_API_SECRET = os.environ.get("KRYPTO_EXPRESS_API_SECRET")
 WEBHOOK_SECRET_TOKEN = os.environ.get("WEBHOOK_SECRET_TOKEN")
 REDIS_HOST = os.environ.get("REDIS_HOST", "redis")
 REDIS_PASSWORD = os.environ.get("REDIS_PASSWORD")
+USER_CACHE_TTL_SECONDS = int(os.environ.get("USER_CACHE_TTL_SECONDS", "60"))
 TELEGRAM_PROXY_URL = os.environ.get("TELEGRAM_PROXY_URL")
+ADMIN_NOTIFICATIONS_IN_BACKGROUND = os.environ.get("ADMIN_NOTIFICATIONS_IN_BACKGROUND", False) == 'true'
 # VARIABLES FOR CRYPTO FORWARDING
 CRYPTO_FORWARDING_MODE = os.environ.get("CRYPTO_FORWARDING_MODE", False) == 'true'
 BTC_FORWARDING_ADDRESS = os.environ.get("BTC_FORWARDING_ADDRESS")
@@ -1,18 +1,20 @@
 from contextlib import asynccontextmanager
-from typing import Any
+from typing import Any, Awaitable, Callable
 
 from sqlalchemy import text, Result, CursorResult
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
-from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy.ext.asyncio import AsyncSession, AsyncResult
+from sqlalchemy.orm import sessionmaker
 
 import config
 from models.base import Base
+from utils.db_engine import create_engine
 
 """
 Imports of these models are needed to correctly create tables in the database.
 For more information see https://stackoverflow.com/questions/7478403/sqlalchemy-classes-across-files
 """
 from models.item import Item
+from models.item_stock import ItemStock
 from models.cart import Cart
 from models.cartItem import CartItem
 from models.user import User
@@ -27,50 +29,44 @@ from models.coupon import Coupon
 from models.shipping_option import ShippingOption
 from models.review import Review
 from models.referral import ReferralBonus
+from models.broadcast import BroadcastJob
+from models.outbox import OutboxEvent
+from models.ledger import LedgerEntry
 
 url = f"postgresql+asyncpg://{config.DB_USER}:{config.DB_PASS}@{config.DB_HOST}:{config.DB_PORT}/{config.DB_NAME}"
-engine = create_async_engine(url, echo=True)
+engine = create_engine(url)
 session_maker = sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
 
 
 @asynccontextmanager
-async def get_db_session() -> AsyncSession | Session:
-    session = None
-    try:
-        async with session_maker() as async_session:
-            session = async_session
-            yield session
-    finally:
-        if isinstance(session, AsyncSession):
-            await session.close()
-        elif isinstance(session, Session):
-            session.close()
-
-
-async def session_execute(stmt, session: AsyncSession | Session) -> Result[Any] | CursorResult[Any]:
-    if isinstance(session, AsyncSession):
-        query_result = await session.execute(stmt)
-        return query_result
-    else:
-        query_result = session.execute(stmt)
-        return query_result
-
-
-async def session_flush(session: AsyncSession | Session) -> None:
-    if isinstance(session, AsyncSession):
-        await session.flush()
-    else:
-        session.flush()
-
-
-async def session_commit(session: AsyncSession | Session) -> None:
-    if isinstance(session, AsyncSession):
-        await session.commit()
-    else:
-        session.commit()
-
-
-async def check_all_tables_exist(session: AsyncSession | Session, schema: str = "public"):
+async def get_db_session() -> AsyncSession:
+    async with session_maker() as session:
+        yield session
+
+
+def session_execute(stmt, session: AsyncSession) -> Awaitable[Result[Any] | CursorResult[Any]]:
+    return session.execute(stmt)
+
+
+def session_stream(stmt, session: AsyncSession) -> Awaitable[AsyncResult[Any]]:
+    return session.stream(stmt)
+
+
+def session_flush(session: AsyncSession) -> Awaitable[None]:
+    return session.flush()
+
+
+def add_after_commit_callback(session: AsyncSession, callback: Callable[[], Awaitable[None]]) -> None:
+    session.info.setdefault("after_commit_callbacks", []).append(callback)
+
+
+async def session_commit(session: AsyncSession) -> None:
+    await session.commit()
+    for callback in session.info.pop("after_commit_callbacks", []):
+        await callback()
+
+
+async def check_all_tables_exist(session: AsyncSession, schema: str = "public"):
     for table in Base.metadata.tables.values():
         sql_query = text("""
             SELECT 1
@@ -85,14 +81,9 @@ async def check_all_tables_exist(session: AsyncSession | Session, schema: str =
             "table_name": table.name,
         }
 
-        if isinstance(session, AsyncSession):
-            result = await session.execute(sql_query, params)
-            if result.scalar() is None:
-                return False
-        else:
-            result = session.execute(sql_query, params)
-            if result.scalar() is None:
-                return False
+        result = await session.execute(sql_query, params)
+        if result.scalar() is None:
+            return False
 
     return True
 
@@ -0,0 +1,7 @@
+from enum import IntEnum
+
+
+class BroadcastAction(IntEnum):
+    PAUSE = 1
+    RESUME = 2
+    CANCEL = 3
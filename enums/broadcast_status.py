@@ -0,0 +1,15 @@
+from enum import Enum
+
+from enums.bot_entity import BotEntity
+from enums.language import Language
+from utils.utils import get_text
+
+
+class BroadcastStatus(Enum):
+    RUNNING = "RUNNING"
+    PAUSED = "PAUSED"
+    CANCELLED = "CANCELLED"
+    FINISHED = "FINISHED"
+
+    def get_localized(self, language: Language):
+        return get_text(language, BotEntity.ADMIN, f"broadcast_{self.value.lower()}")
@@ -0,0 +1,7 @@
+from enum import Enum
+
+
+class DeliveryStatus(Enum):
+    SENT = "SENT"
+    BLOCKED = "BLOCKED"
+    FAILED = "FAILED"
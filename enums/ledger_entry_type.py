@@ -0,0 +1,19 @@
+from enum import Enum
+
+from enums.bot_entity import BotEntity
+from enums.language import Language
+from utils.utils import get_text
+
+
+class LedgerEntryType(Enum):
+    OPENING_BALANCE = "OPENING_BALANCE"
+    DEPOSIT = "DEPOSIT"
+    REFERRAL_BONUS = "REFERRAL_BONUS"
+    REFERRER_BONUS = "REFERRER_BONUS"
+    PURCHASE = "PURCHASE"
+    REFUND = "REFUND"
+    ADMIN_CREDIT = "ADMIN_CREDIT"
+    ADMIN_DEBIT = "ADMIN_DEBIT"
+
+    def get_localized(self, language: Language):
+        return get_text(language, BotEntity.USER, f"ledger_{self.value.lower()}")
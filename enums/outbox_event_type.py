@@ -0,0 +1,10 @@
+from enum import Enum
+
+
+class OutboxEventType(Enum):
+    PAYMENT_EVENT = "PAYMENT_EVENT"
+    NEW_DEPOSIT = "NEW_DEPOSIT"
+    NEW_BUY = "NEW_BUY"
+    CRYPTO_WITHDRAWAL = "CRYPTO_WITHDRAWAL"
+    WITHDRAWAL_NOTIFICATION = "WITHDRAWAL_NOTIFICATION"
+    ADMIN_NOTIFICATION = "ADMIN_NOTIFICATION"
@@ -0,0 +1,8 @@
+from enum import Enum
+
+
+class OutboxStatus(Enum):
+    PENDING = "PENDING"
+    IN_FLIGHT = "IN_FLIGHT"
+    DELIVERED = "DELIVERED"
+    FAILED = "FAILED"
@@ -17,8 +17,9 @@ announcement_router = Router()
 
 async def announcement_menu(**kwargs):
     callback: CallbackQuery = kwargs.get("callback")
+    session: AsyncSession = kwargs.get("session")
     language: Language = kwargs.get("language")
-    msg, kb_builder = await AnnouncementService.get_announcement_menu(language)
+    msg, kb_builder = await AnnouncementService.get_announcement_menu(session, language)
     await callback.message.edit_text(text=msg, reply_markup=kb_builder.as_markup())
 
 
@@ -51,10 +52,11 @@ async def send_generated_msg(**kwargs):
     language: Language = kwargs.get("language")
     kb_builder = AnnouncementsConstants.get_confirmation_builder(callback_data.announcement_type,
                                                                  language)
-    messages = await ItemService.create_announcement_message(callback_data.announcement_type, session, language)
-    for index, message_text in enumerate(messages):
-        reply_markup = kb_builder.as_markup() if index == 0 else None
+    reply_markup = kb_builder.as_markup()
+    async for message_text in ItemService.create_announcement_message(callback_data.announcement_type,
+                                                                      session, language):
         await callback.message.answer(text=message_text, reply_markup=reply_markup)
+        reply_markup = None
 
 
 async def send_confirmation(**kwargs):
@@ -63,7 +65,24 @@ async def send_confirmation(**kwargs):
     session: AsyncSession = kwargs.get("session")
     language: Language = kwargs.get("language")
     await AnnouncementService.send_announcement(callback, callback_data, session, language)
-    await callback.message.delete()
+
+
+async def broadcast_job_view(**kwargs):
+    callback: CallbackQuery = kwargs.get("callback")
+    callback_data: AnnouncementCallback = kwargs.get("callback_data")
+    session: AsyncSession = kwargs.get("session")
+    language: Language = kwargs.get("language")
+    msg, kb_builder = await AnnouncementService.get_broadcast_job_view(callback_data, session, language)
+    await callback.message.edit_text(text=msg, reply_markup=kb_builder.as_markup())
+
+
+async def update_broadcast_job(**kwargs):
+    callback: CallbackQuery = kwargs.get("callback")
+    callback_data: AnnouncementCallback = kwargs.get("callback_data")
+    session: AsyncSession = kwargs.get("session")
+    language: Language = kwargs.get("language")
+    msg, kb_builder = await AnnouncementService.update_broadcast_job(callback, callback_data, session, language)
+    await callback.message.edit_text(text=msg, reply_markup=kb_builder.as_markup())
 
 
 @announcement_router.callback_query(AdminIdFilter(), AnnouncementCallback.filter())
@@ -78,7 +97,9 @@ async def announcement_navigation(callback: CallbackQuery,
         0: announcement_menu,
         1: send_everyone,
         2: send_generated_msg,
-        3: send_confirmation
+        3: send_confirmation,
+        4: broadcast_job_view,
+        5: update_broadcast_job
     }
 
     current_level_function = levels[current_level]
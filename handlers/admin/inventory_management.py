@@ -1,9 +1,12 @@
+import time
+
 from aiogram import Router, F
 from aiogram.filters import StateFilter
 from aiogram.fsm.context import FSMContext
 from aiogram.types import CallbackQuery, Message
 from sqlalchemy.ext.asyncio import AsyncSession
 from callbacks import InventoryManagementCallback, AddType
+from enums.bot_entity import BotEntity
 from enums.language import Language
 from handlers.admin.constants import InventoryManagementStates
 from handlers.common.common import enable_search
@@ -12,9 +15,12 @@ from services.inventory_management import InventoryManagementService
 from services.item import ItemService
 from services.notification import NotificationService
 from utils.custom_filters import AdminIdFilter
+from utils.utils import get_text
 
 inventory_management = Router()
 
+IMPORT_PROGRESS_INTERVAL = 3
+
 
 async def inventory_management_menu(**kwargs):
     callback: CallbackQuery = kwargs.get("callback")
@@ -82,8 +88,22 @@ async def add_items_document(message: Message, state: FSMContext, session: Async
     file_id = message.document.file_id
     file = await message.bot.get_file(file_id)
     await message.bot.download_file(file.file_path, file_name)
-    msg = await ItemService.add_items(file_name, add_type, session, language)
-    await message.answer(text=msg)
+    progress_message = await message.answer(
+        text=get_text(language, BotEntity.ADMIN, "add_items_progress").format(imported=0)
+    )
+    last_progress_at = time.monotonic()
+
+    async def report_progress(imported: int):
+        nonlocal last_progress_at
+        if time.monotonic() - last_progress_at < IMPORT_PROGRESS_INTERVAL:
+            return
+        last_progress_at = time.monotonic()
+        await progress_message.edit_text(
+            text=get_text(language, BotEntity.ADMIN, "add_items_progress").format(imported=imported)
+        )
+
+    msg = await ItemService.add_items(file_name, add_type, session, language, report_progress)
+    await progress_message.edit_text(text=msg)
     await state.clear()
 
 
@@ -3,7 +3,6 @@ from aiogram.filters import StateFilter
 from aiogram.fsm.context import FSMContext
 from aiogram.types import CallbackQuery, Message
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import Session
 from callbacks import CartCallback
 from enums.keyboard_button import KeyboardButton as KB
 from enums.language import Language
@@ -104,7 +103,7 @@ async def receive_purchase_details(message: Message, state: FSMContext, session:
 @cart_router.callback_query(CartCallback.filter(), IsUserExistFilter())
 async def navigate_cart_process(callback: CallbackQuery,
                                 callback_data: CartCallback,
-                                session: AsyncSession | Session,
+                                session: AsyncSession,
                                 state: FSMContext,
                                 language: Language):
     current_level = callback_data.level
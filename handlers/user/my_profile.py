@@ -138,6 +138,15 @@ async def referral_system(**kwargs):
     await callback.message.edit_caption(caption=msg, reply_markup=kb_builder.as_markup())
 
 
+async def balance_history(**kwargs):
+    callback: CallbackQuery = kwargs.get("callback")
+    callback_data: MyProfileCallback = kwargs.get("callback_data")
+    session: AsyncSession = kwargs.get("session")
+    language: Language = kwargs.get("language")
+    msg, kb_builder = await UserService.get_balance_history(callback.from_user.id, callback_data, session, language)
+    await callback.message.edit_caption(caption=msg, reply_markup=kb_builder.as_markup())
+
+
 @my_profile_router.message(IsUserExistFilter(), F.text, StateFilter(UserStates.filter_purchase_history))
 async def receive_filter_message(message: Message, state: FSMContext, session: AsyncSession, language: Language):
     await state.update_data(filter=message.html_text)
@@ -181,7 +190,8 @@ async def navigate(callback: CallbackQuery,
         4: get_purchased_item,
         5: get_purchase,
         6: edit_language,
-        7: referral_system
+        7: referral_system,
+        8: balance_history
     }
 
     current_level_function = levels[current_level]
@@ -0,0 +1,18 @@
+from typing import Callable, Dict, Any, Awaitable
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject
+
+from services.multibot import MultibotService
+
+
+class BotReachabilityMiddleware(BaseMiddleware):
+    async def __call__(
+            self,
+            handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+            event: TelegramObject,
+            data: Dict[str, Any]
+    ) -> Awaitable[Any]:
+        from_user = data.get("event_from_user")
+        if from_user is not None:
+            await MultibotService.record_user_bot_if_changed(from_user.id, data["bot"].id)
+        return await handler(event, data)
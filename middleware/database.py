@@ -2,6 +2,7 @@ from typing import Callable, Dict, Any, Awaitable
 from aiogram import BaseMiddleware
 from aiogram.types import TelegramObject
 from db import get_db_session
+from repositories.user import UserRepository
 
 
 class DBSessionMiddleware(BaseMiddleware):
@@ -13,4 +14,9 @@ class DBSessionMiddleware(BaseMiddleware):
     ) -> Awaitable[Any]:
         async with get_db_session() as session:
             data["session"] = session
+            from_user = data.get("event_from_user")
+            if from_user is not None:
+                data["user_dto"] = await UserRepository.get_by_tgid(from_user.id, session)
+            else:
+                data["user_dto"] = None
             return await handler(event, data)
@@ -0,0 +1,56 @@
+"""balance ledger
+
+Revision ID: 2f6b8d4a1c70
+Revises: 9c4e2a7d5b13
+Create Date: 2026-10-18 19:02:13.481520
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2f6b8d4a1c70'
+down_revision: Union[str, None] = '9c4e2a7d5b13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('ledger_entries',
+                    sa.Column('id', sa.Integer(), nullable=False),
+                    sa.Column('user_id', sa.Integer(), nullable=False),
+                    sa.Column('entry_type',
+                              sa.Enum('OPENING_BALANCE', 'DEPOSIT', 'REFERRAL_BONUS', 'REFERRER_BONUS', 'PURCHASE',
+                                      'REFUND', 'ADMIN_CREDIT', 'ADMIN_DEBIT', name='ledgerentrytype'),
+                              nullable=False),
+                    sa.Column('credit', sa.Float(), nullable=False),
+                    sa.Column('debit', sa.Float(), nullable=False),
+                    sa.Column('balance_after', sa.Float(), nullable=False),
+                    sa.Column('reference_id', sa.Integer(), nullable=True),
+                    sa.Column('created_at', sa.DateTime(timezone=True), nullable=True),
+                    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+                    sa.PrimaryKeyConstraint('id')
+                    )
+    op.create_index('ix_ledger_entries_user_id_id', 'ledger_entries', ['user_id', 'id'], unique=False)
+    # Existing balances become the first entry of every user, so the ledger replays to the current totals
+    op.execute("""
+        INSERT INTO ledger_entries (user_id, entry_type, credit, debit, balance_after, created_at)
+        SELECT id,
+               'OPENING_BALANCE',
+               COALESCE(top_up_amount, 0),
+               COALESCE(consume_records, 0),
+               COALESCE(top_up_amount, 0) - COALESCE(consume_records, 0),
+               now()
+        FROM users
+        WHERE COALESCE(top_up_amount, 0) != 0 OR COALESCE(consume_records, 0) != 0
+        ORDER BY id
+    """)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_ledger_entries_user_id_id', table_name='ledger_entries')
+    op.drop_table('ledger_entries')
+    sa.Enum(name='ledgerentrytype').drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,52 @@
+"""broadcast jobs
+
+Revision ID: 4e7a1c2b9d31
+Revises: 85c067b096b6
+Create Date: 2026-10-18 12:24:51.730214
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4e7a1c2b9d31'
+down_revision: Union[str, None] = '85c067b096b6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('broadcast_jobs',
+                    sa.Column('id', sa.Integer(), nullable=False),
+                    sa.Column('announcement_type',
+                              sa.Enum('RESTOCKING', 'CURRENT_STOCK', 'FROM_RECEIVING_MESSAGE',
+                                      name='announcementtype'),
+                              nullable=False),
+                    sa.Column('status',
+                              sa.Enum('RUNNING', 'PAUSED', 'CANCELLED', 'FINISHED', name='broadcaststatus'),
+                              nullable=False),
+                    sa.Column('language', postgresql.ENUM(name='language', create_type=False), nullable=False),
+                    sa.Column('source_chat_id', sa.BigInteger(), nullable=False),
+                    sa.Column('source_message_id', sa.Integer(), nullable=False),
+                    sa.Column('progress_chat_id', sa.BigInteger(), nullable=False),
+                    sa.Column('progress_message_id', sa.Integer(), nullable=False),
+                    sa.Column('messages', sa.ARRAY(sa.String()), nullable=True),
+                    sa.Column('cursor', sa.Integer(), nullable=False),
+                    sa.Column('total_count', sa.Integer(), nullable=False),
+                    sa.Column('sent_count', sa.Integer(), nullable=False),
+                    sa.Column('blocked_count', sa.Integer(), nullable=False),
+                    sa.Column('failed_count', sa.Integer(), nullable=False),
+                    sa.Column('created_at', sa.DateTime(timezone=True), nullable=True),
+                    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+                    sa.PrimaryKeyConstraint('id')
+                    )
+
+
+def downgrade() -> None:
+    op.drop_table('broadcast_jobs')
+    sa.Enum(name='broadcaststatus').drop(op.get_bind(), checkfirst=True)
+    sa.Enum(name='announcementtype').drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,26 @@
+"""outbox in flight status
+
+Revision ID: 5a8c1e3f7d92
+Revises: 2f6b8d4a1c70
+Create Date: 2026-10-19 10:14:52.630871
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5a8c1e3f7d92'
+down_revision: Union[str, None] = '2f6b8d4a1c70'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("ALTER TYPE outboxstatus ADD VALUE IF NOT EXISTS 'IN_FLIGHT'")
+
+
+def downgrade() -> None:
+    # Postgres can't drop an enum value, unfinished rows are parked as FAILED for manual review
+    op.execute("UPDATE outbox_events SET status = 'FAILED' WHERE status = 'IN_FLIGHT'")
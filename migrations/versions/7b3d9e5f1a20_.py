@@ -0,0 +1,45 @@
+"""outbox events
+
+Revision ID: 7b3d9e5f1a20
+Revises: 4e7a1c2b9d31
+Create Date: 2026-10-18 16:02:13.418305
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7b3d9e5f1a20'
+down_revision: Union[str, None] = '4e7a1c2b9d31'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('outbox_events',
+                    sa.Column('id', sa.Integer(), nullable=False),
+                    sa.Column('event_type',
+                              sa.Enum('NEW_DEPOSIT', 'NEW_BUY', 'CRYPTO_WITHDRAWAL', 'WITHDRAWAL_NOTIFICATION',
+                                      name='outboxeventtype'),
+                              nullable=False),
+                    sa.Column('payload', sa.JSON(), nullable=False),
+                    sa.Column('status', sa.Enum('PENDING', 'DELIVERED', 'FAILED', name='outboxstatus'),
+                              nullable=False),
+                    sa.Column('attempts', sa.Integer(), nullable=False),
+                    sa.Column('available_at', sa.DateTime(timezone=True), nullable=False),
+                    sa.Column('last_error', sa.String(), nullable=True),
+                    sa.Column('created_at', sa.DateTime(timezone=True), nullable=True),
+                    sa.PrimaryKeyConstraint('id')
+                    )
+    op.create_index('ix_outbox_events_status_available_at', 'outbox_events', ['status', 'available_at'],
+                    unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_outbox_events_status_available_at', table_name='outbox_events')
+    op.drop_table('outbox_events')
+    sa.Enum(name='outboxstatus').drop(op.get_bind(), checkfirst=True)
+    sa.Enum(name='outboxeventtype').drop(op.get_bind(), checkfirst=True)
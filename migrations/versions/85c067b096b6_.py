@@ -0,0 +1,46 @@
+"""partial indexes for unsold items
+
+Revision ID: 85c067b096b6
+Revises: cfa2c040b039
+Create Date: 2026-10-18 11:02:17.554910
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '85c067b096b6'
+down_revision: Union[str, None] = 'cfa2c040b039'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+UNSOLD = sa.text('is_sold = false')
+
+
+def upgrade() -> None:
+    # CONCURRENTLY keeps the shop writable while large item tables are indexed
+    with op.get_context().autocommit_block():
+        op.create_index('ix_items_unsold_stock_key', 'items',
+                        ['item_type', 'category_id', 'subcategory_id', 'id'],
+                        postgresql_where=UNSOLD, postgresql_concurrently=True, if_not_exists=True)
+        op.create_index('ix_items_unsold_category_id', 'items', ['category_id'],
+                        postgresql_where=UNSOLD, postgresql_concurrently=True, if_not_exists=True)
+        op.create_index('ix_items_unsold_subcategory_id', 'items', ['subcategory_id'],
+                        postgresql_where=UNSOLD, postgresql_concurrently=True, if_not_exists=True)
+        op.create_index('ix_items_new', 'items', ['id'],
+                        postgresql_where=sa.text('is_new = true'), postgresql_concurrently=True,
+                        if_not_exists=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_items_new', table_name='items', postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_items_unsold_subcategory_id', table_name='items', postgresql_concurrently=True,
+                      if_exists=True)
+        op.drop_index('ix_items_unsold_category_id', table_name='items', postgresql_concurrently=True,
+                      if_exists=True)
+        op.drop_index('ix_items_unsold_stock_key', table_name='items', postgresql_concurrently=True,
+                      if_exists=True)
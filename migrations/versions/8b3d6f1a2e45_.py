@@ -0,0 +1,28 @@
+"""broadcast job lease
+
+Revision ID: 8b3d6f1a2e45
+Revises: 5a8c1e3f7d92
+Create Date: 2026-10-19 16:02:37.418205
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8b3d6f1a2e45'
+down_revision: Union[str, None] = '5a8c1e3f7d92'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('broadcast_jobs', sa.Column('owner', sa.String(), nullable=True))
+    op.add_column('broadcast_jobs', sa.Column('lease_until', sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('broadcast_jobs', 'lease_until')
+    op.drop_column('broadcast_jobs', 'owner')
@@ -0,0 +1,30 @@
+"""outbox dedup key and payment events
+
+Revision ID: 9c4e2a7d5b13
+Revises: 7b3d9e5f1a20
+Create Date: 2026-10-18 17:11:40.102947
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9c4e2a7d5b13'
+down_revision: Union[str, None] = '7b3d9e5f1a20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("ALTER TYPE outboxeventtype ADD VALUE IF NOT EXISTS 'PAYMENT_EVENT'")
+    op.add_column('outbox_events', sa.Column('dedup_key', sa.String(), nullable=True))
+    op.create_unique_constraint('outbox_events_dedup_key_key', 'outbox_events', ['dedup_key'])
+
+
+def downgrade() -> None:
+    op.execute("DELETE FROM outbox_events WHERE event_type = 'PAYMENT_EVENT'")
+    op.drop_constraint('outbox_events_dedup_key_key', 'outbox_events', type_='unique')
+    op.drop_column('outbox_events', 'dedup_key')
@@ -0,0 +1,25 @@
+"""outbox admin notifications
+
+Revision ID: c7e2a9d4f318
+Revises: 8b3d6f1a2e45
+Create Date: 2026-10-20 09:41:13.275604
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c7e2a9d4f318'
+down_revision: Union[str, None] = '8b3d6f1a2e45'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("ALTER TYPE outboxeventtype ADD VALUE IF NOT EXISTS 'ADMIN_NOTIFICATION'")
+
+
+def downgrade() -> None:
+    op.execute("DELETE FROM outbox_events WHERE event_type = 'ADMIN_NOTIFICATION'")
@@ -0,0 +1,51 @@
+"""item stock summary
+
+Revision ID: cfa2c040b039
+Revises: 91c3856a8aa0
+Create Date: 2026-10-18 10:12:40.318204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'cfa2c040b039'
+down_revision: Union[str, None] = '91c3856a8aa0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('item_stock',
+                    sa.Column('item_type', postgresql.ENUM(name='itemtype', create_type=False), nullable=False),
+                    sa.Column('category_id', sa.Integer(), nullable=False),
+                    sa.Column('subcategory_id', sa.Integer(), nullable=False),
+                    sa.Column('price', sa.Float(), nullable=False),
+                    sa.Column('description', sa.String(), nullable=False),
+                    sa.Column('available_qty', sa.Integer(), nullable=False),
+                    sa.CheckConstraint('available_qty >= 0', name='check_item_stock_available_qty_positive'),
+                    sa.ForeignKeyConstraint(['category_id'], ['categories.id'], ondelete='CASCADE'),
+                    sa.ForeignKeyConstraint(['subcategory_id'], ['subcategories.id'], ondelete='CASCADE'),
+                    sa.PrimaryKeyConstraint('item_type', 'category_id', 'subcategory_id')
+                    )
+    op.create_index('ix_item_stock_category_id', 'item_stock', ['category_id'])
+    op.create_index('ix_item_stock_subcategory_id', 'item_stock', ['subcategory_id'])
+    op.execute("""
+        INSERT INTO item_stock (item_type, category_id, subcategory_id, price, description, available_qty)
+        SELECT DISTINCT ON (item_type, category_id, subcategory_id)
+               item_type, category_id, subcategory_id, price, description,
+               count(*) OVER (PARTITION BY item_type, category_id, subcategory_id)
+        FROM items
+        WHERE is_sold = false
+        ORDER BY item_type, category_id, subcategory_id, id
+    """)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_item_stock_subcategory_id', table_name='item_stock')
+    op.drop_index('ix_item_stock_category_id', table_name='item_stock')
+    op.drop_table('item_stock')
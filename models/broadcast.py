@@ -0,0 +1,66 @@
+from datetime import datetime
+
+from pydantic import BaseModel
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, Enum, ARRAY, func
+
+from enums.announcement_type import AnnouncementType
+from enums.broadcast_status import BroadcastStatus
+from enums.language import Language
+from models.base import Base
+
+
+class BroadcastJob(Base):
+    __tablename__ = 'broadcast_jobs'
+
+    id = Column(Integer, primary_key=True)
+    announcement_type = Column(Enum(AnnouncementType), nullable=False)
+    status = Column(Enum(BroadcastStatus), nullable=False, default=BroadcastStatus.RUNNING)
+    language = Column(Enum(Language), nullable=False)
+    source_chat_id = Column(BigInteger, nullable=False)
+    source_message_id = Column(Integer, nullable=False)
+    progress_chat_id = Column(BigInteger, nullable=False)
+    progress_message_id = Column(Integer, nullable=False)
+    messages = Column(ARRAY(String), nullable=True)
+    cursor = Column(Integer, nullable=False, default=0)
+    total_count = Column(Integer, nullable=False, default=0)
+    sent_count = Column(Integer, nullable=False, default=0)
+    blocked_count = Column(Integer, nullable=False, default=0)
+    failed_count = Column(Integer, nullable=False, default=0)
+    owner = Column(String, nullable=True)
+    lease_until = Column(DateTime(timezone=True), nullable=True)
+    created_at = Column(DateTime(timezone=True), default=func.now())
+    updated_at = Column(DateTime(timezone=True), default=func.now(), onupdate=func.now())
+
+    def __repr__(self):
+        return f"BroadcastJob ID:{self.id}"
+
+
+class BroadcastJobDTO(BaseModel):
+    id: int | None = None
+    announcement_type: AnnouncementType | None = None
+    status: BroadcastStatus | None = None
+    language: Language | None = None
+    source_chat_id: int | None = None
+    source_message_id: int | None = None
+    progress_chat_id: int | None = None
+    progress_message_id: int | None = None
+    messages: list[str] | None = None
+    cursor: int | None = None
+    total_count: int | None = None
+    sent_count: int | None = None
+    blocked_count: int | None = None
+    failed_count: int | None = None
+    owner: str | None = None
+    lease_until: datetime | None = None
+    created_at: datetime | None = None
+    updated_at: datetime | None = None
+
+
+class BroadcastStatsDTO(BaseModel):
+    sent: int = 0
+    blocked: int = 0
+    failed: int = 0
+
+    @property
+    def processed(self) -> int:
+        return self.sent + self.blocked + self.failed
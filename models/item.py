@@ -1,6 +1,6 @@
 from pydantic import BaseModel
 from sqladmin import ModelView
-from sqlalchemy import Column, Integer, String, Float, Boolean, ForeignKey, CheckConstraint, Enum
+from sqlalchemy import Column, Integer, String, Float, Boolean, ForeignKey, CheckConstraint, Enum, Index, text
 from sqlalchemy.orm import relationship
 
 from enums.item_type import ItemType
@@ -24,6 +24,11 @@ class Item(Base):
 
     __table_args__ = (
         CheckConstraint('price > 0', name='check_price_positive'),
+        Index('ix_items_unsold_stock_key', 'item_type', 'category_id', 'subcategory_id', 'id',
+              postgresql_where=text('is_sold = false')),
+        Index('ix_items_unsold_category_id', 'category_id', postgresql_where=text('is_sold = false')),
+        Index('ix_items_unsold_subcategory_id', 'subcategory_id', postgresql_where=text('is_sold = false')),
+        Index('ix_items_new', 'id', postgresql_where=text('is_new = true')),
     )
 
     def __repr__(self):
@@ -42,6 +47,7 @@ class ItemDTO(BaseModel):
     is_sold: bool | None = None
     is_new: bool | None = None
     description: str | None = None
+    available_qty: int | None = None
 
 
 class ItemAvailabilityDTO(BaseModel):
@@ -53,6 +59,13 @@ class ItemAvailabilityDTO(BaseModel):
     available_qty: int
 
 
+class SubcategorySummaryDTO(BaseModel):
+    category_name: str
+    subcategory_name: str
+    available_qty: int
+    price: float
+
+
 class ItemAdmin(ModelView, model=Item):
     column_exclude_list = [Item.category_id, Item.subcategory_id]
     column_formatters = {Item.private_data: lambda m, a: f"{m.private_data[:20]}..." if m.private_data else "",
@@ -68,3 +81,19 @@ class ItemAdmin(ModelView, model=Item):
     can_create = True
     can_edit = True
     can_export = True
+
+    async def on_model_change(self, data, model, is_created, request):
+        if not is_created:
+            request.state.item_stock_key = (model.item_type, model.category_id, model.subcategory_id)
+
+    async def after_model_change(self, data, model, is_created, request):
+        # Imported here because db imports this module to register the models
+        from db import get_db_session, session_commit
+        from repositories.item_stock import ItemStockRepository
+
+        keys = {(model.item_type, model.category_id, model.subcategory_id)}
+        if not is_created:
+            keys.add(request.state.item_stock_key)
+        async with get_db_session() as session:
+            await ItemStockRepository.refresh(list(keys), session)
+            await session_commit(session)
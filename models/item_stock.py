@@ -0,0 +1,21 @@
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, CheckConstraint, Enum, Index
+
+from enums.item_type import ItemType
+from models.base import Base
+
+
+class ItemStock(Base):
+    __tablename__ = 'item_stock'
+
+    item_type = Column(Enum(ItemType), primary_key=True)
+    category_id = Column(Integer, ForeignKey("categories.id", ondelete="CASCADE"), primary_key=True)
+    subcategory_id = Column(Integer, ForeignKey("subcategories.id", ondelete="CASCADE"), primary_key=True)
+    price = Column(Float, nullable=False)
+    description = Column(String, nullable=False)
+    available_qty = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        CheckConstraint('available_qty >= 0', name='check_item_stock_available_qty_positive'),
+        Index('ix_item_stock_category_id', 'category_id'),
+        Index('ix_item_stock_subcategory_id', 'subcategory_id'),
+    )
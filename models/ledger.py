@@ -0,0 +1,59 @@
+from datetime import datetime
+
+from pydantic import BaseModel
+from sqlalchemy import Column, Integer, ForeignKey, Enum, Float, DateTime, Index, func
+
+from enums.ledger_entry_type import LedgerEntryType
+from models.base import Base
+
+
+class LedgerEntry(Base):
+    __tablename__ = 'ledger_entries'
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey('users.id'), nullable=False)
+    entry_type = Column(Enum(LedgerEntryType), nullable=False)
+    # credit mirrors users.top_up_amount and debit mirrors users.consume_records, so their sums must match
+    credit = Column(Float, nullable=False, default=0.0)
+    debit = Column(Float, nullable=False, default=0.0)
+    balance_after = Column(Float, nullable=False)
+    reference_id = Column(Integer, nullable=True)
+    created_at = Column(DateTime(timezone=True), default=func.now())
+
+    __table_args__ = (
+        Index('ix_ledger_entries_user_id_id', 'user_id', 'id'),
+    )
+
+    def __repr__(self):
+        return f"LedgerEntry ID:{self.id}"
+
+
+class LedgerEntryDTO(BaseModel):
+    id: int | None = None
+    user_id: int | None = None
+    entry_type: LedgerEntryType | None = None
+    credit: float | None = None
+    debit: float | None = None
+    balance_after: float | None = None
+    reference_id: int | None = None
+    created_at: datetime | None = None
+
+
+class LedgerMismatchDTO(BaseModel):
+    user_id: int
+    top_up_amount: float
+    consume_records: float
+    ledger_credit: float
+    ledger_debit: float
+
+
+class LedgerChainBreakDTO(BaseModel):
+    user_id: int
+    ledger_entry_id: int
+    balance_after: float
+    replayed_balance: float
+
+
+class LedgerReplayDTO(BaseModel):
+    mismatches: list[LedgerMismatchDTO] = []
+    chain_breaks: list[LedgerChainBreakDTO] = []
@@ -0,0 +1,70 @@
+from datetime import datetime
+
+from aiogram.types import InlineKeyboardMarkup
+from pydantic import BaseModel
+from sqlalchemy import Column, Integer, String, DateTime, Enum, JSON, Index, func
+
+from enums.cryptocurrency import Cryptocurrency
+from enums.outbox_event_type import OutboxEventType
+from enums.outbox_status import OutboxStatus
+from models.base import Base
+from models.buy import BuyDTO
+from models.payment import ProcessingPaymentDTO, TablePaymentDTO
+from models.referral import ReferralBonusDTO
+from models.user import UserDTO
+
+
+class OutboxEvent(Base):
+    __tablename__ = 'outbox_events'
+
+    id = Column(Integer, primary_key=True)
+    event_type = Column(Enum(OutboxEventType), nullable=False)
+    payload = Column(JSON, nullable=False)
+    status = Column(Enum(OutboxStatus), nullable=False, default=OutboxStatus.PENDING)
+    attempts = Column(Integer, nullable=False, default=0)
+    available_at = Column(DateTime(timezone=True), nullable=False, default=func.now())
+    last_error = Column(String, nullable=True)
+    dedup_key = Column(String, nullable=True, unique=True)
+    created_at = Column(DateTime(timezone=True), default=func.now())
+
+    __table_args__ = (
+        Index('ix_outbox_events_status_available_at', 'status', 'available_at'),
+    )
+
+    def __repr__(self):
+        return f"OutboxEvent ID:{self.id}"
+
+
+class OutboxEventDTO(BaseModel):
+    id: int | None = None
+    event_type: OutboxEventType | None = None
+    payload: dict | None = None
+    status: OutboxStatus | None = None
+    attempts: int | None = None
+    available_at: datetime | None = None
+    last_error: str | None = None
+    dedup_key: str | None = None
+    created_at: datetime | None = None
+
+
+class NewDepositPayloadDTO(BaseModel):
+    payment: ProcessingPaymentDTO
+    user: UserDTO
+    table_payment: TablePaymentDTO
+    referral_bonus: ReferralBonusDTO
+
+
+class NewBuyPayloadDTO(BaseModel):
+    buy: BuyDTO
+    user: UserDTO
+
+
+class CryptoWithdrawalPayloadDTO(BaseModel):
+    cryptocurrency: Cryptocurrency
+    payment_id: int
+
+
+class AdminNotificationPayloadDTO(BaseModel):
+    admin_id: int
+    message: str
+    reply_markup: InlineKeyboardMarkup | None = None
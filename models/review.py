@@ -40,6 +40,14 @@ class ReviewDTO(BaseModel):
     create_datetime: datetime | None = datetime.now(tz=timezone.utc)
 
 
+class ReviewListingDTO(BaseModel):
+    id: int
+    buyItem_id: int
+    buy_id: int
+    subcategory_name: str | None
+    total_price: float | None
+
+
 class ReviewAdmin(ModelView, model=Review):
     column_exclude_list = [Review.buyItem_id,
                            Review.image_id]
@@ -90,6 +90,11 @@ class UserDTO(BaseModel):
                 get_text(language, BotEntity.ADMIN, "users_chart_title"))
 
 
+class UserBotDTO(BaseModel):
+    bot_id: int
+    last_seen: datetime
+
+
 class UserAdmin(ModelView, model=User):
     column_exclude_list = [User.buys,
                            User.deposits,
@@ -98,6 +103,9 @@ class UserAdmin(ModelView, model=User):
                            User.referred_by_user_id,
                            User.payments,
                            User.cart]
+    # Balances change only through the ledger
+    form_excluded_columns = [User.top_up_amount,
+                             User.consume_records]
     can_delete = False
     can_edit = True
     can_create = False
@@ -116,3 +124,13 @@ class UserAdmin(ModelView, model=User):
                             User.referred_at]
     name_plural = "Users"
     name = "User"
+
+    async def on_model_change(self, data, model, is_created, request):
+        request.state.user_telegram_id = model.telegram_id
+
+    async def after_model_change(self, data, model, is_created, request):
+        # Imported here because db imports this module to register the models
+        from repositories.user_cache import UserCacheRepository
+
+        # Bans and other edits must not wait for the cached profile to expire
+        await UserCacheRepository.invalidate(*{request.state.user_telegram_id, model.telegram_id})
@@ -17,9 +17,15 @@ from aiogram.webhook.aiohttp_server import (
 from db import create_db_and_tables
 from enums.bot_entity import BotEntity
 from enums.language import Language
+from middleware.bot_reachability import BotReachabilityMiddleware
+from repositories.item_stock import ItemStockRepository
+from services.announcement import AnnouncementService
+from services.ledger import LedgerService
 from services.multibot import MultibotService
+from services.outbox import OutboxService
 from utils.custom_filters import AdminIdFilter
-from utils.telegram import create_bot, create_telegram_session
+from utils.metrics import metrics
+from utils.telegram import close_bots, get_bot, get_telegram_session
 from utils.utils import get_text
 
 main_router_multibot = Router()
@@ -67,9 +73,21 @@ async def command_add_bot(message: Message, command: CommandObject, bot: Bot) ->
     )
 
 
+async def metrics_handler(request: web.Request) -> web.Response:
+    if not config.METRICS_TOKEN:
+        raise web.HTTPNotFound()
+    if request.headers.get("X-Metrics-Token") != config.METRICS_TOKEN:
+        raise web.HTTPUnauthorized()
+    return web.json_response(metrics.snapshot())
+
+
 async def on_startup(dispatcher: Dispatcher, bot: Bot):
     await bot.set_webhook(f"{BASE_URL}{MAIN_BOT_PATH}")
     await create_db_and_tables()
+    await ItemStockRepository.init_stock()
+    LedgerService.start_verification()
+    await AnnouncementService.resume_broadcast_jobs(bot)
+    OutboxService.start_dispatcher()
     await MultibotService.restore_child_bot_webhooks(OTHER_BOTS_URL)
     for admin in config.ADMIN_ID_LIST:
         try:
@@ -78,21 +96,29 @@ async def on_startup(dispatcher: Dispatcher, bot: Bot):
             logging.warning(e)
 
 
+async def on_shutdown():
+    await LedgerService.stop_verification()
+    await OutboxService.stop_dispatcher()
+    await close_bots()
+
+
 def main(main_router):
     logging.basicConfig(level=logging.INFO, stream=sys.stdout)
-    session = create_telegram_session()
-    bot_settings = {"session": session}
-    bot = create_bot(MAIN_BOT_TOKEN, session=session)
+    bot_settings = {"session": get_telegram_session()}
+    bot = get_bot(MAIN_BOT_TOKEN)
     storage = MemoryStorage()
 
     main_dispatcher = Dispatcher(storage=storage)
     main_dispatcher.include_router(main_router_multibot)
     main_dispatcher.startup.register(on_startup)
+    main_dispatcher.shutdown.register(on_shutdown)
 
     multibot_dispatcher = Dispatcher(storage=storage)
+    multibot_dispatcher.update.outer_middleware(BotReachabilityMiddleware())
     multibot_dispatcher.include_router(main_router)
 
     app = web.Application()
+    app.router.add_get("/metrics", metrics_handler)
     SimpleRequestHandler(dispatcher=main_dispatcher, bot=bot).register(app, path=MAIN_BOT_PATH)
     TokenBasedRequestHandler(
         dispatcher=multibot_dispatcher,
@@ -1,15 +1,14 @@
-import datetime
+import time
 from fastapi import APIRouter, Request, HTTPException
 
 import config
 from crypto_api.CryptoApiWrapper import CryptoApiWrapper
 from db import get_db_session, session_commit
-from models.deposit import DepositDTO
+from enums.outbox_event_type import OutboxEventType
 from models.payment import ProcessingPaymentDTO
-from repositories.deposit import DepositRepository
-from repositories.payment import PaymentRepository
-from services.notification import NotificationService
-from services.referral import ReferralService
+from repositories.outbox import OutboxRepository
+from services.outbox import OutboxService
+from utils.metrics import metrics
 
 processing_router = APIRouter(prefix=f"{config.WEBHOOK_PATH}cryptoprocessing")
 
@@ -20,38 +19,20 @@ def __security_check(x_signature_header: str | None, payload: bytes):
 
 @processing_router.post("/event")
 async def fetch_crypto_event(payment_dto: ProcessingPaymentDTO, request: Request):
+    started_at = time.perf_counter()
     request_body = await request.body()
-    print(f"EVENT RECEIVED:{request_body}")
     is_security_pass = __security_check(request.headers.get("X-Signature"), request_body)
     if is_security_pass is False:
         raise HTTPException(status_code=403, detail="Invalid signature")
-    else:
-        async with get_db_session() as session:
-            user = await PaymentRepository.get_user_by_payment_id(payment_dto.id, session)
-            table_payment_dto = await PaymentRepository.get_by_processing_payment_id(payment_dto.id, session)
-            if payment_dto.isPaid is True and table_payment_dto.is_paid is False:
-                table_payment_dto.is_paid = True
-                await PaymentRepository.update(table_payment_dto, session)
-                await DepositRepository.create(DepositDTO(
-                    user_id=user.id,
-                    network=payment_dto.cryptoCurrency,
-                    amount=int(payment_dto.cryptoAmount * pow(10, payment_dto.cryptoCurrency.get_decimals())),
-                    fiat_amount=payment_dto.fiatAmount,
-                    deposit_datetime=datetime.datetime.now()
-                ), session)
-                referral_bonus_dto = await ReferralService.apply_referral_logic(payment_dto, user, session)
-                await session_commit(session)
-                await NotificationService.new_deposit(payment_dto, user, table_payment_dto, referral_bonus_dto)
-                if config.CRYPTO_FORWARDING_MODE:
-                    withdraw_dto = await CryptoApiWrapper.withdrawal(
-                        payment_dto.cryptoCurrency,
-                        payment_dto.cryptoCurrency.get_forwarding_address(),
-                        False,
-                        payment_dto.id,
-                    )
-                    await NotificationService.withdrawal(withdraw_dto)
-            elif payment_dto.isPaid is False:
-                await NotificationService.payment_expired(user, payment_dto, table_payment_dto)
-            else:
-                pass
-            return "200"
+    async with get_db_session() as session:
+        # Redeliveries of a queued or delivered event are dropped by the dedup key, a failed one is requeued
+        await OutboxRepository.add_unique(
+            OutboxEventType.PAYMENT_EVENT,
+            payment_dto.model_copy(update={"callbackSecret": None}),
+            f"payment:{payment_dto.id}:{'paid' if payment_dto.isPaid else 'unpaid'}",
+            session
+        )
+        await session_commit(session)
+    OutboxService.wake_up()
+    metrics.observe("payment_webhook_enqueue_seconds", time.perf_counter() - started_at)
+    return "200"
@@ -0,0 +1,95 @@
+from datetime import timedelta
+
+from sqlalchemy import select, update, or_, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from db import session_execute, session_flush
+from enums.broadcast_status import BroadcastStatus
+from models.broadcast import BroadcastJob, BroadcastJobDTO, BroadcastStatsDTO
+
+
+class BroadcastJobRepository:
+    UNFINISHED_STATUSES = (BroadcastStatus.RUNNING, BroadcastStatus.PAUSED)
+    LEASE_SECONDS = 300
+
+    @staticmethod
+    async def create(broadcast_job_dto: BroadcastJobDTO, session: AsyncSession) -> BroadcastJobDTO:
+        broadcast_job = BroadcastJob(**broadcast_job_dto.model_dump(exclude_none=True))
+        session.add(broadcast_job)
+        await session_flush(session)
+        return BroadcastJobDTO.model_validate(broadcast_job, from_attributes=True)
+
+    @staticmethod
+    async def get_by_id(broadcast_job_id: int, session: AsyncSession) -> BroadcastJobDTO | None:
+        stmt = (select(BroadcastJob)
+                .where(BroadcastJob.id == broadcast_job_id)
+                .execution_options(populate_existing=True))
+        broadcast_job = await session_execute(stmt, session)
+        broadcast_job = broadcast_job.scalar()
+        if broadcast_job is None:
+            return None
+        return BroadcastJobDTO.model_validate(broadcast_job, from_attributes=True)
+
+    @staticmethod
+    async def get_unfinished(session: AsyncSession) -> list[BroadcastJobDTO]:
+        stmt = (select(BroadcastJob)
+                .where(BroadcastJob.status.in_(BroadcastJobRepository.UNFINISHED_STATUSES))
+                .order_by(BroadcastJob.id))
+        broadcast_jobs = await session_execute(stmt, session)
+        return [BroadcastJobDTO.model_validate(broadcast_job, from_attributes=True)
+                for broadcast_job in broadcast_jobs.scalars().all()]
+
+    @staticmethod
+    async def get_status(broadcast_job_id: int, session: AsyncSession) -> BroadcastStatus:
+        stmt = select(BroadcastJob.status).where(BroadcastJob.id == broadcast_job_id)
+        status = await session_execute(stmt, session)
+        return status.scalar_one()
+
+    @staticmethod
+    async def set_status(broadcast_job_id: int,
+                         status: BroadcastStatus,
+                         from_statuses: tuple[BroadcastStatus, ...],
+                         session: AsyncSession) -> bool:
+        stmt = (update(BroadcastJob)
+                .where(BroadcastJob.id == broadcast_job_id, BroadcastJob.status.in_(from_statuses))
+                .values(status=status)
+                .returning(BroadcastJob.id))
+        updated = await session_execute(stmt, session)
+        return updated.scalar() is not None
+
+    @staticmethod
+    async def claim(broadcast_job_id: int, owner: str, session: AsyncSession) -> bool:
+        """
+        Takes or renews the lease on an unfinished job, only one process may run a job until its lease expires.
+        """
+        stmt = (update(BroadcastJob)
+                .where(BroadcastJob.id == broadcast_job_id,
+                       BroadcastJob.status.in_(BroadcastJobRepository.UNFINISHED_STATUSES),
+                       or_(BroadcastJob.owner == owner,
+                           BroadcastJob.lease_until.is_(None),
+                           BroadcastJob.lease_until < func.now()))
+                .values(owner=owner,
+                        lease_until=func.now() + timedelta(seconds=BroadcastJobRepository.LEASE_SECONDS))
+                .returning(BroadcastJob.id))
+        claimed = await session_execute(stmt, session)
+        return claimed.scalar() is not None
+
+    @staticmethod
+    async def save_checkpoint(broadcast_job_id: int,
+                              owner: str,
+                              cursor: int,
+                              stats: BroadcastStatsDTO,
+                              session: AsyncSession) -> BroadcastStatus | None:
+        """
+        Renews the lease along with the checkpoint, returns None once another process has taken the job over.
+        """
+        stmt = (update(BroadcastJob)
+                .where(BroadcastJob.id == broadcast_job_id, BroadcastJob.owner == owner)
+                .values(cursor=cursor,
+                        sent_count=stats.sent,
+                        blocked_count=stats.blocked,
+                        failed_count=stats.failed,
+                        lease_until=func.now() + timedelta(seconds=BroadcastJobRepository.LEASE_SECONDS))
+                .returning(BroadcastJob.status))
+        status = await session_execute(stmt, session)
+        return status.scalar()
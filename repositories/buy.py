@@ -2,7 +2,6 @@ import math
 
 from sqlalchemy import select, func, update, or_, literal_column, any_
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import Session
 
 import config
 from callbacks import StatisticsTimeDelta
@@ -44,7 +43,7 @@ class BuyRepository:
         return [BuyDTO.model_validate(buy, from_attributes=True) for buy in buys.scalars().all()]
 
     @staticmethod
-    async def create(buy_dto: BuyDTO, session: Session | AsyncSession) -> BuyDTO:
+    async def create(buy_dto: BuyDTO, session: AsyncSession) -> BuyDTO:
         buy = Buy(**buy_dto.model_dump())
         session.add(buy)
         await session_flush(session)
@@ -105,7 +104,7 @@ class BuyRepository:
                 refund_data.mappings().all()]
 
     @staticmethod
-    async def get_refund_data_single(buy_id: int, session: Session | AsyncSession) -> RefundDTO:
+    async def get_refund_data_single(buy_id: int, session: AsyncSession) -> RefundDTO:
         stmt = (select(Buy.total_price,
                        BuyItem.item_ids,
                        Buy.id.label("buy_id"),
@@ -125,13 +124,13 @@ class BuyRepository:
         return RefundDTO.model_validate(refund_data.mappings().one(), from_attributes=True)
 
     @staticmethod
-    async def get_by_id(buy_id: int, session: Session | AsyncSession) -> BuyDTO:
+    async def get_by_id(buy_id: int, session: AsyncSession) -> BuyDTO:
         stmt = select(Buy).where(Buy.id == buy_id)
         buy = await session_execute(stmt, session)
         return BuyDTO.model_validate(buy.scalar_one(), from_attributes=True)
 
     @staticmethod
-    async def update(buy_dto: BuyDTO, session: Session | AsyncSession):
+    async def update(buy_dto: BuyDTO, session: AsyncSession):
         buy_dto_dict = buy_dto.model_dump()
         none_keys = [k for k, v in buy_dto_dict.items() if v is None]
         for k in none_keys:
@@ -140,7 +139,7 @@ class BuyRepository:
         await session_execute(stmt, session)
 
     @staticmethod
-    async def get_by_timedelta(timedelta: StatisticsTimeDelta, session: Session | AsyncSession) -> list[BuyDTO]:
+    async def get_by_timedelta(timedelta: StatisticsTimeDelta, session: AsyncSession) -> list[BuyDTO]:
         start, end = timedelta.get_time_range()
         stmt = select(Buy).where(Buy.buy_datetime >= start,
                                  Buy.buy_datetime <= end,
@@ -159,7 +158,7 @@ class BuyRepository:
         return calculate_max_page(buys)
 
     @staticmethod
-    async def get_qty_by_buyer_id(buyer_id: int, session: AsyncSession | Session) -> int:
+    async def get_qty_by_buyer_id(buyer_id: int, session: AsyncSession) -> int:
         stmt = (select(func.count(Buy.id))
                 .where(Buy.buyer_id == buyer_id,
                        Buy.status != BuyStatus.REFUNDED))
@@ -2,7 +2,6 @@ import math
 
 from sqlalchemy import select, or_, func, literal_column, any_
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import Session
 
 import config
 from db import session_execute
@@ -16,13 +15,13 @@ from utils.utils import calculate_max_page
 
 class BuyItemRepository:
     @staticmethod
-    async def get_single_by_buy_id(buy_id: int, session: Session | AsyncSession) -> BuyItemDTO:
+    async def get_single_by_buy_id(buy_id: int, session: AsyncSession) -> BuyItemDTO:
         stmt = select(BuyItem).where(BuyItem.buy_id == buy_id).limit(1)
         buy_item = await session_execute(stmt, session)
         return BuyItemDTO.model_validate(buy_item.scalar(), from_attributes=True)
 
     @staticmethod
-    async def create_many(buy_item_dto_list: list[BuyItemDTO], session: Session | AsyncSession):
+    async def create_many(buy_item_dto_list: list[BuyItemDTO], session: AsyncSession):
         for buy_item_dto in buy_item_dto_list:
             session.add(BuyItem(**buy_item_dto.model_dump()))
 
@@ -31,13 +30,13 @@ class BuyItemRepository:
         session.add(BuyItem(**buy_item_dto.model_dump()))
 
     @staticmethod
-    async def get_all_by_buy_id(buy_id: int, session: Session | AsyncSession) -> list[BuyItemDTO]:
+    async def get_all_by_buy_id(buy_id: int, session: AsyncSession) -> list[BuyItemDTO]:
         stmt = select(BuyItem).where(BuyItem.buy_id == buy_id)
         buy_items = await session_execute(stmt, session)
         return [BuyItemDTO.model_validate(buy_item, from_attributes=True) for buy_item in buy_items.scalars().all()]
 
     @staticmethod
-    async def get_all_by_buy_ids(buy_ids: list[int], session: Session | AsyncSession) -> list[BuyItemDTO]:
+    async def get_all_by_buy_ids(buy_ids: list[int], session: AsyncSession) -> list[BuyItemDTO]:
         if not buy_ids:
             return []
         stmt = select(BuyItem).where(BuyItem.buy_id.in_(buy_ids))
@@ -78,7 +77,7 @@ class BuyItemRepository:
         return [BuyItemDTO.model_validate(buy_item, from_attributes=True) for buy_item in buy_items.scalars().all()]
 
     @staticmethod
-    async def get_max_page_by_buy_id(buy_id: int, filters: list[str], session: AsyncSession | Session) -> int:
+    async def get_max_page_by_buy_id(buy_id: int, filters: list[str], session: AsyncSession) -> int:
         conditions = [
             BuyItem.buy_id == buy_id
         ]
@@ -1,6 +1,5 @@
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import Session
 
 from db import session_execute, session_flush
 from models.cart import Cart, CartDTO
@@ -8,7 +7,7 @@ from models.cart import Cart, CartDTO
 
 class CartRepository:
     @staticmethod
-    async def get_or_create(user_id: int, session: AsyncSession | Session):
+    async def get_or_create(user_id: int, session: AsyncSession):
         stmt = select(Cart).where(Cart.user_id == user_id)
         cart = await session_execute(stmt, session)
         cart = cart.scalar()
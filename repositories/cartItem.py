@@ -2,7 +2,6 @@ import math
 
 from sqlalchemy import select, delete, update, func
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import Session
 
 import config
 from db import session_flush, session_execute
@@ -13,14 +12,14 @@ from utils.utils import calculate_max_page
 
 class CartItemRepository:
     @staticmethod
-    async def create(cart_item: CartItemDTO, session: AsyncSession | Session) -> int:
+    async def create(cart_item: CartItemDTO, session: AsyncSession) -> int:
         cart_item = CartItem(**cart_item.model_dump())
         session.add(cart_item)
         await session_flush(session)
         return cart_item.id
 
     @staticmethod
-    async def get_by_user_id(user_id: int, page: int, session: AsyncSession | Session) -> list[CartItemDTO]:
+    async def get_by_user_id(user_id: int, page: int, session: AsyncSession) -> list[CartItemDTO]:
         stmt = (select(CartItem)
                 .join(Cart, CartItem.cart_id == Cart.id)
                 .where(Cart.user_id == user_id)
@@ -31,7 +30,7 @@ class CartItemRepository:
                 cart_items.scalars().all()]
 
     @staticmethod
-    async def get_maximum_page(user_id: int, session: AsyncSession | Session) -> int:
+    async def get_maximum_page(user_id: int, session: AsyncSession) -> int:
         sub_stmt = (select(CartItem)
                     .join(Cart, CartItem.cart_id == Cart.id)
                     .where(Cart.user_id == user_id))
@@ -41,14 +40,14 @@ class CartItemRepository:
         return calculate_max_page(max_page)
 
     @staticmethod
-    async def get_all_by_user_id(user_id: int, session: AsyncSession | Session) -> list[CartItemDTO]:
+    async def get_all_by_user_id(user_id: int, session: AsyncSession) -> list[CartItemDTO]:
         stmt = select(CartItem).join(Cart, CartItem.cart_id == Cart.id).where(Cart.user_id == user_id)
         cart_items = await session_execute(stmt, session)
         return [CartItemDTO.model_validate(cart_item, from_attributes=True) for cart_item in
                 cart_items.scalars().all()]
 
     @staticmethod
-    async def remove_from_cart(cart_item_id: int, session: AsyncSession | Session):
+    async def remove_from_cart(cart_item_id: int, session: AsyncSession):
         stmt = delete(CartItem).where(CartItem.id == cart_item_id)
         await session_execute(stmt, session)
 
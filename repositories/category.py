@@ -2,7 +2,6 @@ import math
 
 from sqlalchemy import select, func, update, or_, and_
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import Session
 
 import config
 from db import session_execute, session_flush
@@ -10,7 +9,7 @@ from enums.item_type import ItemType
 from enums.sort_order import SortOrder
 from enums.sort_property import SortProperty
 from models.category import Category, CategoryDTO
-from models.item import Item
+from models.item_stock import ItemStock
 from utils.utils import get_bot_photo_id, calculate_max_page
 
 
@@ -23,11 +22,11 @@ class CategoryRepository:
                   session: AsyncSession) -> list[CategoryDTO]:
         sort_methods = []
         conditions = [
-            Item.is_sold == False
+            ItemStock.available_qty > 0
         ]
         if item_type:
             conditions.append(
-                Item.item_type == item_type
+                ItemStock.item_type == item_type
             )
         if filters is not None:
             filter_conditions = [Category.name.icontains(name) for name in filters]
@@ -35,12 +34,12 @@ class CategoryRepository:
         for sort_property, sort_order in sort_pairs.items():
             sort_property, sort_order = SortProperty(int(sort_property)), SortOrder(sort_order)
             if sort_order != SortOrder.DISABLE:
-                table = Category if sort_property == SortProperty.NAME else Item
+                table = Category if sort_property == SortProperty.NAME else ItemStock
                 sort_column = sort_property.get_column(table)
                 sort_method = (getattr(sort_column, sort_order.name.lower()))
                 sort_methods.append(sort_method())
         stmt = (select(Category)
-                .join(Item, Item.category_id == Category.id)
+                .join(ItemStock, ItemStock.category_id == Category.id)
                 .where(and_(*conditions))
                 .distinct()
                 .limit(config.PAGE_ENTRIES)
@@ -52,13 +51,13 @@ class CategoryRepository:
 
     @staticmethod
     async def get_maximum_page(filters: list[str] | None, session: AsyncSession) -> int:
-        conditions = [Item.is_sold == False]
+        conditions = [ItemStock.available_qty > 0]
         if filters is not None:
             filter_conditions = [Category.name.icontains(name) for name in filters]
             conditions.append(or_(*filter_conditions))
         sub_stmt = (
             select(Category.id)
-            .join(Item, Item.category_id == Category.id)
+            .join(ItemStock, ItemStock.category_id == Category.id)
             .where(and_(*conditions))
             .distinct()
         ).alias('unique_categories')
@@ -68,7 +67,7 @@ class CategoryRepository:
         return calculate_max_page(max_page)
 
     @staticmethod
-    async def get_by_id(category_id: int, session: Session | AsyncSession) -> CategoryDTO:
+    async def get_by_id(category_id: int, session: AsyncSession) -> CategoryDTO:
         stmt = select(Category).where(Category.id == category_id)
         category = await session_execute(stmt, session)
         return CategoryDTO.model_validate(category.scalar(), from_attributes=True)
@@ -85,13 +84,13 @@ class CategoryRepository:
                 sort_method = (getattr(sort_column, sort_order.name.lower()))
                 sort_methods.append(sort_method())
         conditions = [
-            Item.is_sold == False
+            ItemStock.available_qty > 0
         ]
         if filters is not None:
             filter_conditions = [Category.name.icontains(name) for name in filters]
             conditions.append(or_(*filter_conditions))
         stmt = (select(Category)
-                .join(Item, Item.category_id == Category.id)
+                .join(ItemStock, ItemStock.category_id == Category.id)
                 .where(*conditions)
                 .distinct()
                 .limit(config.PAGE_ENTRIES)
@@ -102,7 +101,7 @@ class CategoryRepository:
                 categories.scalars().all()]
 
     @staticmethod
-    async def get_or_create(category_name: str, session: Session | AsyncSession) -> CategoryDTO:
+    async def get_or_create(category_name: str, session: AsyncSession) -> CategoryDTO:
         stmt = select(Category).where(Category.name == category_name)
         category = await session_execute(stmt, session)
         category = category.scalar()
@@ -115,7 +114,7 @@ class CategoryRepository:
         return CategoryDTO.model_validate(category, from_attributes=True)
 
     @staticmethod
-    async def get_by_ids(category_ids: list[int], session: Session | AsyncSession) -> list[CategoryDTO]:
+    async def get_by_ids(category_ids: list[int], session: AsyncSession) -> list[CategoryDTO]:
         if not category_ids:
             return []
         stmt = select(Category).where(Category.id.in_(category_ids))
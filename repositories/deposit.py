@@ -2,7 +2,6 @@ import datetime
 
 from sqlalchemy import select, update, func
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import Session
 
 from callbacks import StatisticsTimeDelta
 from db import session_execute, session_flush
@@ -13,13 +12,13 @@ from models.user import UserDTO
 
 class DepositRepository:
     @staticmethod
-    async def get_by_user_dto(user_dto: UserDTO, session: Session | AsyncSession) -> list[DepositDTO]:
+    async def get_by_user_dto(user_dto: UserDTO, session: AsyncSession) -> list[DepositDTO]:
         stmt = select(Deposit).where(Deposit.user_id == user_dto.id)
         deposits = await session_execute(stmt, session)
         return [DepositDTO.model_validate(deposit, from_attributes=True) for deposit in deposits.scalars().all()]
 
     @staticmethod
-    async def get_by_timedelta(timedelta: StatisticsTimeDelta, session: Session | AsyncSession) -> list[DepositDTO]:
+    async def get_by_timedelta(timedelta: StatisticsTimeDelta, session: AsyncSession) -> list[DepositDTO]:
         start, end = timedelta.get_time_range()
         stmt = select(Deposit).where(Deposit.deposit_datetime >= start,
                                      Deposit.deposit_datetime <= end)
@@ -27,14 +26,14 @@ class DepositRepository:
         return [DepositDTO.model_validate(deposit, from_attributes=True) for deposit in deposits.scalars().all()]
 
     @staticmethod
-    async def create(deposit: DepositDTO, session: Session | AsyncSession) -> int:
+    async def create(deposit: DepositDTO, session: AsyncSession) -> int:
         dep = Deposit(**deposit.model_dump())
         session.add(dep)
         await session_flush(session)
         return dep.id
 
     @staticmethod
-    async def get_by_user_id(user_id: int, session: Session | AsyncSession):
+    async def get_by_user_id(user_id: int, session: AsyncSession):
         stmt = (select(Deposit)
                 .where(Deposit.user_id == user_id))
         deposits = await session_execute(stmt, session)
@@ -43,7 +42,7 @@ class DepositRepository:
 
     @staticmethod
     async def get_not_withdrawn_deposits(cryptocurrency: Cryptocurrency,
-                                         session: Session | AsyncSession) -> list[DepositDTO]:
+                                         session: AsyncSession) -> list[DepositDTO]:
         stmt = (select(Deposit)
                 .where(Deposit.is_withdrawn == False,
                        Deposit.network == cryptocurrency.value,
@@ -52,14 +51,14 @@ class DepositRepository:
         return [DepositDTO.model_validate(deposit, from_attributes=True) for deposit in deposits.scalars().all()]
 
     @staticmethod
-    async def set_deposit_withdrawn(txid: str, session: Session | AsyncSession):
+    async def set_deposit_withdrawn(txid: str, session: AsyncSession):
         stmt = (update(Deposit)
                 .where(Deposit.tx_id == txid)
                 .values(is_withdrawn=True))
         await session_execute(stmt, session)
 
     @staticmethod
-    async def get_deposits_to_withdraw(cryptocurrency: Cryptocurrency, session: Session | AsyncSession) -> int:
+    async def get_deposits_to_withdraw(cryptocurrency: Cryptocurrency, session: AsyncSession) -> int:
         stmt = (select(func.count(Deposit.id))
                 .where(Deposit.is_withdrawn == False,
                        Deposit.network == cryptocurrency.value))
@@ -67,7 +66,7 @@ class DepositRepository:
         return count.scalar_one()
 
     @staticmethod
-    async def set_withdrawn_by_network(cryptocurrency: Cryptocurrency, session: Session | AsyncSession):
+    async def set_withdrawn_by_network(cryptocurrency: Cryptocurrency, session: AsyncSession):
         stmt = (update(Deposit)
                 .where(Deposit.network == cryptocurrency.value)
                 .values(is_withdrawn=True))
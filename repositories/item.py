@@ -1,29 +1,33 @@
-from sqlalchemy import select, func, update, delete, and_, or_
+from sqlalchemy import select, func, update, delete, and_, tuple_
+from typing import AsyncIterator
+
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import Session
 
-from db import session_execute
+from db import session_execute, session_stream
 from enums.item_type import ItemType
 from models.buyItem import BuyItem
-from models.item import Item, ItemDTO, ItemAvailabilityDTO
+from models.category import Category
+from models.item import Item, ItemDTO, ItemAvailabilityDTO, SubcategorySummaryDTO
+from models.item_stock import ItemStock
+from models.subcategory import Subcategory
+from repositories.item_stock import ItemStockRepository
 
 
 class ItemRepository:
+    COPY_COLUMNS = ["item_type", "category_id", "subcategory_id", "private_data",
+                    "price", "is_sold", "is_new", "description"]
 
     @staticmethod
     async def get_available_qty(item_type: ItemType | None, category_id: int | None, subcategory_id: int,
                                 session: AsyncSession) -> int:
         conditions = [
-            Item.subcategory_id == subcategory_id,
-            Item.is_sold == False,
+            ItemStock.subcategory_id == subcategory_id,
         ]
         if item_type:
-            conditions.append(Item.item_type == item_type)
+            conditions.append(ItemStock.item_type == item_type)
         if category_id:
-            conditions.append(Item.category_id == category_id)
-        sub_stmt = (select(Item)
-                    .where(and_(*conditions)))
-        stmt = select(func.count()).select_from(sub_stmt)
+            conditions.append(ItemStock.category_id == category_id)
+        stmt = select(func.coalesce(func.sum(ItemStock.available_qty), 0)).where(and_(*conditions))
         available_qty = await session_execute(stmt, session)
         return available_qty.scalar()
 
@@ -33,18 +37,22 @@ class ItemRepository:
                          subcategory_id: int,
                          session: AsyncSession) -> ItemDTO:
         conditions = [
-            Item.subcategory_id == subcategory_id,
-            Item.is_sold == False
+            ItemStock.subcategory_id == subcategory_id,
         ]
         if item_type:
-            conditions.append(Item.item_type == item_type)
+            conditions.append(ItemStock.item_type == item_type)
         if category_id:
-            conditions.append(Item.category_id == category_id)
-        columns_to_select = [column for column in Item.__table__.columns if column.name != 'id']
-        stmt = (select(*columns_to_select).where(and_(*conditions))).distinct().limit(1)
-
+            conditions.append(ItemStock.category_id == category_id)
+        stmt = (select(ItemStock.item_type,
+                       ItemStock.category_id,
+                       ItemStock.subcategory_id,
+                       ItemStock.price,
+                       ItemStock.description)
+                .where(and_(*conditions))
+                .order_by(ItemStock.available_qty.desc())
+                .limit(1))
         item = await session_execute(stmt, session)
-        return ItemDTO.model_validate(item.one(), from_attributes=True)
+        return ItemDTO.model_validate(item.mappings().one(), from_attributes=True)
 
     @staticmethod
     async def get_by_id(item_id: int, session: AsyncSession) -> ItemDTO:
@@ -53,29 +61,31 @@ class ItemRepository:
         return ItemDTO.model_validate(item.scalar(), from_attributes=True)
 
     @staticmethod
-    async def get_by_id_map(item_ids: list[int], session: AsyncSession | Session) -> dict[int, ItemDTO]:
+    async def get_by_id_map(item_ids: list[int], session: AsyncSession) -> dict[int, ItemDTO]:
         items = await ItemRepository.get_by_id_list(item_ids, session)
         return {item.id: item for item in items if item.id is not None}
 
     @staticmethod
-    async def get_purchased_items(item_type: ItemType, category_id: int, subcategory_id: int, quantity: int,
-                                  session: Session | AsyncSession) -> list[ItemDTO]:
-        stmt = (select(Item)
-                .where(Item.item_type == item_type,
-                       Item.category_id == category_id,
-                       Item.subcategory_id == subcategory_id,
-                       Item.is_sold == False)
-                .limit(quantity)
-                .with_for_update())
+    async def sell_unsold(item_type: ItemType, category_id: int, subcategory_id: int, quantity: int,
+                          session: AsyncSession) -> list[ItemDTO]:
+        unsold_ids = (select(Item.id)
+                      .where(Item.item_type == item_type,
+                             Item.category_id == category_id,
+                             Item.subcategory_id == subcategory_id,
+                             Item.is_sold == False)
+                      .order_by(Item.id)
+                      .limit(quantity)
+                      .with_for_update(skip_locked=True))
+        stmt = (update(Item)
+                .where(Item.id.in_(unsold_ids.scalar_subquery()))
+                .values(is_sold=True)
+                .returning(Item)
+                .execution_options(synchronize_session=False))
         items = await session_execute(stmt, session)
-        return [ItemDTO.model_validate(item, from_attributes=True) for item in items.scalars().all()]
-
-    @staticmethod
-    async def update(item_dto_list: list[ItemDTO], session: AsyncSession):
-        for item in item_dto_list:
-            item = Item.get_model_filtered_dict(item, Item)
-            stmt = update(Item).where(Item.id == item.id).values(**item.model_dump(exclude_none=True))
-            await session_execute(stmt, session)
+        items = [ItemDTO.model_validate(item, from_attributes=True) for item in items.scalars().all()]
+        if items:
+            await ItemStockRepository.subtract_sold(item_type, category_id, subcategory_id, len(items), session)
+        return items
 
     @staticmethod
     async def get_by_buy_id(buy_id: int, session: AsyncSession) -> list[ItemDTO]:
@@ -96,28 +106,48 @@ class ItemRepository:
     async def delete_unsold_by_category_id(entity_id: int, session: AsyncSession):
         stmt = delete(Item).where(Item.category_id == entity_id, Item.is_sold == False)
         await session_execute(stmt, session)
+        await ItemStockRepository.clear_by_category_id(entity_id, session)
 
     @staticmethod
     async def delete_unsold_by_subcategory_id(entity_id: int, session: AsyncSession):
         stmt = delete(Item).where(Item.subcategory_id == entity_id, Item.is_sold == False)
         await session_execute(stmt, session)
+        await ItemStockRepository.clear_by_subcategory_id(entity_id, session)
 
     @staticmethod
     async def add_many(items: list[ItemDTO], session: AsyncSession):
+        await ItemStockRepository.add(items, session)
         items = [Item(**item.model_dump(exclude_none=True)) for item in items]
         session.add_all(items)
 
     @staticmethod
-    async def get_new(session: AsyncSession) -> list[ItemDTO]:
-        stmt = select(Item).where(Item.is_new == True)
-        items = await session_execute(stmt, session)
-        return [ItemDTO.model_validate(item, from_attributes=True) for item in items.scalars().all()]
+    async def copy_many(items: list[ItemDTO], session: AsyncSession):
+        """
+        Only copies the items, callers upsert their item_stock rows separately.
+        """
+        connection = await session.connection()
+        raw_connection = await connection.get_raw_connection()
+        await raw_connection.driver_connection.copy_records_to_table(
+            Item.__tablename__,
+            columns=ItemRepository.COPY_COLUMNS,
+            records=[(item.item_type.value, item.category_id, item.subcategory_id, item.private_data,
+                      item.price, False, True, item.description) for item in items]
+        )
 
     @staticmethod
-    async def get_in_stock(session: AsyncSession) -> list[ItemDTO]:
-        stmt = select(Item).where(Item.is_sold == False)
-        items = await session_execute(stmt, session)
-        return [ItemDTO.model_validate(item, from_attributes=True) for item in items.scalars().all()]
+    async def get_new_subcategory_summary(session: AsyncSession) -> AsyncIterator[SubcategorySummaryDTO]:
+        stmt = (select(Category.name.label("category_name"),
+                       Subcategory.name.label("subcategory_name"),
+                       func.count().label("available_qty"),
+                       func.min(Item.price).label("price"))
+                .join(Category, Category.id == Item.category_id)
+                .join(Subcategory, Subcategory.id == Item.subcategory_id)
+                .where(Item.is_new == True)
+                .group_by(Category.name, Subcategory.name)
+                .order_by(Category.name, Subcategory.name))
+        rows = await session_stream(stmt, session)
+        async for row in rows.mappings():
+            yield SubcategorySummaryDTO.model_validate(row)
 
     @staticmethod
     async def get_by_id_list(item_ids: list[int], session: AsyncSession) -> list[ItemDTO]:
@@ -128,7 +158,7 @@ class ItemRepository:
     @staticmethod
     async def get_availability_by_cart_items(
             cart_items: list,
-            session: AsyncSession | Session
+            session: AsyncSession
     ) -> dict[tuple[ItemType, int, int], ItemAvailabilityDTO]:
         unique_keys = sorted({
             (cart_item.item_type, cart_item.category_id, cart_item.subcategory_id)
@@ -137,39 +167,14 @@ class ItemRepository:
         if not unique_keys:
             return {}
 
-        conditions = [
-            and_(
-                Item.item_type == item_type,
-                Item.category_id == category_id,
-                Item.subcategory_id == subcategory_id,
-            )
-            for item_type, category_id, subcategory_id in unique_keys
-        ]
-        partition_by = (Item.item_type, Item.category_id, Item.subcategory_id)
-        ranked_items = (
-            select(
-                Item.item_type,
-                Item.category_id,
-                Item.subcategory_id,
-                Item.price,
-                Item.description,
-                func.count().over(partition_by=partition_by).label("available_qty"),
-                func.row_number().over(partition_by=partition_by, order_by=Item.id).label("row_number"),
-            )
-            .where(Item.is_sold == False, or_(*conditions))
-            .subquery()
-        )
-        stmt = (
-            select(
-                ranked_items.c.item_type,
-                ranked_items.c.category_id,
-                ranked_items.c.subcategory_id,
-                ranked_items.c.price,
-                ranked_items.c.description,
-                ranked_items.c.available_qty,
-            )
-            .where(ranked_items.c.row_number == 1)
-        )
+        stmt = (select(ItemStock.item_type,
+                       ItemStock.category_id,
+                       ItemStock.subcategory_id,
+                       ItemStock.price,
+                       ItemStock.description,
+                       ItemStock.available_qty)
+                .where(tuple_(ItemStock.item_type, ItemStock.category_id, ItemStock.subcategory_id).in_(unique_keys),
+                       ItemStock.available_qty > 0))
         rows = await session_execute(stmt, session)
         result: dict[tuple[ItemType, int, int], ItemAvailabilityDTO] = {}
         for row in rows.mappings().all():
@@ -179,6 +184,6 @@ class ItemRepository:
 
     @staticmethod
     async def get_available_item_types(session: AsyncSession) -> list[ItemType]:
-        stmt = select(Item.item_type).where(Item.is_sold == False).distinct()
+        stmt = select(ItemStock.item_type).where(ItemStock.available_qty > 0).distinct()
         item_types = await session_execute(stmt, session)
         return [ItemType(item_type) for item_type in item_types.scalars().all()]
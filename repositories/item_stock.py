@@ -0,0 +1,171 @@
+from sqlalchemy import select, func, update, case, tuple_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from typing import AsyncIterator
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from db import session_execute, get_db_session, session_commit, session_stream
+from enums.item_type import ItemType
+from models.category import Category
+from models.item import Item, ItemDTO, SubcategorySummaryDTO
+from models.item_stock import ItemStock
+from models.subcategory import Subcategory
+
+
+class ItemStockRepository:
+    KEY_COLUMNS = ("item_type", "category_id", "subcategory_id")
+
+    @staticmethod
+    def _aggregate_unsold_items(*conditions):
+        partition_by = (Item.item_type, Item.category_id, Item.subcategory_id)
+        ranked_items = (
+            select(
+                Item.item_type,
+                Item.category_id,
+                Item.subcategory_id,
+                Item.price,
+                Item.description,
+                func.count().over(partition_by=partition_by).label("available_qty"),
+                func.row_number().over(partition_by=partition_by, order_by=Item.id).label("row_number"),
+            )
+            .where(Item.is_sold == False, *conditions)
+            .subquery()
+        )
+        return (
+            select(
+                ranked_items.c.item_type,
+                ranked_items.c.category_id,
+                ranked_items.c.subcategory_id,
+                ranked_items.c.price,
+                ranked_items.c.description,
+                ranked_items.c.available_qty,
+            )
+            .where(ranked_items.c.row_number == 1)
+        )
+
+    @staticmethod
+    def collect(items: list[ItemDTO],
+                stock_rows: dict[tuple[ItemType, int, int], dict] | None = None
+                ) -> dict[tuple[ItemType, int, int], dict]:
+        stock_rows = {} if stock_rows is None else stock_rows
+        for item in items:
+            key = (item.item_type, item.category_id, item.subcategory_id)
+            if key in stock_rows:
+                stock_rows[key]["available_qty"] += 1
+            else:
+                stock_rows[key] = {
+                    "item_type": item.item_type,
+                    "category_id": item.category_id,
+                    "subcategory_id": item.subcategory_id,
+                    "price": item.price,
+                    "description": item.description,
+                    "available_qty": 1,
+                }
+        return stock_rows
+
+    @staticmethod
+    async def upsert(stock_rows: dict[tuple[ItemType, int, int], dict], session: AsyncSession):
+        if not stock_rows:
+            return
+        stmt = pg_insert(ItemStock).values(list(stock_rows.values()))
+        is_out_of_stock = ItemStock.available_qty == 0
+        stmt = stmt.on_conflict_do_update(
+            index_elements=ItemStockRepository.KEY_COLUMNS,
+            set_={
+                "available_qty": ItemStock.available_qty + stmt.excluded.available_qty,
+                "price": case((is_out_of_stock, stmt.excluded.price), else_=ItemStock.price),
+                "description": case((is_out_of_stock, stmt.excluded.description), else_=ItemStock.description),
+            }
+        )
+        await session_execute(stmt, session)
+
+    @staticmethod
+    async def add(items: list[ItemDTO], session: AsyncSession):
+        await ItemStockRepository.upsert(ItemStockRepository.collect(items), session)
+
+    @staticmethod
+    async def get_subcategory_summary(session: AsyncSession) -> AsyncIterator[SubcategorySummaryDTO]:
+        stmt = (select(Category.name.label("category_name"),
+                       Subcategory.name.label("subcategory_name"),
+                       func.sum(ItemStock.available_qty).label("available_qty"),
+                       func.min(ItemStock.price).label("price"))
+                .join(Category, Category.id == ItemStock.category_id)
+                .join(Subcategory, Subcategory.id == ItemStock.subcategory_id)
+                .where(ItemStock.available_qty > 0)
+                .group_by(Category.name, Subcategory.name)
+                .order_by(Category.name, Subcategory.name))
+        rows = await session_stream(stmt, session)
+        async for row in rows.mappings():
+            yield SubcategorySummaryDTO.model_validate(row)
+
+    @staticmethod
+    async def subtract_sold(item_type: ItemType, category_id: int, subcategory_id: int, sold_qty: int,
+                            session: AsyncSession):
+        """
+        Runs in the sale transaction, so the counter commits or rolls back together with the sold items.
+        Price and description move on to the oldest unsold item, a single lookup in the unsold items index.
+        The row stays locked until then, callers sell keys in a fixed order so checkouts can't deadlock.
+        """
+        oldest_unsold_item = (select(Item)
+                              .where(Item.item_type == item_type,
+                                     Item.category_id == category_id,
+                                     Item.subcategory_id == subcategory_id,
+                                     Item.is_sold == False)
+                              .order_by(Item.id)
+                              .limit(1))
+        stmt = (update(ItemStock)
+                .where(ItemStock.item_type == item_type,
+                       ItemStock.category_id == category_id,
+                       ItemStock.subcategory_id == subcategory_id)
+                .values(available_qty=func.greatest(ItemStock.available_qty - sold_qty, 0),
+                        price=func.coalesce(oldest_unsold_item.with_only_columns(Item.price).scalar_subquery(),
+                                            ItemStock.price),
+                        description=func.coalesce(
+                            oldest_unsold_item.with_only_columns(Item.description).scalar_subquery(),
+                            ItemStock.description
+                        )))
+        await session_execute(stmt, session)
+
+    @staticmethod
+    async def clear_by_category_id(category_id: int, session: AsyncSession):
+        stmt = update(ItemStock).where(ItemStock.category_id == category_id).values(available_qty=0)
+        await session_execute(stmt, session)
+
+    @staticmethod
+    async def clear_by_subcategory_id(subcategory_id: int, session: AsyncSession):
+        stmt = update(ItemStock).where(ItemStock.subcategory_id == subcategory_id).values(available_qty=0)
+        await session_execute(stmt, session)
+
+    @staticmethod
+    async def _recalculate(stock_conditions: list, item_conditions: list, session: AsyncSession):
+        stmt = update(ItemStock).where(*stock_conditions).values(available_qty=0)
+        await session_execute(stmt, session)
+        aggregate_stmt = ItemStockRepository._aggregate_unsold_items(*item_conditions)
+        stmt = pg_insert(ItemStock).from_select(aggregate_stmt.selected_columns.keys(), aggregate_stmt)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=ItemStockRepository.KEY_COLUMNS,
+            set_={
+                "available_qty": stmt.excluded.available_qty,
+                "price": stmt.excluded.price,
+                "description": stmt.excluded.description,
+            }
+        )
+        await session_execute(stmt, session)
+
+    @staticmethod
+    async def refresh(keys: list[tuple[ItemType, int, int]], session: AsyncSession):
+        if not keys:
+            return
+        stock_key = tuple_(ItemStock.item_type, ItemStock.category_id, ItemStock.subcategory_id)
+        item_key = tuple_(Item.item_type, Item.category_id, Item.subcategory_id)
+        await ItemStockRepository._recalculate([stock_key.in_(keys)], [item_key.in_(keys)], session)
+
+    @staticmethod
+    async def rebuild(session: AsyncSession):
+        await ItemStockRepository._recalculate([], [], session)
+
+    @staticmethod
+    async def init_stock():
+        async with get_db_session() as session:
+            await ItemStockRepository.rebuild(session)
+            await session_commit(session)
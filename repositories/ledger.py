@@ -0,0 +1,77 @@
+from sqlalchemy import select, func, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import config
+from db import session_execute, session_flush
+from models.ledger import LedgerEntry, LedgerEntryDTO, LedgerMismatchDTO, LedgerChainBreakDTO
+from models.user import User
+from utils.utils import calculate_max_page
+
+
+class LedgerRepository:
+    REPLAY_TOLERANCE = 0.01
+
+    @staticmethod
+    async def create(ledger_entry_dto: LedgerEntryDTO, session: AsyncSession) -> None:
+        session.add(LedgerEntry(**ledger_entry_dto.model_dump(exclude_none=True)))
+        await session_flush(session)
+
+    @staticmethod
+    async def get_by_user_id(user_id: int, page: int, session: AsyncSession) -> list[LedgerEntryDTO]:
+        stmt = (select(LedgerEntry)
+                .where(LedgerEntry.user_id == user_id)
+                .order_by(LedgerEntry.id.desc())
+                .limit(config.PAGE_ENTRIES)
+                .offset(config.PAGE_ENTRIES * page))
+        ledger_entries = await session_execute(stmt, session)
+        return [LedgerEntryDTO.model_validate(ledger_entry, from_attributes=True)
+                for ledger_entry in ledger_entries.scalars().all()]
+
+    @staticmethod
+    async def get_max_page(user_id: int, session: AsyncSession) -> int:
+        stmt = select(func.count(LedgerEntry.id)).where(LedgerEntry.user_id == user_id)
+        ledger_entries = await session_execute(stmt, session)
+        return calculate_max_page(ledger_entries.scalar_one())
+
+    @staticmethod
+    async def get_replay_mismatches(session: AsyncSession) -> list[LedgerMismatchDTO]:
+        ledger_totals = (select(LedgerEntry.user_id,
+                                func.sum(LedgerEntry.credit).label("credit"),
+                                func.sum(LedgerEntry.debit).label("debit"))
+                         .group_by(LedgerEntry.user_id)
+                         .subquery())
+        top_up_amount = func.coalesce(User.top_up_amount, 0.0)
+        consume_records = func.coalesce(User.consume_records, 0.0)
+        ledger_credit = func.coalesce(ledger_totals.c.credit, 0.0)
+        ledger_debit = func.coalesce(ledger_totals.c.debit, 0.0)
+        stmt = (select(User.id, top_up_amount, consume_records, ledger_credit, ledger_debit)
+                .outerjoin(ledger_totals, ledger_totals.c.user_id == User.id)
+                .where(or_(func.abs(top_up_amount - ledger_credit) > LedgerRepository.REPLAY_TOLERANCE,
+                           func.abs(consume_records - ledger_debit) > LedgerRepository.REPLAY_TOLERANCE))
+                .order_by(User.id))
+        mismatches = await session_execute(stmt, session)
+        return [LedgerMismatchDTO(user_id=user_id,
+                                  top_up_amount=top_up_amount,
+                                  consume_records=consume_records,
+                                  ledger_credit=ledger_credit,
+                                  ledger_debit=ledger_debit)
+                for user_id, top_up_amount, consume_records, ledger_credit, ledger_debit in mismatches.all()]
+
+    @staticmethod
+    async def get_chain_breaks(session: AsyncSession) -> list[LedgerChainBreakDTO]:
+        replayed_balance = func.sum(LedgerEntry.credit - LedgerEntry.debit).over(partition_by=LedgerEntry.user_id,
+                                                                                 order_by=LedgerEntry.id)
+        replay = select(LedgerEntry.id,
+                        LedgerEntry.user_id,
+                        LedgerEntry.balance_after,
+                        replayed_balance.label("replayed_balance")).subquery()
+        stmt = (select(replay.c.user_id, replay.c.id, replay.c.balance_after, replay.c.replayed_balance)
+                .where(func.abs(replay.c.balance_after - replay.c.replayed_balance) >
+                       LedgerRepository.REPLAY_TOLERANCE)
+                .order_by(replay.c.user_id, replay.c.id))
+        chain_breaks = await session_execute(stmt, session)
+        return [LedgerChainBreakDTO(user_id=user_id,
+                                    ledger_entry_id=ledger_entry_id,
+                                    balance_after=balance_after,
+                                    replayed_balance=replayed_balance)
+                for user_id, ledger_entry_id, balance_after, replayed_balance in chain_breaks.all()]
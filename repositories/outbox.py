@@ -0,0 +1,88 @@
+from datetime import timedelta
+
+from pydantic import BaseModel
+from sqlalchemy import select, update, func
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from db import session_execute
+from enums.outbox_event_type import OutboxEventType
+from enums.outbox_status import OutboxStatus
+from models.outbox import OutboxEvent, OutboxEventDTO
+
+
+class OutboxRepository:
+    @staticmethod
+    async def add(event_type: OutboxEventType, payload: BaseModel, session: AsyncSession) -> None:
+        session.add(OutboxEvent(event_type=event_type,
+                                payload=payload.model_dump(mode="json"),
+                                status=OutboxStatus.PENDING,
+                                attempts=0))
+
+    @staticmethod
+    async def add_unique(event_type: OutboxEventType,
+                         payload: BaseModel,
+                         dedup_key: str,
+                         session: AsyncSession) -> bool:
+        """
+        Returns False for a duplicate of a pending or delivered event.
+        A duplicate of a FAILED event puts it back into the queue instead of being dropped.
+        """
+        stmt = (insert(OutboxEvent)
+                .values(event_type=event_type,
+                        payload=payload.model_dump(mode="json"),
+                        status=OutboxStatus.PENDING,
+                        attempts=0,
+                        available_at=func.now(),
+                        dedup_key=dedup_key)
+                .on_conflict_do_update(index_elements=[OutboxEvent.dedup_key],
+                                       set_={"status": OutboxStatus.PENDING,
+                                             "attempts": 0,
+                                             "available_at": func.now(),
+                                             "last_error": None},
+                                       where=OutboxEvent.status == OutboxStatus.FAILED)
+                .returning(OutboxEvent.id))
+        inserted = await session_execute(stmt, session)
+        return inserted.scalar() is not None
+
+    @staticmethod
+    async def get_next_due(session: AsyncSession) -> OutboxEventDTO | None:
+        stmt = (select(OutboxEvent)
+                .where(OutboxEvent.status == OutboxStatus.PENDING, OutboxEvent.available_at <= func.now())
+                .order_by(OutboxEvent.id)
+                .limit(1)
+                .with_for_update(skip_locked=True))
+        outbox_event = await session_execute(stmt, session)
+        outbox_event = outbox_event.scalar()
+        if outbox_event is None:
+            return None
+        return OutboxEventDTO.model_validate(outbox_event, from_attributes=True)
+
+    @staticmethod
+    async def mark_in_flight(outbox_event_id: int, session: AsyncSession) -> None:
+        stmt = (update(OutboxEvent)
+                .where(OutboxEvent.id == outbox_event_id)
+                .values(status=OutboxStatus.IN_FLIGHT))
+        await session_execute(stmt, session)
+
+    @staticmethod
+    async def mark_delivered(outbox_event_id: int, session: AsyncSession) -> None:
+        stmt = (update(OutboxEvent)
+                .where(OutboxEvent.id == outbox_event_id)
+                .values(status=OutboxStatus.DELIVERED,
+                        attempts=OutboxEvent.attempts + 1,
+                        last_error=None))
+        await session_execute(stmt, session)
+
+    @staticmethod
+    async def mark_failed(outbox_event_id: int,
+                          error: str,
+                          retry_in_seconds: float | None,
+                          session: AsyncSession) -> None:
+        values = {"attempts": OutboxEvent.attempts + 1, "last_error": error}
+        if retry_in_seconds is None:
+            values["status"] = OutboxStatus.FAILED
+        else:
+            values["available_at"] = func.now() + timedelta(seconds=retry_in_seconds)
+        stmt = update(OutboxEvent).where(OutboxEvent.id == outbox_event_id).values(**values)
+        await session_execute(stmt, session)
@@ -2,7 +2,6 @@ import datetime
 
 from sqlalchemy import select, func, update
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import Session
 
 from db import session_execute
 from models.payment import Payment, TablePaymentDTO
@@ -11,7 +10,7 @@ from models.user import User, UserDTO
 
 class PaymentRepository:
     @staticmethod
-    async def get_user_by_payment_id(payment_id: int, session: AsyncSession | Session) -> UserDTO:
+    async def get_user_by_payment_id(payment_id: int, session: AsyncSession) -> UserDTO:
         stmt = (select(User)
                 .join(Payment, Payment.user_id == User.id)
                 .where(Payment.processing_payment_id == payment_id))
@@ -19,7 +18,7 @@ class PaymentRepository:
         return UserDTO.model_validate(user.scalar_one(), from_attributes=True)
 
     @staticmethod
-    async def create(payment_id: int, user_id: int, message_id: int, session: AsyncSession | Session):
+    async def create(payment_id: int, user_id: int, message_id: int, session: AsyncSession):
         payment = Payment(
             processing_payment_id=payment_id,
             user_id=user_id,
@@ -31,14 +30,26 @@ class PaymentRepository:
 
     @staticmethod
     async def get_by_processing_payment_id(processing_payment_id: int,
-                                           session: AsyncSession | Session) -> TablePaymentDTO:
+                                           session: AsyncSession) -> TablePaymentDTO:
         stmt = (select(Payment)
                 .where(Payment.processing_payment_id == processing_payment_id))
         payment = await session_execute(stmt, session)
         return TablePaymentDTO.model_validate(payment.scalar_one(), from_attributes=True)
 
     @staticmethod
-    async def get_unexpired_unpaid_payments(user_id: int, session: AsyncSession | Session):
+    async def set_paid(processing_payment_id: int, session: AsyncSession) -> TablePaymentDTO | None:
+        stmt = (update(Payment)
+                .where(Payment.processing_payment_id == processing_payment_id, Payment.is_paid == False)
+                .values(is_paid=True)
+                .returning(Payment))
+        payment = await session_execute(stmt, session)
+        payment = payment.scalar()
+        if payment is None:
+            return None
+        return TablePaymentDTO.model_validate(payment, from_attributes=True)
+
+    @staticmethod
+    async def get_unexpired_unpaid_payments(user_id: int, session: AsyncSession):
         sub_stmt = (select(Payment)
                     .where(Payment.expire_datetime > datetime.datetime.now(),
                            Payment.user_id == user_id,
@@ -48,7 +59,7 @@ class PaymentRepository:
         return count.scalar_one()
 
     @staticmethod
-    async def update(payment_dto: TablePaymentDTO, session: AsyncSession | Session):
+    async def update(payment_dto: TablePaymentDTO, session: AsyncSession):
         stmt = (update(Payment)
                 .where(Payment.id == payment_dto.id)
                 .values(**payment_dto.model_dump()))
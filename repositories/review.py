@@ -3,7 +3,10 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 import config
 from db import session_flush, session_execute
-from models.review import ReviewDTO, Review
+from models.buyItem import BuyItem
+from models.item import Item
+from models.review import ReviewDTO, Review, ReviewListingDTO
+from models.subcategory import Subcategory
 from utils.utils import calculate_max_page
 
 
@@ -25,13 +28,20 @@ class ReviewRepository:
         return review_dto
 
     @staticmethod
-    async def get_reviews_paginated(page: int, session: AsyncSession) -> list[ReviewDTO]:
-        stmt = (select(Review)
+    async def get_reviews_paginated(page: int, session: AsyncSession) -> list[ReviewListingDTO]:
+        stmt = (select(Review.id,
+                       Review.buyItem_id,
+                       BuyItem.buy_id,
+                       Subcategory.name.label("subcategory_name"),
+                       (func.cardinality(BuyItem.item_ids) * Item.price).label("total_price"))
+                .join(BuyItem, Review.buyItem_id == BuyItem.id)
+                .outerjoin(Item, Item.id == BuyItem.item_ids[1])
+                .outerjoin(Subcategory, Item.subcategory_id == Subcategory.id)
                 .limit(config.PAGE_ENTRIES)
                 .offset(page * config.PAGE_ENTRIES)
                 .order_by(Review.create_datetime.desc()))
         reviews = await session_execute(stmt, session)
-        return [ReviewDTO.model_validate(review, from_attributes=True) for review in reviews.scalars().all()]
+        return [ReviewListingDTO.model_validate(review, from_attributes=True) for review in reviews.mappings().all()]
 
     @staticmethod
     async def get_max_page(session: AsyncSession) -> int:
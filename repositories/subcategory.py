@@ -2,7 +2,6 @@ import math
 
 from sqlalchemy import select, func, update, and_, or_
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import Session
 
 import config
 from db import session_execute, session_flush
@@ -10,7 +9,8 @@ from enums.item_type import ItemType
 from enums.sort_order import SortOrder
 from enums.sort_property import SortProperty
 from models.category import Category
-from models.item import Item, ItemDTO
+from models.item import ItemDTO
+from models.item_stock import ItemStock
 from models.subcategory import Subcategory, SubcategoryDTO
 from utils.utils import get_bot_photo_id, calculate_max_page
 
@@ -26,31 +26,31 @@ class SubcategoryRepository:
         for sort_property, sort_order in sort_pairs.items():
             sort_property, sort_order = SortProperty(int(sort_property)), SortOrder(sort_order)
             if sort_order != SortOrder.DISABLE:
-                table = Subcategory if sort_property == SortProperty.NAME else Item
+                table = Subcategory if sort_property == SortProperty.NAME else ItemStock
                 sort_column = sort_property.get_column(table)
                 sort_method = (getattr(sort_column, sort_order.name.lower()))
                 sort_methods.append(sort_method())
         conditions = [
-            Item.is_sold == False
+            ItemStock.available_qty > 0
         ]
         if item_type:
-            conditions.append(Item.item_type == item_type)
+            conditions.append(ItemStock.item_type == item_type)
         if category_id:
-            conditions.append(Item.category_id == category_id)
+            conditions.append(ItemStock.category_id == category_id)
         if filters:
             filter_conditions = [Subcategory.name.icontains(name) for name in filters]
             conditions.append(or_(*filter_conditions))
-        stmt = (select(Item.item_type,
-                       Item.category_id,
-                       Item.subcategory_id,
-                       Item.description,
-                       Item.price,
+        stmt = (select(ItemStock.item_type,
+                       ItemStock.category_id,
+                       ItemStock.subcategory_id,
+                       ItemStock.description,
+                       ItemStock.price,
+                       ItemStock.available_qty,
                        Category.name.label("category_name"),
                        Subcategory.name.label("subcategory_name"))
-                .join(Subcategory, Item.subcategory_id == Subcategory.id)
-                .join(Category, Item.category_id == Category.id)
+                .join(Subcategory, ItemStock.subcategory_id == Subcategory.id)
+                .join(Category, ItemStock.category_id == Category.id)
                 .where(and_(*conditions))
-                .distinct()
                 .limit(config.PAGE_ENTRIES)
                 .offset(page * config.PAGE_ENTRIES)
                 .order_by(*sort_methods))
@@ -61,15 +61,15 @@ class SubcategoryRepository:
     @staticmethod
     async def get_maximum_page(category_id: int | None, filters: list[str], session: AsyncSession) -> int:
         conditions = [
-            Item.is_sold == False
+            ItemStock.available_qty > 0
         ]
         if category_id:
-            conditions.append(Item.category_id == category_id)
+            conditions.append(ItemStock.category_id == category_id)
         if filters is not None:
             filter_conditions = [Subcategory.name.icontains(name) for name in filters]
             conditions.append(or_(*filter_conditions))
         subquery = (select(Subcategory.id)
-                    .join(Item, Item.subcategory_id == Subcategory.id)
+                    .join(ItemStock, ItemStock.subcategory_id == Subcategory.id)
                     .where(and_(*conditions))
                     .distinct())
         stmt = select(func.count()).select_from(subquery)
@@ -78,7 +78,7 @@ class SubcategoryRepository:
         return calculate_max_page(maximum_page)
 
     @staticmethod
-    async def get_by_id(subcategory_id: int, session: Session | AsyncSession) -> SubcategoryDTO:
+    async def get_by_id(subcategory_id: int, session: AsyncSession) -> SubcategoryDTO:
         stmt = select(Subcategory).where(Subcategory.id == subcategory_id)
         subcategory = await session_execute(stmt, session)
         return SubcategoryDTO.model_validate(subcategory.scalar(), from_attributes=True)
@@ -94,13 +94,13 @@ class SubcategoryRepository:
                 sort_method = (getattr(sort_column, sort_order.name.lower()))
                 sort_methods.append(sort_method())
         conditions = [
-            Item.is_sold == False
+            ItemStock.available_qty > 0
         ]
         if filters is not None:
             filter_conditions = [Subcategory.name.icontains(name) for name in filters]
             conditions.append(or_(*filter_conditions))
         stmt = (select(Subcategory)
-                .join(Item, Item.subcategory_id == Subcategory.id)
+                .join(ItemStock, ItemStock.subcategory_id == Subcategory.id)
                 .where(and_(*conditions))
                 .distinct()
                 .limit(config.PAGE_ENTRIES)
@@ -114,8 +114,8 @@ class SubcategoryRepository:
     async def get_maximum_page_to_delete(session: AsyncSession) -> int:
         unique_categories_subquery = (
             select(Subcategory.id)
-            .join(Item, Item.subcategory_id == Subcategory.id)
-            .filter(Item.is_sold == False)
+            .join(ItemStock, ItemStock.subcategory_id == Subcategory.id)
+            .filter(ItemStock.available_qty > 0)
             .distinct()
         ).alias('unique_categories')
         stmt = select(func.count()).select_from(unique_categories_subquery)
@@ -143,7 +143,7 @@ class SubcategoryRepository:
         await session_execute(stmt, session)
 
     @staticmethod
-    async def get_by_ids(subcategory_ids: list[int], session: Session | AsyncSession) -> list[SubcategoryDTO]:
+    async def get_by_ids(subcategory_ids: list[int], session: AsyncSession) -> list[SubcategoryDTO]:
         if not subcategory_ids:
             return []
         stmt = select(Subcategory).where(Subcategory.id.in_(subcategory_ids))
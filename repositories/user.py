@@ -1,52 +1,143 @@
-from sqlalchemy import select, update, func, or_
+from typing import AsyncIterator
+
+from sqlalchemy import select, update, func, or_, any_, bindparam, ARRAY, BigInteger
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import Session
 import config
 from callbacks import StatisticsTimeDelta
 from db import session_execute, session_flush
 
+from enums.ledger_entry_type import LedgerEntryType
+from models.ledger import LedgerEntryDTO
 from models.user import UserDTO, User
+from repositories.ledger import LedgerRepository
+from repositories.user_cache import UserCacheRepository
 from utils.utils import calculate_max_page
 
 
 class UserRepository:
     INT32_MAX = 2_147_483_647
     INT32_MIN = -2_147_483_648
+    RECIPIENTS_PAGE_SIZE = 1000
+    UPDATE_EXCLUDED_FIELDS = {"id", "top_up_amount", "consume_records"}
 
     @staticmethod
-    async def get_by_tgid(telegram_id: int, session: AsyncSession | Session) -> UserDTO | None:
+    async def get_by_tgid(telegram_id: int, session: AsyncSession) -> UserDTO | None:
+        is_dirty = UserCacheRepository.is_dirty(telegram_id, session)
+        if not is_dirty:
+            cached_user = await UserCacheRepository.get(telegram_id)
+            if cached_user is not None:
+                return cached_user
         stmt = select(User).where(User.telegram_id == telegram_id)
         user = await session_execute(stmt, session)
         user = user.scalar()
         if user is not None:
-            return UserDTO.model_validate(user, from_attributes=True)
+            user_dto = UserDTO.model_validate(user, from_attributes=True)
+            if not is_dirty:
+                await UserCacheRepository.set(user_dto)
+            return user_dto
         else:
             return user
 
     @staticmethod
-    async def update(user_dto: UserDTO, session: Session | AsyncSession) -> None:
-        user_dto_dict = user_dto.model_dump()
+    async def update(user_dto: UserDTO, session: AsyncSession) -> None:
+        # Balances change only through apply_balance_delta, a DTO read earlier must never overwrite them
+        user_dto_dict = user_dto.model_dump(exclude=UserRepository.UPDATE_EXCLUDED_FIELDS)
         none_keys = [k for k, v in user_dto_dict.items() if v is None]
         for k in none_keys:
             user_dto_dict.pop(k)
         stmt = update(User).where(User.telegram_id == user_dto.telegram_id).values(**user_dto_dict)
         await session_execute(stmt, session)
+        await UserCacheRepository.invalidate_in_session(user_dto.telegram_id, session)
+
+    @staticmethod
+    async def apply_balance_delta(user_id: int,
+                                  top_up_delta: float,
+                                  consume_delta: float,
+                                  entry_type: LedgerEntryType,
+                                  session: AsyncSession,
+                                  require_sufficient_funds: bool = False,
+                                  reference_id: int | None = None) -> UserDTO | None:
+        """
+        Applies the deltas in a single UPDATE, records them in the ledger and returns the updated user.
+        With require_sufficient_funds no row is touched and None is returned if the balance would go negative.
+        """
+        stmt = (update(User)
+                .where(User.id == user_id)
+                .values(top_up_amount=User.top_up_amount + top_up_delta,
+                        consume_records=User.consume_records + consume_delta)
+                .returning(User))
+        if require_sufficient_funds:
+            stmt = stmt.where(User.top_up_amount - User.consume_records >= consume_delta - top_up_delta)
+        user = await session_execute(stmt, session)
+        user = user.scalar()
+        if user is None:
+            return None
+        user_dto = UserDTO.model_validate(user, from_attributes=True)
+        await LedgerRepository.create(LedgerEntryDTO(
+            user_id=user_dto.id,
+            entry_type=entry_type,
+            credit=top_up_delta,
+            debit=consume_delta,
+            balance_after=user_dto.top_up_amount - user_dto.consume_records,
+            reference_id=reference_id
+        ), session)
+        await UserCacheRepository.invalidate_in_session(user_dto.telegram_id, session)
+        return user_dto
+
+    @staticmethod
+    async def set_referral_code(user_id: int, referral_code: str, session: AsyncSession) -> None:
+        stmt = (update(User)
+                .where(User.id == user_id, User.referral_code.is_(None))
+                .values(referral_code=referral_code)
+                .returning(User.telegram_id))
+        telegram_id = await session_execute(stmt, session)
+        telegram_id = telegram_id.scalar()
+        if telegram_id is not None:
+            await UserCacheRepository.invalidate_in_session(telegram_id, session)
+
+    @staticmethod
+    async def set_can_receive_messages(telegram_ids: list[int], can_receive_messages: bool, session: AsyncSession):
+        if not telegram_ids:
+            return
+        stmt = (update(User)
+                .where(User.telegram_id == any_(bindparam("telegram_ids", telegram_ids,
+                                                          type_=ARRAY(BigInteger))))
+                .values(can_receive_messages=can_receive_messages)
+                .execution_options(synchronize_session=False))
+        await session_execute(stmt, session)
+        await UserCacheRepository.invalidate_many_in_session(telegram_ids, session)
 
     @staticmethod
-    async def create(user_dto: UserDTO, session: Session | AsyncSession) -> int:
+    async def create(user_dto: UserDTO, session: AsyncSession) -> int:
         user = User(**user_dto.model_dump())
         session.add(user)
         await session_flush(session)
+        await UserCacheRepository.invalidate_in_session(user.telegram_id, session)
         return user.id
 
     @staticmethod
-    async def get_active(session: Session | AsyncSession) -> list[UserDTO]:
-        stmt = select(User).where(User.can_receive_messages == True)
-        users = await session_execute(stmt, session)
-        return [UserDTO.model_validate(user, from_attributes=True) for user in users.scalars().all()]
+    async def get_active_recipients(after_user_id: int, session: AsyncSession) -> AsyncIterator[tuple[int, int]]:
+        while True:
+            stmt = (select(User.id, User.telegram_id)
+                    .where(User.can_receive_messages == True, User.id > after_user_id)
+                    .order_by(User.id)
+                    .limit(UserRepository.RECIPIENTS_PAGE_SIZE))
+            recipients = await session_execute(stmt, session)
+            recipients = recipients.all()
+            for user_id, telegram_id in recipients:
+                yield user_id, telegram_id
+            if len(recipients) < UserRepository.RECIPIENTS_PAGE_SIZE:
+                return
+            after_user_id = recipients[-1][0]
+
+    @staticmethod
+    async def get_active_count(session: AsyncSession) -> int:
+        stmt = select(func.count(User.id)).where(User.can_receive_messages == True)
+        users_count = await session_execute(stmt, session)
+        return users_count.scalar_one()
 
     @staticmethod
-    async def get_all_count(session: Session | AsyncSession) -> int:
+    async def get_all_count(session: AsyncSession) -> int:
         stmt = func.count(User.id)
         users_count = await session_execute(stmt, session)
         return users_count.scalar_one()
@@ -54,7 +145,7 @@ class UserRepository:
     @staticmethod
     async def get_user_entity(
             user_entity: int | str,
-            session: Session | AsyncSession
+            session: AsyncSession
     ) -> UserDTO | None:
 
         entity_int: int | None = None
@@ -83,7 +174,7 @@ class UserRepository:
         return UserDTO.model_validate(user, from_attributes=True)
 
     @staticmethod
-    async def get_by_timedelta(timedelta: StatisticsTimeDelta, session: Session | AsyncSession) -> list[UserDTO]:
+    async def get_by_timedelta(timedelta: StatisticsTimeDelta, session: AsyncSession) -> list[UserDTO]:
         start, end = timedelta.get_time_range()
         users_stmt = (select(User)
                       .where(User.registered_at >= start,
@@ -93,7 +184,7 @@ class UserRepository:
 
     @staticmethod
     async def get_by_timedelta_paginated(timedelta: StatisticsTimeDelta,
-                               page: int, session: Session | AsyncSession) -> list[UserDTO]:
+                               page: int, session: AsyncSession) -> list[UserDTO]:
         start, end = timedelta.get_time_range()
         users_stmt = (select(User)
                       .where(User.registered_at >= start,
@@ -104,7 +195,7 @@ class UserRepository:
         return [UserDTO.model_validate(user, from_attributes=True) for user in users.scalars().all()]
 
     @staticmethod
-    async def get_max_page_by_timedelta(timedelta: StatisticsTimeDelta, session: Session | AsyncSession) -> int:
+    async def get_max_page_by_timedelta(timedelta: StatisticsTimeDelta, session: AsyncSession) -> int:
         start, end = timedelta.get_time_range()
         stmt = select(func.count(User.id)).where(
             User.registered_at >= start,
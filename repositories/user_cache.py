@@ -0,0 +1,92 @@
+import logging
+
+from redis.asyncio import Redis
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import config
+from db import add_after_commit_callback
+from models.user import UserDTO
+
+
+class UserCacheRepository:
+    KEY_PREFIX = "user:tgid"
+    DIRTY_SESSION_KEY = "user_cache_dirty_tgids"
+    _redis_client: Redis | None = None
+
+    @staticmethod
+    def set_redis_client(redis_client: Redis) -> None:
+        """
+        Shares the bot's Redis client, the cache stays disabled until it is set.
+        """
+        UserCacheRepository._redis_client = redis_client
+
+    @staticmethod
+    def _get_key(telegram_id: int) -> str:
+        return f"{UserCacheRepository.KEY_PREFIX}:{telegram_id}"
+
+    @staticmethod
+    def is_dirty(telegram_id: int, session: AsyncSession | None) -> bool:
+        if session is None:
+            return False
+        return telegram_id in session.info.get(UserCacheRepository.DIRTY_SESSION_KEY, set())
+
+    @staticmethod
+    async def get(telegram_id: int) -> UserDTO | None:
+        if UserCacheRepository._redis_client is None:
+            return None
+        try:
+            cached_user = await UserCacheRepository._redis_client.get(UserCacheRepository._get_key(telegram_id))
+        except Exception as e:
+            logging.warning(f"User cache read failed for {telegram_id}: {e}")
+            return None
+        if cached_user is None:
+            return None
+        return UserDTO.model_validate_json(cached_user)
+
+    @staticmethod
+    async def set(user_dto: UserDTO) -> None:
+        if UserCacheRepository._redis_client is None:
+            return
+        try:
+            await UserCacheRepository._redis_client.set(UserCacheRepository._get_key(user_dto.telegram_id),
+                                                        user_dto.model_dump_json(),
+                                                        ex=config.USER_CACHE_TTL_SECONDS)
+        except Exception as e:
+            logging.warning(f"User cache write failed for {user_dto.telegram_id}: {e}")
+
+    @staticmethod
+    async def invalidate(*telegram_ids: int) -> None:
+        if not telegram_ids or UserCacheRepository._redis_client is None:
+            return
+        try:
+            await UserCacheRepository._redis_client.delete(
+                *[UserCacheRepository._get_key(telegram_id) for telegram_id in telegram_ids]
+            )
+        except Exception as e:
+            logging.warning(f"User cache invalidation failed for {len(telegram_ids)} users: {e}")
+
+    @staticmethod
+    async def invalidate_in_session(telegram_id: int, session: AsyncSession | None) -> None:
+        await UserCacheRepository.invalidate_many_in_session([telegram_id], session)
+
+    @staticmethod
+    async def invalidate_many_in_session(telegram_ids: list[int], session: AsyncSession | None) -> None:
+        """
+        Drops the cached profiles now and once more after the session commits,
+        so concurrent readers can't re-cache the pre-commit rows.
+        Until then the session itself bypasses the cache for these users.
+        """
+        await UserCacheRepository.invalidate(*telegram_ids)
+        if session is None:
+            return
+        dirty_tgids = session.info.setdefault(UserCacheRepository.DIRTY_SESSION_KEY, set())
+        new_tgids = set(telegram_ids) - dirty_tgids
+        if not new_tgids:
+            return
+        dirty_tgids.update(new_tgids)
+
+        async def invalidate_after_commit():
+            dirty_tgids.difference_update(new_tgids)
+            await UserCacheRepository.invalidate(*new_tgids)
+
+        add_after_commit_callback(session, invalidate_after_commit)
@@ -111,10 +111,10 @@ users_routers.message.middleware(throttling_middleware)
 users_routers.callback_query.middleware(throttling_middleware)
 main_router.include_router(admin_router)
 main_router.include_routers(users_routers)
-main_router.message.middleware(DBSessionMiddleware())
-main_router.callback_query.middleware(DBSessionMiddleware())
-main_router.message.middleware(I18nMiddleware())
-main_router.callback_query.middleware(I18nMiddleware())
+main_router.message.outer_middleware(DBSessionMiddleware())
+main_router.callback_query.outer_middleware(DBSessionMiddleware())
+main_router.message.outer_middleware(I18nMiddleware())
+main_router.callback_query.outer_middleware(I18nMiddleware())
 
 
 @main_router.message(IsUserBannedFilter())
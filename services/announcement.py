@@ -1,20 +1,29 @@
 import asyncio
 import logging
+import os
+import socket
+from uuid import uuid4
 
 import config
-from aiogram.exceptions import TelegramForbiddenError
+from aiogram import Bot
 from aiogram.types import CallbackQuery
 from aiogram.utils.keyboard import InlineKeyboardBuilder
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from callbacks import AnnouncementCallback
-from db import session_commit
+from db import session_commit, get_db_session
 from enums.announcement_type import AnnouncementType
 from enums.bot_entity import BotEntity
+from enums.broadcast_action import BroadcastAction
+from enums.broadcast_status import BroadcastStatus
+from enums.delivery_status import DeliveryStatus
 from enums.language import Language
 from handlers.admin.constants import AdminConstants
+from models.broadcast import BroadcastJobDTO, BroadcastStatsDTO
+from repositories.broadcast_job import BroadcastJobRepository
 from repositories.item import ItemRepository
 from repositories.user import UserRepository
+from services.broadcast import BroadcastService
 from services.item import ItemService
 from services.notification import NotificationService
 from services.multibot import MultibotService
@@ -22,34 +31,61 @@ from utils.utils import get_text
 
 
 class AnnouncementService:
+    BROADCAST_TASKS: dict[int, asyncio.Task] = {}
+    PAUSE_POLL_SECONDS = 5
+    WORKER_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid4().hex[:8]}"
+
     @staticmethod
-    async def _send_generated_announcement_to_user(callback: CallbackQuery,
+    async def _send_generated_announcement_to_user(bot: Bot,
                                                    telegram_id: int,
-                                                   messages: list[str]) -> tuple[bool, bool]:
+                                                   messages: list[str]) -> DeliveryStatus:
         if config.MULTIBOT:
-            had_only_forbidden_errors = False
             for message_text in messages:
-                sent_count, chunk_had_only_forbidden_errors = await MultibotService.send_message_to_user_verbose(
+                sent_count, had_only_forbidden_errors = await MultibotService.send_message_to_user_verbose(
                     text=message_text,
                     telegram_id=telegram_id
                 )
                 if sent_count == 0:
-                    return False, chunk_had_only_forbidden_errors
-                had_only_forbidden_errors = had_only_forbidden_errors or chunk_had_only_forbidden_errors
-            return True, had_only_forbidden_errors
-        try:
-            for message_text in messages:
-                await callback.bot.send_message(telegram_id, message_text)
-            return True, False
-        except TelegramForbiddenError as exception:
-            logging.error(f"TelegramForbiddenError: {exception.message}")
-            return False, True
-        except Exception as exception:
-            logging.error(exception)
-            return False, False
+                    return DeliveryStatus.BLOCKED if had_only_forbidden_errors else DeliveryStatus.FAILED
+            return DeliveryStatus.SENT
+        for message_text in messages:
+            await bot.send_message(telegram_id, message_text)
+        return DeliveryStatus.SENT
+
+    @staticmethod
+    async def _copy_announcement_to_user(bot: Bot,
+                                         broadcast_job: BroadcastJobDTO,
+                                         telegram_id: int) -> DeliveryStatus:
+        if config.MULTIBOT:
+            sent_count, had_only_forbidden_errors = await MultibotService.copy_message_to_user(
+                from_chat_id=broadcast_job.source_chat_id,
+                message_id=broadcast_job.source_message_id,
+                telegram_id=telegram_id
+            )
+            if sent_count > 0:
+                return DeliveryStatus.SENT
+            return DeliveryStatus.BLOCKED if had_only_forbidden_errors else DeliveryStatus.FAILED
+        await bot.copy_message(chat_id=telegram_id,
+                               from_chat_id=broadcast_job.source_chat_id,
+                               message_id=broadcast_job.source_message_id)
+        return DeliveryStatus.SENT
+
+    @staticmethod
+    async def _mark_users_unreachable(telegram_ids: list[int], session: AsyncSession):
+        await UserRepository.set_can_receive_messages(telegram_ids, False, session)
+        await session_commit(session)
+
+    @staticmethod
+    def _format_progress(broadcast_job: BroadcastJobDTO, users_count: int, language: Language) -> str:
+        return get_text(language, BotEntity.ADMIN, "sending_result").format(
+            counter=broadcast_job.sent_count,
+            len=broadcast_job.total_count,
+            users_count=users_count,
+            status=broadcast_job.status.get_localized(language)
+        )
 
     @staticmethod
-    async def get_announcement_menu(language: Language) -> tuple[str, InlineKeyboardBuilder]:
+    async def get_announcement_menu(session: AsyncSession, language: Language) -> tuple[str, InlineKeyboardBuilder]:
         kb_builder = InlineKeyboardBuilder()
         kb_builder.button(text=get_text(language, BotEntity.ADMIN, "send_everyone"),
                           callback_data=AnnouncementCallback.create(1))
@@ -57,97 +93,198 @@ class AnnouncementService:
                           callback_data=AnnouncementCallback.create(2, AnnouncementType.RESTOCKING))
         kb_builder.button(text=get_text(language, BotEntity.ADMIN, "stock"),
                           callback_data=AnnouncementCallback.create(2, AnnouncementType.CURRENT_STOCK))
+        for broadcast_job in await BroadcastJobRepository.get_unfinished(session):
+            kb_builder.button(
+                text=get_text(language, BotEntity.ADMIN, "broadcast_job").format(
+                    broadcast_job_id=broadcast_job.id,
+                    status=broadcast_job.status.get_localized(language)
+                ),
+                callback_data=AnnouncementCallback.create(4, broadcast_job_id=broadcast_job.id)
+            )
         kb_builder.row(AdminConstants.back_to_main_button(language))
         kb_builder.adjust(1)
         return get_text(language, BotEntity.ADMIN, "announcements"), kb_builder
 
+    @staticmethod
+    async def _run_broadcast_job(broadcast_job_id: int, bot: Bot):
+        owner = AnnouncementService.WORKER_ID
+        async with get_db_session() as session:
+            is_claimed = await BroadcastJobRepository.claim(broadcast_job_id, owner, session)
+            await session_commit(session)
+            if not is_claimed:
+                logging.info(f"Broadcast job {broadcast_job_id} is leased by another process")
+                return
+            broadcast_job = await BroadcastJobRepository.get_by_id(broadcast_job_id, session)
+            users_count = await UserRepository.get_all_count(session)
+            while broadcast_job.status in BroadcastJobRepository.UNFINISHED_STATUSES:
+                if broadcast_job.status == BroadcastStatus.PAUSED:
+                    await asyncio.sleep(AnnouncementService.PAUSE_POLL_SECONDS)
+                    is_claimed = await BroadcastJobRepository.claim(broadcast_job_id, owner, session)
+                    await session_commit(session)
+                    if not is_claimed:
+                        break
+                    broadcast_job = await BroadcastJobRepository.get_by_id(broadcast_job_id, session)
+                    continue
+                if broadcast_job.messages:
+                    messages_per_recipient = len(broadcast_job.messages)
+
+                    async def send(telegram_id: int) -> DeliveryStatus:
+                        return await AnnouncementService._send_generated_announcement_to_user(
+                            bot, telegram_id, broadcast_job.messages
+                        )
+                else:
+                    messages_per_recipient = 1
+
+                    async def send(telegram_id: int) -> DeliveryStatus:
+                        return await AnnouncementService._copy_announcement_to_user(bot, broadcast_job, telegram_id)
+
+                async def on_blocked(telegram_ids: list[int]):
+                    await AnnouncementService._mark_users_unreachable(telegram_ids, session)
+
+                is_lease_lost = False
+
+                async def on_checkpoint(stats: BroadcastStatsDTO, cursor: int) -> bool:
+                    nonlocal is_lease_lost
+                    status = await BroadcastJobRepository.save_checkpoint(broadcast_job_id, owner, cursor, stats,
+                                                                          session)
+                    await session_commit(session)
+                    if status is None:
+                        is_lease_lost = True
+                        return False
+                    progress_job = broadcast_job.model_copy(update={"status": status, "sent_count": stats.sent})
+                    await NotificationService.edit_message(
+                        message=AnnouncementService._format_progress(progress_job, users_count,
+                                                                     broadcast_job.language),
+                        source_message_id=broadcast_job.progress_message_id,
+                        chat_id=broadcast_job.progress_chat_id
+                    )
+                    return status == BroadcastStatus.RUNNING
+
+                await BroadcastService.broadcast(
+                    UserRepository.get_active_recipients(broadcast_job.cursor, session),
+                    send, on_blocked, on_checkpoint, messages_per_recipient,
+                    BroadcastStatsDTO(sent=broadcast_job.sent_count,
+                                      blocked=broadcast_job.blocked_count,
+                                      failed=broadcast_job.failed_count)
+                )
+                if is_lease_lost:
+                    logging.warning(f"Broadcast job {broadcast_job_id} lease was taken over, stopping")
+                    return
+                if await BroadcastJobRepository.set_status(broadcast_job_id, BroadcastStatus.FINISHED,
+                                                           (BroadcastStatus.RUNNING,), session):
+                    if broadcast_job.announcement_type == AnnouncementType.RESTOCKING:
+                        await ItemRepository.set_not_new(session)
+                await session_commit(session)
+                broadcast_job = await BroadcastJobRepository.get_by_id(broadcast_job_id, session)
+            if broadcast_job.status in BroadcastJobRepository.UNFINISHED_STATUSES:
+                logging.warning(f"Broadcast job {broadcast_job_id} lease was taken over, stopping")
+                return
+            await NotificationService.edit_message(
+                message=AnnouncementService._format_progress(broadcast_job, users_count, broadcast_job.language),
+                source_message_id=broadcast_job.progress_message_id,
+                chat_id=broadcast_job.progress_chat_id
+            )
+        try:
+            await bot.delete_message(chat_id=broadcast_job.source_chat_id,
+                                     message_id=broadcast_job.source_message_id)
+        except Exception as exception:
+            logging.error(exception)
+
+    @staticmethod
+    async def _run_broadcast_job_safely(broadcast_job_id: int, bot: Bot):
+        try:
+            await AnnouncementService._run_broadcast_job(broadcast_job_id, bot)
+        except Exception as exception:
+            logging.exception(exception)
+
+    @staticmethod
+    def start_broadcast_job(broadcast_job_id: int, bot: Bot) -> asyncio.Task:
+        task = AnnouncementService.BROADCAST_TASKS.get(broadcast_job_id)
+        if task is None or task.done():
+            task = asyncio.create_task(AnnouncementService._run_broadcast_job_safely(broadcast_job_id, bot))
+            AnnouncementService.BROADCAST_TASKS[broadcast_job_id] = task
+            task.add_done_callback(lambda _: AnnouncementService.BROADCAST_TASKS.pop(broadcast_job_id, None))
+        return task
+
+    @staticmethod
+    async def resume_broadcast_jobs(bot: Bot):
+        async with get_db_session() as session:
+            broadcast_jobs = await BroadcastJobRepository.get_unfinished(session)
+        for broadcast_job in broadcast_jobs:
+            AnnouncementService.start_broadcast_job(broadcast_job.id, bot)
+
     @staticmethod
     async def send_announcement(callback: CallbackQuery,
                                 callback_data: AnnouncementCallback,
                                 session: AsyncSession,
-                                language: Language):
+                                language: Language) -> asyncio.Task:
         await callback.message.edit_reply_markup()
-        active_users = await UserRepository.get_active(session)
-        all_users_count = await UserRepository.get_all_count(session)
-        counter = 0
-        message_template = get_text(language, BotEntity.ADMIN, "sending_result")
-        message = await callback.message.answer(
-            text=message_template.format(
-                counter=counter,
-                len=len(active_users),
-                users_count=all_users_count,
-                status=get_text(language, BotEntity.ADMIN, "in_progress")
-            )
+        broadcast_job = BroadcastJobDTO(
+            announcement_type=callback_data.announcement_type,
+            status=BroadcastStatus.RUNNING,
+            language=language,
+            source_chat_id=callback.message.chat.id,
+            source_message_id=callback.message.message_id,
+            total_count=await UserRepository.get_active_count(session),
+            sent_count=0
         )
-        generated_messages = None
-        is_generated_announcement = callback_data.announcement_type in (
-            AnnouncementType.RESTOCKING,
-            AnnouncementType.CURRENT_STOCK
+        users_count = await UserRepository.get_all_count(session)
+        progress_message = await callback.message.answer(
+            text=AnnouncementService._format_progress(broadcast_job, users_count, language)
         )
-        if is_generated_announcement:
-            generated_messages = await ItemService.create_announcement_message(
+        if callback_data.announcement_type in (AnnouncementType.RESTOCKING, AnnouncementType.CURRENT_STOCK):
+            broadcast_job.messages = [message_text async for message_text in ItemService.create_announcement_message(
                 callback_data.announcement_type,
                 session,
                 language
+            )]
+        broadcast_job.progress_chat_id = progress_message.chat.id
+        broadcast_job.progress_message_id = progress_message.message_id
+        broadcast_job = await BroadcastJobRepository.create(broadcast_job, session)
+        await session_commit(session)
+        return AnnouncementService.start_broadcast_job(broadcast_job.id, callback.bot)
+
+    @staticmethod
+    async def get_broadcast_job_view(callback_data: AnnouncementCallback,
+                                     session: AsyncSession,
+                                     language: Language) -> tuple[str, InlineKeyboardBuilder]:
+        broadcast_job = await BroadcastJobRepository.get_by_id(callback_data.broadcast_job_id, session)
+        users_count = await UserRepository.get_all_count(session)
+        kb_builder = InlineKeyboardBuilder()
+        if broadcast_job.status == BroadcastStatus.RUNNING:
+            actions = [BroadcastAction.PAUSE, BroadcastAction.CANCEL]
+        elif broadcast_job.status == BroadcastStatus.PAUSED:
+            actions = [BroadcastAction.RESUME, BroadcastAction.CANCEL]
+        else:
+            actions = []
+        for action in actions:
+            kb_builder.button(
+                text=get_text(language, BotEntity.ADMIN, f"broadcast_{action.name.lower()}"),
+                callback_data=AnnouncementCallback.create(5, broadcast_job_id=broadcast_job.id,
+                                                          broadcast_action=action)
             )
-        for user in active_users:
-            try:
-                if is_generated_announcement:
-                    is_sent, had_only_forbidden_errors = await AnnouncementService._send_generated_announcement_to_user(
-                        callback,
-                        user.telegram_id,
-                        generated_messages
-                    )
-                    if is_sent:
-                        counter += 1
-                    elif had_only_forbidden_errors:
-                        user.can_receive_messages = False
-                        await UserRepository.update(user, session)
-                elif config.MULTIBOT:
-                    sent_count, had_only_forbidden_errors = await MultibotService.copy_message_to_user(
-                        from_chat_id=callback.message.chat.id,
-                        message_id=callback.message.message_id,
-                        telegram_id=user.telegram_id
-                    )
-                    if sent_count > 0:
-                        counter += 1
-                    elif had_only_forbidden_errors:
-                        user.can_receive_messages = False
-                        await UserRepository.update(user, session)
-                else:
-                    await callback.message.copy_to(user.telegram_id, reply_markup=None)
-                    counter += 1
-                    await asyncio.sleep(1.5)
-            except TelegramForbiddenError as e:
-                logging.error(f"TelegramForbiddenError: {e.message}")
-                if "user is deactivated" in e.message.lower():
-                    user.can_receive_messages = False
-                elif "bot was blocked by the user" in e.message.lower():
-                    user.can_receive_messages = False
-                    await UserRepository.update(user, session)
-            except Exception as e:
-                logging.error(e)
-            finally:
-                if counter % 5 == 0:
-                    msg = message_template.format(
-                        counter=counter,
-                        len=len(active_users),
-                        users_count=all_users_count,
-                        status=get_text(language, BotEntity.ADMIN, "in_progress")
-                    )
-                    await NotificationService.edit_message(message=msg,
-                                                           source_message_id=message.message_id,
-                                                           chat_id=message.chat.id)
-                await session_commit(session)
-        if callback_data.announcement_type == AnnouncementType.RESTOCKING:
-            await ItemRepository.set_not_new(session)
-            await session_commit(session)
-        await NotificationService.edit_message(
-            message=message_template.format(
-                counter=counter,
-                len=len(active_users),
-                users_count=all_users_count,
-                status=get_text(language, BotEntity.ADMIN, "finished")
-            ),
-            source_message_id=message.message_id,
-            chat_id=message.chat.id)
+        kb_builder.adjust(2)
+        kb_builder.row(callback_data.get_back_button(language, 0))
+        return AnnouncementService._format_progress(broadcast_job, users_count, language), kb_builder
+
+    @staticmethod
+    async def update_broadcast_job(callback: CallbackQuery,
+                                   callback_data: AnnouncementCallback,
+                                   session: AsyncSession,
+                                   language: Language) -> tuple[str, InlineKeyboardBuilder]:
+        broadcast_job_id = callback_data.broadcast_job_id
+        if callback_data.broadcast_action == BroadcastAction.PAUSE:
+            is_updated = await BroadcastJobRepository.set_status(broadcast_job_id, BroadcastStatus.PAUSED,
+                                                                 (BroadcastStatus.RUNNING,), session)
+        elif callback_data.broadcast_action == BroadcastAction.RESUME:
+            is_updated = await BroadcastJobRepository.set_status(broadcast_job_id, BroadcastStatus.RUNNING,
+                                                                 (BroadcastStatus.PAUSED,), session)
+        else:
+            is_updated = await BroadcastJobRepository.set_status(broadcast_job_id, BroadcastStatus.CANCELLED,
+                                                                 BroadcastJobRepository.UNFINISHED_STATUSES,
+                                                                 session)
+        await session_commit(session)
+        if is_updated:
+            # Normally a no-op; picks the job up again if its worker is gone
+            AnnouncementService.start_broadcast_job(broadcast_job_id, callback.bot)
+        return await AnnouncementService.get_broadcast_job_view(callback_data, session, language)
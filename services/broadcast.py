@@ -0,0 +1,128 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import AsyncIterable, Awaitable, Callable
+
+from aiogram.exceptions import TelegramForbiddenError, TelegramRetryAfter
+
+from enums.delivery_status import DeliveryStatus
+from models.broadcast import BroadcastStatsDTO
+from utils.rate_limiter import TokenBucket
+
+
+class BroadcastService:
+    MESSAGES_PER_SECOND = 30
+    WORKERS = 10
+    MAX_ATTEMPTS = 3
+    BLOCKED_BATCH_SIZE = 100
+    CHECKPOINT_EVERY = 100
+    CHECKPOINT_SECONDS = 5
+
+    @staticmethod
+    async def _deliver(send: Callable[[int], Awaitable[DeliveryStatus]],
+                       telegram_id: int,
+                       limiter: TokenBucket,
+                       messages_per_recipient: int) -> DeliveryStatus:
+        for _ in range(BroadcastService.MAX_ATTEMPTS):
+            await limiter.acquire(messages_per_recipient)
+            try:
+                return await send(telegram_id)
+            except TelegramRetryAfter as exception:
+                logging.warning(f"Broadcast is rate limited, retrying after {exception.retry_after}s")
+                limiter.pause(exception.retry_after)
+            except TelegramForbiddenError as exception:
+                logging.error(f"TelegramForbiddenError: {exception.message}")
+                return DeliveryStatus.BLOCKED
+            except Exception as exception:
+                logging.error(exception)
+                return DeliveryStatus.FAILED
+        return DeliveryStatus.FAILED
+
+    @staticmethod
+    async def broadcast(recipients: AsyncIterable[tuple[int, int]],
+                        send: Callable[[int], Awaitable[DeliveryStatus]],
+                        on_blocked: Callable[[list[int]], Awaitable[None]],
+                        on_checkpoint: Callable[[BroadcastStatsDTO, int], Awaitable[bool]],
+                        messages_per_recipient: int = 1,
+                        stats: BroadcastStatsDTO | None = None) -> BroadcastStatsDTO:
+        """
+        Recipients are (cursor, telegram_id) pairs in ascending cursor order. Every CHECKPOINT_EVERY recipients
+        or CHECKPOINT_SECONDS, on_checkpoint gets the highest cursor up to which every recipient is processed,
+        without waiting for the workers to drain. After a crash at most CHECKPOINT_EVERY recipients plus the
+        ones in flight, WORKERS * 3, are sent again. Returning False stops the broadcast once they finish.
+        Callbacks run only in the task iterating recipients, so all of them may share one DB session.
+        """
+        limiter = TokenBucket(BroadcastService.MESSAGES_PER_SECOND, BroadcastService.MESSAGES_PER_SECOND)
+        queue: asyncio.Queue[tuple[int, int]] = asyncio.Queue(maxsize=BroadcastService.WORKERS * 2)
+        stats = stats or BroadcastStatsDTO()
+        blocked_ids: list[int] = []
+        enqueued_cursors: deque[int] = deque()
+        in_flight_cursors: set[int] = set()
+        processed_cursor, processed_since_checkpoint = None, 0
+        checkpointed_at = time.monotonic()
+
+        async def flush_blocked():
+            if blocked_ids:
+                telegram_ids_batch = blocked_ids.copy()
+                blocked_ids.clear()
+                await on_blocked(telegram_ids_batch)
+
+        async def worker():
+            while True:
+                cursor, telegram_id = await queue.get()
+                try:
+                    status = await BroadcastService._deliver(send, telegram_id, limiter, messages_per_recipient)
+                    if status == DeliveryStatus.SENT:
+                        stats.sent += 1
+                    elif status == DeliveryStatus.BLOCKED:
+                        stats.blocked += 1
+                        blocked_ids.append(telegram_id)
+                    else:
+                        stats.failed += 1
+                except Exception as exception:
+                    logging.error(exception)
+                finally:
+                    in_flight_cursors.discard(cursor)
+                    queue.task_done()
+
+        def advance_processed_cursor():
+            nonlocal processed_cursor, processed_since_checkpoint
+            while enqueued_cursors and enqueued_cursors[0] not in in_flight_cursors:
+                processed_cursor = enqueued_cursors.popleft()
+                processed_since_checkpoint += 1
+
+        def is_checkpoint_due() -> bool:
+            if processed_since_checkpoint >= BroadcastService.CHECKPOINT_EVERY:
+                return True
+            return (processed_since_checkpoint > 0 and
+                    time.monotonic() - checkpointed_at >= BroadcastService.CHECKPOINT_SECONDS)
+
+        async def checkpoint() -> bool:
+            nonlocal processed_since_checkpoint, checkpointed_at
+            processed_since_checkpoint = 0
+            checkpointed_at = time.monotonic()
+            return await on_checkpoint(stats, processed_cursor)
+
+        workers = [asyncio.create_task(worker()) for _ in range(BroadcastService.WORKERS)]
+        try:
+            async for cursor, telegram_id in recipients:
+                enqueued_cursors.append(cursor)
+                in_flight_cursors.add(cursor)
+                await queue.put((cursor, telegram_id))
+                if len(blocked_ids) >= BroadcastService.BLOCKED_BATCH_SIZE:
+                    await flush_blocked()
+                advance_processed_cursor()
+                if is_checkpoint_due():
+                    if not await checkpoint():
+                        break
+            await queue.join()
+            await flush_blocked()
+            advance_processed_cursor()
+            if processed_since_checkpoint > 0:
+                await checkpoint()
+        finally:
+            for worker_task in workers:
+                worker_task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+        return stats
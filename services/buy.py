@@ -2,7 +2,6 @@ from aiogram.fsm.context import FSMContext
 from aiogram.types import BufferedInputFile, InputMediaDocument, InputMediaPhoto
 from aiogram.utils.keyboard import InlineKeyboardBuilder
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import Session
 
 import config
 from callbacks import MyProfileCallback, BuysManagementCallback, ReviewManagementCallback
@@ -12,6 +11,7 @@ from enums.buy_status import BuyStatus
 from enums.entity_type import EntityType
 from enums.item_type import ItemType
 from enums.language import Language
+from enums.ledger_entry_type import LedgerEntryType
 from enums.sort_property import SortProperty
 from enums.user_role import UserRole
 from handlers.common.common import get_filters_settings, add_sorting_buttons, add_pagination_buttons, add_search_button
@@ -32,14 +32,14 @@ from utils.utils import get_text, get_bot_photo_id, remove_html_tags
 class BuyService:
 
     @staticmethod
-    async def refund(buy_dto: BuyDTO, session: AsyncSession | Session, language: Language) -> str:
+    async def refund(buy_dto: BuyDTO, session: AsyncSession, language: Language) -> str:
         refund_data = await BuyRepository.get_refund_data_single(buy_dto.id, session)
         buy = await BuyRepository.get_by_id(buy_dto.id, session)
         buy.status = BuyStatus.REFUNDED
         await BuyRepository.update(buy, session)
         user = await UserRepository.get_by_tgid(refund_data.telegram_id, session)
-        user.consume_records = user.consume_records - refund_data.total_price
-        await UserRepository.update(user, session)
+        await UserRepository.apply_balance_delta(user.id, 0.0, -refund_data.total_price, LedgerEntryType.REFUND,
+                                                 session, reference_id=buy.id)
         await session_commit(session)
         await NotificationService.refund(refund_data)
         if refund_data.telegram_username:
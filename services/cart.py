@@ -3,7 +3,6 @@ from aiogram.types import CallbackQuery, InputMediaPhoto, InputMediaVideo, Input
     InlineKeyboardButton
 from aiogram.utils.keyboard import InlineKeyboardBuilder
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import Session
 
 import config
 from callbacks import AllCategoriesCallback, CartCallback, MyProfileCallback
@@ -15,11 +14,14 @@ from enums.coupon_type import CouponType
 from enums.item_type import ItemType
 from enums.keyboard_button import KeyboardButton
 from enums.language import Language
+from enums.ledger_entry_type import LedgerEntryType
+from enums.outbox_event_type import OutboxEventType
 from handlers.common.common import add_pagination_buttons
 from handlers.user.constants import UserStates
 from models.buy import BuyDTO
 from models.buyItem import BuyItemDTO
 from models.cartItem import CartItemDTO
+from models.outbox import NewBuyPayloadDTO
 from repositories.button_media import ButtonMediaRepository
 from repositories.buy import BuyRepository
 from repositories.buyItem import BuyItemRepository
@@ -28,11 +30,13 @@ from repositories.cartItem import CartItemRepository
 from repositories.category import CategoryRepository
 from repositories.coupon import CouponRepository
 from repositories.item import ItemRepository
+from repositories.outbox import OutboxRepository
 from repositories.shipping_option import ShippingOptionRepository
 from repositories.subcategory import SubcategoryRepository
 from repositories.user import UserRepository
 from services.media import MediaService
 from services.notification import NotificationService
+from services.outbox import OutboxService
 from utils.utils import get_text
 from utils.utils import get_bot_photo_id
 
@@ -40,7 +44,7 @@ from utils.utils import get_bot_photo_id
 class CartService:
     @staticmethod
     async def _get_cart_availability_map(cart_items: list[CartItemDTO],
-                                         session: AsyncSession | Session):
+                                         session: AsyncSession):
         return await ItemRepository.get_availability_by_cart_items(cart_items, session)
 
     @staticmethod
@@ -153,7 +157,7 @@ class CartService:
 
     @staticmethod
     async def delete_cart_item(callback_data: CartCallback,
-                               session: AsyncSession | Session,
+                               session: AsyncSession,
                                language: Language):
         kb_builder = InlineKeyboardBuilder()
         if callback_data.confirmation:
@@ -188,7 +192,7 @@ class CartService:
     async def checkout_processing(callback: CallbackQuery,
                                   callback_data: CartCallback,
                                   state: FSMContext,
-                                  session: AsyncSession | Session,
+                                  session: AsyncSession,
                                   language: Language) -> tuple[str, InlineKeyboardBuilder]:
         user = await UserRepository.get_by_tgid(callback.from_user.id, session)
         cart_items = await CartItemRepository.get_all_by_user_id(user.id, session)
@@ -300,7 +304,7 @@ class CartService:
     async def buy_processing(callback: CallbackQuery,
                              callback_data: CartCallback,
                              state: FSMContext,
-                             session: AsyncSession | Session,
+                             session: AsyncSession,
                              language: Language) -> tuple[str, InlineKeyboardBuilder]:
         user = await UserRepository.get_by_tgid(callback.from_user.id, session)
         cart_items = await CartItemRepository.get_all_by_user_id(user.id, session)
@@ -349,33 +353,45 @@ class CartService:
                              shipping_option_id=shipping_option.id if shipping_option else None,
                              status=BuyStatus.PAID if shipping_option else BuyStatus.COMPLETED)
             buy_dto = await BuyRepository.create(buy_dto, session)
-            for cart_item in cart_items:
-                purchased_items = await ItemRepository.get_purchased_items(cart_item.item_type,
-                                                                           cart_item.category_id,
-                                                                           cart_item.subcategory_id, cart_item.quantity,
-                                                                           session)
+            # Selling keys in one fixed order keeps concurrent checkouts from deadlocking on item_stock rows
+            for cart_item in sorted(cart_items, key=lambda cart_item: (cart_item.item_type.value,
+                                                                       cart_item.category_id,
+                                                                       cart_item.subcategory_id)):
+                purchased_items = await ItemRepository.sell_unsold(cart_item.item_type,
+                                                                   cart_item.category_id,
+                                                                   cart_item.subcategory_id, cart_item.quantity,
+                                                                   session)
+                if len(purchased_items) < cart_item.quantity:
+                    out_of_stock.append(cart_item)
+                    continue
                 item_ids = [item.id for item in purchased_items]
                 buy_item_dto = BuyItemDTO(buy_id=buy_dto.id, item_ids=item_ids)
                 await BuyItemRepository.create_single(buy_item_dto, session)
-                for item in purchased_items:
-                    item.is_sold = True
-                await ItemRepository.update(purchased_items, session)
                 await CartItemRepository.remove_from_cart(cart_item.id, session)
-            kb_builder.button(
-                text=get_text(language, BotEntity.USER, "purchase_history_item").format(
-                    buy_id=buy_dto.id,
-                    total_price=buy_dto.total_price,
-                    currency_sym=config.CURRENCY.get_localized_symbol()
-                ),
-                callback_data=MyProfileCallback.create(level=4,
-                                                       buy_id=buy_dto.id)
-            )
-            user.consume_records = user.consume_records + cart_total_price
-            await UserRepository.update(user, session)
-            await session_commit(session)
-            await NotificationService.new_buy(buy_dto, user, session)
-            return msg, kb_builder
-        elif callback_data.confirmation is False:
+            if len(out_of_stock) == 0:
+                # Debited with a funds guard in SQL, so concurrent purchases can't both spend the same balance
+                user = await UserRepository.apply_balance_delta(user.id, 0.0, cart_total_price,
+                                                                LedgerEntryType.PURCHASE, session,
+                                                                require_sufficient_funds=True,
+                                                                reference_id=buy_dto.id)
+                is_enough_money = user is not None
+            if len(out_of_stock) == 0 and is_enough_money:
+                kb_builder.button(
+                    text=get_text(language, BotEntity.USER, "purchase_history_item").format(
+                        buy_id=buy_dto.id,
+                        total_price=buy_dto.total_price,
+                        currency_sym=config.CURRENCY.get_localized_symbol()
+                    ),
+                    callback_data=MyProfileCallback.create(level=4,
+                                                           buy_id=buy_dto.id)
+                )
+                await OutboxRepository.add(OutboxEventType.NEW_BUY, NewBuyPayloadDTO(buy=buy_dto, user=user), session)
+                await session_commit(session)
+                OutboxService.wake_up()
+                return msg, kb_builder
+            # Items were taken or the balance was spent concurrently, nothing from this attempt is kept
+            await session.rollback()
+        if callback_data.confirmation is False:
             kb_builder.row(callback_data.get_back_button(language, 0))
             return get_text(language, BotEntity.USER, "purchase_confirmation_declined"), kb_builder
         elif is_enough_money is False:
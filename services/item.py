@@ -1,10 +1,12 @@
-from json import load
+import re
+from itertools import batched
+from json import JSONDecoder, JSONDecodeError
 from pathlib import Path
+from typing import AsyncIterator, Awaitable, Callable, Iterator, TextIO
 
 from aiogram.types import InputMediaPhoto
 from aiogram.utils.keyboard import InlineKeyboardBuilder
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import Session
 
 import config
 from callbacks import AddType, AllCategoriesCallback
@@ -14,10 +16,11 @@ from enums.bot_entity import BotEntity
 from enums.item_type import ItemType
 from enums.keyboard_button import KeyboardButton
 from enums.language import Language
-from models.item import ItemDTO
+from models.item import ItemDTO, SubcategorySummaryDTO
 from repositories.button_media import ButtonMediaRepository
 from repositories.category import CategoryRepository
 from repositories.item import ItemRepository
+from repositories.item_stock import ItemStockRepository
 from repositories.subcategory import SubcategoryRepository
 from services.media import MediaService
 from utils.utils import get_text
@@ -25,6 +28,9 @@ from utils.utils import get_text
 
 class ItemService:
     ANNOUNCEMENT_MESSAGE_LIMIT = 4000
+    IMPORT_CHUNK_SIZE = 5000
+    IMPORT_READ_SIZE = 1024 * 64
+    JSON_SEPARATOR = re.compile(r'\s*,?\s*')
 
     @staticmethod
     def _wrap_announcement_chunk(content: str) -> str:
@@ -52,131 +58,152 @@ class ItemService:
         return category_blocks
 
     @staticmethod
-    def _build_announcement_chunks(header: str, category_blocks: list[str]) -> list[str]:
+    def _get_category_header(category_name: str, language: Language) -> str:
+        return get_text(language, BotEntity.ADMIN, "restocking_message_category").format(category=category_name)
+
+    @staticmethod
+    async def _iter_category_blocks(summaries: AsyncIterator[SubcategorySummaryDTO],
+                                    header: str,
+                                    language: Language) -> AsyncIterator[str]:
+        category_name = None
+        subcategory_lines: list[str] = []
+        async for summary in summaries:
+            if summary.category_name != category_name and subcategory_lines:
+                for block in ItemService._split_category_into_blocks(
+                        header, ItemService._get_category_header(category_name, language), subcategory_lines):
+                    yield block
+                subcategory_lines = []
+            category_name = summary.category_name
+            subcategory_lines.append(get_text(language, BotEntity.USER, "subcategory_button").format(
+                subcategory_name=summary.subcategory_name,
+                available_quantity=summary.available_qty,
+                subcategory_price=summary.price,
+                currency_sym=config.CURRENCY.get_localized_symbol()) + "\n")
+        if subcategory_lines:
+            for block in ItemService._split_category_into_blocks(
+                    header, ItemService._get_category_header(category_name, language), subcategory_lines):
+                yield block
+
+    @staticmethod
+    async def create_announcement_message(announcement_type: AnnouncementType,
+                                          session: AsyncSession,
+                                          language: Language) -> AsyncIterator[str]:
+        if announcement_type == AnnouncementType.CURRENT_STOCK:
+            summaries = ItemStockRepository.get_subcategory_summary(session)
+            header = get_text(language, BotEntity.ADMIN, "current_stock_header")
+        else:
+            summaries = ItemRepository.get_new_subcategory_summary(session)
+            header = get_text(language, BotEntity.ADMIN, "restocking_message_header")
         max_content_length = ItemService.ANNOUNCEMENT_MESSAGE_LIMIT - len("<b></b>")
-        chunks: list[str] = []
         current_content = header
-        for block in category_blocks:
+        has_chunks = False
+        async for block in ItemService._iter_category_blocks(summaries, header, language):
             if len(current_content + block) <= max_content_length:
                 current_content += block
                 continue
             if current_content != header:
-                chunks.append(ItemService._wrap_announcement_chunk(current_content))
+                yield ItemService._wrap_announcement_chunk(current_content)
+                has_chunks = True
             current_content = header + block
-        if current_content == header and chunks:
-            return chunks
-        chunks.append(ItemService._wrap_announcement_chunk(current_content))
-        return chunks
+        if current_content != header or not has_chunks:
+            yield ItemService._wrap_announcement_chunk(current_content)
 
     @staticmethod
-    async def create_announcement_message(announcement_type: AnnouncementType,
-                                          session: AsyncSession,
-                                          language: Language) -> list[str]:
-        if announcement_type == AnnouncementType.CURRENT_STOCK:
-            items = await ItemRepository.get_in_stock(session)
-            header = get_text(language, BotEntity.ADMIN, "current_stock_header")
-        else:
-            items = await ItemRepository.get_new(session)
-            header = get_text(language, BotEntity.ADMIN, "restocking_message_header")
-        filtered_items = {}
-        category_map = {
-            category.id: category
-            for category in await CategoryRepository.get_by_ids(
-                [item.category_id for item in items],
-                session
-            )
-        }
-        subcategory_map = {
-            subcategory.id: subcategory
-            for subcategory in await SubcategoryRepository.get_by_ids(
-                [item.subcategory_id for item in items],
-                session
-            )
-        }
-        for item in items:
-            category = category_map[item.category_id]
-            subcategory = subcategory_map[item.subcategory_id]
-            if category.name not in filtered_items:
-                filtered_items[category.name] = {}
-            if subcategory.name not in filtered_items[category.name]:
-                filtered_items[category.name][subcategory.name] = []
-            filtered_items[category.name][subcategory.name].append(item)
-        category_blocks = []
-        for category, subcategory_item_dict in filtered_items.items():
-            category_header = get_text(language, BotEntity.ADMIN, "restocking_message_category").format(
-                category=category
-            )
-            subcategory_lines = []
-            for subcategory, item in subcategory_item_dict.items():
-                subcategory_lines.append(get_text(language, BotEntity.USER, "subcategory_button").format(
-                    subcategory_name=subcategory,
-                    available_quantity=len(item),
-                    subcategory_price=item[0].price,
-                    currency_sym=config.CURRENCY.get_localized_symbol()) + "\n")
-            category_blocks.extend(
-                ItemService._split_category_into_blocks(header, category_header, subcategory_lines)
-            )
-        return ItemService._build_announcement_chunks(header, category_blocks)
+    def _iter_json_array(file: TextIO) -> Iterator[dict]:
+        decoder = JSONDecoder()
+        buffer = file.read(ItemService.IMPORT_READ_SIZE).lstrip()
+        if not buffer.startswith('['):
+            raise ValueError("JSON file must contain an array of items")
+        position = 1
+        while True:
+            # The buffer is only sliced when it's refilled, so each item costs its own length
+            position = ItemService.JSON_SEPARATOR.match(buffer, position).end()
+            if buffer.startswith(']', position):
+                return
+            try:
+                item, position = decoder.raw_decode(buffer, position)
+            except JSONDecodeError:
+                chunk = file.read(ItemService.IMPORT_READ_SIZE)
+                if not chunk:
+                    raise
+                buffer = buffer[position:] + chunk
+                position = 0
+                continue
+            yield item
 
     @staticmethod
-    async def parse_items_json(path_to_file: str, session: AsyncSession | Session):
+    def parse_items_json(path_to_file: str) -> Iterator[tuple[ItemType, str, str, str, float, str | None]]:
         with open(path_to_file, 'r', encoding='utf-8') as file:
-            items = load(file)
-            items_list = []
-            for item in items:
+            for item in ItemService._iter_json_array(file):
                 item_type = ItemType(item['item_type'].upper())
-                category = await CategoryRepository.get_or_create(item['category'], session)
-                subcategory = await SubcategoryRepository.get_or_create(item['subcategory'], session)
-                item.pop('item_type')
-                item.pop('category')
-                item.pop('subcategory')
-                if item_type == ItemType.PHYSICAL:
-                    item.pop('private_data')
-                items_list.append(ItemDTO(
-                    item_type=item_type,
-                    category_id=category.id,
-                    subcategory_id=subcategory.id,
-                    **item
-                ))
-            return items_list
+                private_data = item.get('private_data') if item_type == ItemType.DIGITAL else None
+                yield (item_type, item['category'], item['subcategory'], item['description'],
+                       float(item['price']), private_data)
 
     @staticmethod
-    async def parse_items_txt(path_to_file: str, session: AsyncSession | Session):
+    def parse_items_txt(path_to_file: str) -> Iterator[tuple[ItemType, str, str, str, float, str | None]]:
         with open(path_to_file, 'r', encoding='utf-8') as file:
-            lines = file.readlines()
-            items_list = []
-            for line in lines:
+            for line in file:
+                line = line.rstrip('\r\n')
+                if not line:
+                    continue
                 item_type, category_name, subcategory_name, description, price, private_data = line.split(';')
                 item_type = ItemType(item_type.upper())
                 if item_type == ItemType.PHYSICAL:
                     private_data = None
+                yield item_type, category_name, subcategory_name, description, float(price), private_data
+
+    @staticmethod
+    async def _import_chunk(rows: list[tuple[ItemType, str, str, str, float, str | None]],
+                            category_ids: dict[str, int],
+                            subcategory_ids: dict[str, int],
+                            stock_rows: dict[tuple[ItemType, int, int], dict],
+                            session: AsyncSession):
+        items = []
+        for item_type, category_name, subcategory_name, description, price, private_data in rows:
+            if category_name not in category_ids:
                 category = await CategoryRepository.get_or_create(category_name, session)
+                category_ids[category_name] = category.id
+            if subcategory_name not in subcategory_ids:
                 subcategory = await SubcategoryRepository.get_or_create(subcategory_name, session)
-                items_list.append(ItemDTO(
-                    item_type=item_type,
-                    category_id=category.id,
-                    subcategory_id=subcategory.id,
-                    price=float(price),
-                    description=description,
-                    private_data=private_data
-                ))
-            return items_list
+                subcategory_ids[subcategory_name] = subcategory.id
+            items.append(ItemDTO(
+                item_type=item_type,
+                category_id=category_ids[category_name],
+                subcategory_id=subcategory_ids[subcategory_name],
+                price=price,
+                description=description,
+                private_data=private_data
+            ))
+        await ItemRepository.copy_many(items, session)
+        ItemStockRepository.collect(items, stock_rows)
 
     @staticmethod
     async def add_items(path_to_file: str,
                         add_type: AddType,
-                        session: AsyncSession | Session,
-                        language: Language) -> str:
+                        session: AsyncSession,
+                        language: Language,
+                        progress_callback: Callable[[int], Awaitable[None]] | None = None) -> str:
         try:
-            items = []
             if add_type == AddType.JSON:
-                items += await ItemService.parse_items_json(path_to_file, session)
+                rows = ItemService.parse_items_json(path_to_file)
             else:
-                items += await ItemService.parse_items_txt(path_to_file, session)
-            await ItemRepository.add_many(items, session)
+                rows = ItemService.parse_items_txt(path_to_file)
+            category_ids: dict[str, int] = {}
+            subcategory_ids: dict[str, int] = {}
+            stock_rows: dict[tuple[ItemType, int, int], dict] = {}
+            imported = 0
+            for chunk in batched(rows, ItemService.IMPORT_CHUNK_SIZE):
+                await ItemService._import_chunk(list(chunk), category_ids, subcategory_ids, stock_rows, session)
+                imported += len(chunk)
+                if progress_callback is not None:
+                    await progress_callback(imported)
+            # Stock rows are locked only from here to the commit, not for the whole COPY
+            await ItemStockRepository.upsert(stock_rows, session)
             await session_commit(session)
-            return get_text(language, BotEntity.ADMIN, "add_items_success").format(adding_result=len(items))
+            return get_text(language, BotEntity.ADMIN, "add_items_success").format(adding_result=imported)
         except Exception as e:
+            await session.rollback()
             return get_text(language, BotEntity.ADMIN, "add_items_err").format(adding_result=e)
         finally:
             Path(path_to_file).unlink(missing_ok=True)
@@ -0,0 +1,60 @@
+import asyncio
+import logging
+
+from db import get_db_session
+from models.ledger import LedgerReplayDTO
+from repositories.ledger import LedgerRepository
+
+
+class LedgerService:
+    VERIFICATION_TASKS: set[asyncio.Task] = set()
+
+    @staticmethod
+    async def verify_balances() -> LedgerReplayDTO:
+        """
+        Replays the ledger per user in id order. Reports entries whose balance_after breaks the running sum,
+        and users whose cached totals drifted from the ledger.
+        """
+        async with get_db_session() as session:
+            ledger_replay = LedgerReplayDTO(
+                mismatches=await LedgerRepository.get_replay_mismatches(session),
+                chain_breaks=await LedgerRepository.get_chain_breaks(session)
+            )
+        for mismatch in ledger_replay.mismatches:
+            logging.error(
+                "Balance of user %s does not match the ledger: top_up_amount=%s/%s consume_records=%s/%s",
+                mismatch.user_id,
+                mismatch.top_up_amount, mismatch.ledger_credit,
+                mismatch.consume_records, mismatch.ledger_debit
+            )
+        for chain_break in ledger_replay.chain_breaks:
+            logging.error(
+                "Ledger entry %s of user %s has balance_after=%s but the replayed balance is %s",
+                chain_break.ledger_entry_id, chain_break.user_id,
+                chain_break.balance_after, chain_break.replayed_balance
+            )
+        return ledger_replay
+
+    @staticmethod
+    async def _verify_balances_safely():
+        try:
+            await LedgerService.verify_balances()
+        except Exception as exception:
+            logging.error(f"Ledger verification failed: {exception}")
+
+    @staticmethod
+    def start_verification() -> asyncio.Task:
+        """
+        Runs the replay in the background, so a growing ledger never delays startup.
+        """
+        task = asyncio.create_task(LedgerService._verify_balances_safely())
+        LedgerService.VERIFICATION_TASKS.add(task)
+        task.add_done_callback(LedgerService.VERIFICATION_TASKS.discard)
+        return task
+
+    @staticmethod
+    async def stop_verification():
+        verification_tasks = list(LedgerService.VERIFICATION_TASKS)
+        for verification_task in verification_tasks:
+            verification_task.cancel()
+        await asyncio.gather(*verification_tasks, return_exceptions=True)
@@ -1,48 +1,66 @@
-import asyncio
 import logging
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable
 
 from aiogram import Bot
-from aiogram.exceptions import TelegramForbiddenError, TelegramUnauthorizedError
+from aiogram.exceptions import TelegramForbiddenError, TelegramRetryAfter, TelegramUnauthorizedError
+from aiogram.utils.token import extract_bot_id
 from redis.asyncio import Redis
 
 import config
-from utils.telegram import create_bot
+from models.user import UserBotDTO
+from utils.rate_limiter import TokenBucket
+from utils.telegram import get_bot, release_bot
 
 
 class MultibotService:
     TOKENS_REDIS_KEY = "multibot:tokens"
-    SEND_DELAY_SECONDS = 0.3
+    USER_BOTS_REDIS_KEY = "multibot:user_bots"
+    MESSAGES_PER_SECOND_PER_BOT = 30
+    RATE_LIMITERS: dict[str, TokenBucket] = {}
+    KNOWN_USER_BOTS_LIMIT = 10000
+    KNOWN_USER_BOTS: OrderedDict[int, int] = OrderedDict()
+    _redis_client: Redis | None = None
 
     @staticmethod
-    def _build_redis_client() -> Redis:
-        return Redis(host=config.REDIS_HOST, password=config.REDIS_PASSWORD)
+    def set_redis_client(redis_client: Redis) -> None:
+        """
+        Shares the bot's Redis client, it must be set before tokens or user bots are read.
+        """
+        MultibotService._redis_client = redis_client
 
     @staticmethod
-    async def _get_redis_client(redis_client: Redis | None = None) -> tuple[Redis, bool]:
+    def _get_redis_client(redis_client: Redis | None = None) -> Redis:
         if redis_client is not None:
-            return redis_client, False
-        return MultibotService._build_redis_client(), True
+            return redis_client
+        if MultibotService._redis_client is None:
+            raise RuntimeError("MultibotService Redis client is not set")
+        return MultibotService._redis_client
 
     @staticmethod
-    async def _close_redis_client(redis_client: Redis, should_close: bool) -> None:
-        if should_close:
-            await redis_client.close()
+    def build_bot(token: str) -> Bot:
+        return get_bot(token)
 
     @staticmethod
-    def build_bot(token: str) -> Bot:
-        return create_bot(token)
+    def get_bot(token: str) -> Bot:
+        if token not in MultibotService.RATE_LIMITERS:
+            MultibotService.RATE_LIMITERS[token] = TokenBucket(MultibotService.MESSAGES_PER_SECOND_PER_BOT,
+                                                               MultibotService.MESSAGES_PER_SECOND_PER_BOT)
+        return MultibotService.build_bot(token)
+
+    @staticmethod
+    def discard_bot(token: str) -> None:
+        MultibotService.RATE_LIMITERS.pop(token, None)
+        release_bot(token)
 
     @staticmethod
     async def get_child_tokens(redis_client: Redis | None = None) -> list[str]:
-        redis_client, should_close = await MultibotService._get_redis_client(redis_client)
-        try:
-            tokens = await redis_client.smembers(MultibotService.TOKENS_REDIS_KEY)
-            return sorted(
-                token.decode() if isinstance(token, bytes) else token
-                for token in tokens
-            )
-        finally:
-            await MultibotService._close_redis_client(redis_client, should_close)
+        tokens = await MultibotService._get_redis_client(redis_client).smembers(MultibotService.TOKENS_REDIS_KEY)
+        return sorted(
+            token.decode() if isinstance(token, bytes) else token
+            for token in tokens
+        )
 
     @staticmethod
     async def get_all_tokens_with_main(redis_client: Redis | None = None) -> list[str]:
@@ -55,38 +73,28 @@ class MultibotService:
     async def has_token(token: str, redis_client: Redis | None = None) -> bool:
         if token == config.TOKEN:
             return True
-        redis_client, should_close = await MultibotService._get_redis_client(redis_client)
-        try:
-            return bool(await redis_client.sismember(MultibotService.TOKENS_REDIS_KEY, token))
-        finally:
-            await MultibotService._close_redis_client(redis_client, should_close)
+        redis_client = MultibotService._get_redis_client(redis_client)
+        return bool(await redis_client.sismember(MultibotService.TOKENS_REDIS_KEY, token))
 
     @staticmethod
     async def add_token(token: str, redis_client: Redis | None = None) -> bool:
         if token == config.TOKEN:
             return False
-        redis_client, should_close = await MultibotService._get_redis_client(redis_client)
-        try:
-            added = await redis_client.sadd(MultibotService.TOKENS_REDIS_KEY, token)
-            return bool(added)
-        finally:
-            await MultibotService._close_redis_client(redis_client, should_close)
+        added = await MultibotService._get_redis_client(redis_client).sadd(MultibotService.TOKENS_REDIS_KEY, token)
+        return bool(added)
 
     @staticmethod
     async def remove_token(token: str, redis_client: Redis | None = None) -> None:
         if token == config.TOKEN:
             return
-        redis_client, should_close = await MultibotService._get_redis_client(redis_client)
-        try:
-            await redis_client.srem(MultibotService.TOKENS_REDIS_KEY, token)
-        finally:
-            await MultibotService._close_redis_client(redis_client, should_close)
+        await MultibotService._get_redis_client(redis_client).srem(MultibotService.TOKENS_REDIS_KEY, token)
+        MultibotService.discard_bot(token)
 
     @staticmethod
     async def restore_child_bot_webhooks(webhook_url_template: str,
                                          redis_client: Redis | None = None) -> None:
         for token in await MultibotService.get_child_tokens(redis_client):
-            bot = MultibotService.build_bot(token)
+            bot = MultibotService.get_bot(token)
             try:
                 await bot.get_me()
                 await bot.set_webhook(webhook_url_template.format(bot_token=token))
@@ -95,49 +103,140 @@ class MultibotService:
                 await MultibotService.remove_token(token, redis_client)
             except Exception as exception:
                 logging.error(exception)
-            finally:
-                await bot.session.close()
 
     @staticmethod
-    async def send_message_to_user_verbose(text: str,
-                                           telegram_id: int,
-                                           reply_markup=None,
-                                           redis_client: Redis | None = None) -> tuple[int, bool]:
-        success_count = 0
-        had_only_forbidden_errors = True
+    async def record_user_bot(telegram_id: int, bot_id: int, redis_client: Redis | None = None) -> None:
+        user_bot = UserBotDTO(bot_id=bot_id, last_seen=datetime.now(timezone.utc))
+        try:
+            await MultibotService._get_redis_client(redis_client).hset(MultibotService.USER_BOTS_REDIS_KEY,
+                                                                       str(telegram_id),
+                                                                       user_bot.model_dump_json())
+        except Exception as exception:
+            logging.warning(f"Multibot user bot write failed for {telegram_id}: {exception}")
+            return
+        MultibotService._remember_user_bot(telegram_id, bot_id)
+
+    @staticmethod
+    def _remember_user_bot(telegram_id: int, bot_id: int) -> None:
+        MultibotService.KNOWN_USER_BOTS[telegram_id] = bot_id
+        MultibotService.KNOWN_USER_BOTS.move_to_end(telegram_id)
+        if len(MultibotService.KNOWN_USER_BOTS) > MultibotService.KNOWN_USER_BOTS_LIMIT:
+            MultibotService.KNOWN_USER_BOTS.popitem(last=False)
+
+    @staticmethod
+    async def record_user_bot_if_changed(telegram_id: int, bot_id: int, redis_client: Redis | None = None) -> None:
+        """
+        Skips the write while the user keeps talking to the same bot, the last known bot is checked
+        in process first and in Redis only on a miss.
+        """
+        known_bot_id = MultibotService.KNOWN_USER_BOTS.get(telegram_id)
+        if known_bot_id is None:
+            user_bot = await MultibotService.get_user_bot(telegram_id, redis_client)
+            known_bot_id = user_bot.bot_id if user_bot is not None else None
+        if known_bot_id == bot_id:
+            MultibotService._remember_user_bot(telegram_id, bot_id)
+            return
+        await MultibotService.record_user_bot(telegram_id, bot_id, redis_client)
+
+    @staticmethod
+    async def get_user_bot(telegram_id: int, redis_client: Redis | None = None) -> UserBotDTO | None:
+        try:
+            user_bot = await MultibotService._get_redis_client(redis_client).hget(MultibotService.USER_BOTS_REDIS_KEY,
+                                                                                  str(telegram_id))
+        except Exception as exception:
+            logging.warning(f"Multibot user bot lookup failed for {telegram_id}: {exception}")
+            return None
+        if user_bot is None:
+            return None
+        return UserBotDTO.model_validate_json(user_bot)
+
+    @staticmethod
+    async def _get_delivery_tokens(telegram_id: int, redis_client: Redis) -> tuple[list[str], str | None]:
         tokens = await MultibotService.get_all_tokens_with_main(redis_client)
-        for index, token in enumerate(tokens):
-            bot = MultibotService.build_bot(token)
+        user_bot = await MultibotService.get_user_bot(telegram_id, redis_client)
+        user_token = None
+        if user_bot is not None:
+            user_token = next((token for token in tokens if extract_bot_id(token) == user_bot.bot_id), None)
+        if user_token is not None:
+            tokens.remove(user_token)
+            tokens.insert(0, user_token)
+        for token in tokens:
+            MultibotService.get_bot(token)
+        # Bots waiting out a flood limit go last, the stable sort keeps the user's bot first otherwise.
+        tokens.sort(key=lambda token: MultibotService.RATE_LIMITERS[token].paused)
+        return tokens, user_token
+
+    @staticmethod
+    async def _deliver(telegram_id: int,
+                       send: Callable[[Bot], Awaitable[Any]],
+                       operation_name: str,
+                       redis_client: Redis | None = None) -> tuple[int, bool]:
+        """
+        Sends through the first bot able to reach the user, starting with the bot they last talked to.
+        Returns the number of delivered messages and whether every bot failed with TelegramForbiddenError.
+        When no bot delivered but some were only flood limited, re-raises the shortest TelegramRetryAfter,
+        so callers retry instead of counting the user as unreachable.
+        """
+        redis_client = MultibotService._get_redis_client(redis_client)
+        tokens, user_token = await MultibotService._get_delivery_tokens(telegram_id, redis_client)
+        had_only_forbidden_errors = True
+        retry_after_exception = None
+        for token in tokens:
+            bot = MultibotService.get_bot(token)
+            await MultibotService.RATE_LIMITERS[token].acquire()
             try:
-                await bot.send_message(telegram_id, text, reply_markup=reply_markup)
-                success_count += 1
-                had_only_forbidden_errors = False
+                await send(bot)
             except TelegramForbiddenError as exception:
                 logging.error(f"TelegramForbiddenError: {exception.message}")
+                continue
+            except TelegramRetryAfter as exception:
+                logging.warning(f"Bot is rate limited during {operation_name}, retrying after {exception.retry_after}s")
+                MultibotService.RATE_LIMITERS[token].pause(exception.retry_after)
+                had_only_forbidden_errors = False
+                if retry_after_exception is None or exception.retry_after < retry_after_exception.retry_after:
+                    retry_after_exception = exception
+                continue
             except TelegramUnauthorizedError:
-                logging.warning("Removing unauthorized child bot token during send_message_to_user")
+                logging.warning(f"Removing unauthorized child bot token during {operation_name}")
                 await MultibotService.remove_token(token, redis_client)
                 had_only_forbidden_errors = False
+                continue
             except Exception as exception:
                 logging.error(exception)
                 had_only_forbidden_errors = False
-            finally:
-                await bot.session.close()
-            if index < len(tokens) - 1:
-                await asyncio.sleep(MultibotService.SEND_DELAY_SECONDS)
-        return success_count, had_only_forbidden_errors
+                continue
+            if token != user_token:
+                await MultibotService.record_user_bot(telegram_id, extract_bot_id(token), redis_client)
+            return 1, False
+        if retry_after_exception is not None:
+            raise retry_after_exception
+        return 0, had_only_forbidden_errors
+
+    @staticmethod
+    async def send_message_to_user_verbose(text: str,
+                                           telegram_id: int,
+                                           reply_markup=None,
+                                           redis_client: Redis | None = None) -> tuple[int, bool]:
+        async def send(bot: Bot):
+            await bot.send_message(telegram_id, text, reply_markup=reply_markup)
+
+        return await MultibotService._deliver(telegram_id, send, "send_message_to_user", redis_client)
 
     @staticmethod
     async def send_message_to_user(text: str,
                                    telegram_id: int,
                                    reply_markup=None,
                                    redis_client: Redis | None = None) -> int:
-        success_count, _ = await MultibotService.send_message_to_user_verbose(
-            text=text,
-            telegram_id=telegram_id,
-            reply_markup=reply_markup,
-            redis_client=redis_client
-        )
+        try:
+            success_count, _ = await MultibotService.send_message_to_user_verbose(
+                text=text,
+                telegram_id=telegram_id,
+                reply_markup=reply_markup,
+                redis_client=redis_client
+            )
+        except TelegramRetryAfter as exception:
+            logging.error(f"Every bot is rate limited, message to {telegram_id} is dropped: {exception.message}")
+            return 0
         return success_count
 
     @staticmethod
@@ -145,30 +244,11 @@ class MultibotService:
                                    message_id: int,
                                    telegram_id: int,
                                    redis_client: Redis | None = None) -> tuple[int, bool]:
-        success_count = 0
-        had_only_forbidden_errors = True
-        tokens = await MultibotService.get_all_tokens_with_main(redis_client)
-        for index, token in enumerate(tokens):
-            bot = MultibotService.build_bot(token)
-            try:
-                await bot.copy_message(
-                    chat_id=telegram_id,
-                    from_chat_id=from_chat_id,
-                    message_id=message_id
-                )
-                success_count += 1
-                had_only_forbidden_errors = False
-            except TelegramForbiddenError as exception:
-                logging.error(f"TelegramForbiddenError: {exception.message}")
-            except TelegramUnauthorizedError:
-                logging.warning("Removing unauthorized child bot token during copy_message_to_user")
-                await MultibotService.remove_token(token, redis_client)
-                had_only_forbidden_errors = False
-            except Exception as exception:
-                logging.error(exception)
-                had_only_forbidden_errors = False
-            finally:
-                await bot.session.close()
-            if index < len(tokens) - 1:
-                await asyncio.sleep(MultibotService.SEND_DELAY_SECONDS)
-        return success_count, had_only_forbidden_errors
+        async def send(bot: Bot):
+            await bot.copy_message(
+                chat_id=telegram_id,
+                from_chat_id=from_chat_id,
+                message_id=message_id
+            )
+
+        return await MultibotService._deliver(telegram_id, send, "copy_message_to_user", redis_client)
@@ -1,3 +1,4 @@
+import asyncio
 import logging
 import traceback
 from datetime import datetime, timezone
@@ -7,25 +8,28 @@ from aiogram.types import InlineKeyboardMarkup, BufferedInputFile, Message, Inpu
     InputMediaAnimation, InlineKeyboardButton
 from aiogram.utils.keyboard import InlineKeyboardBuilder
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import Session
 import config
 from callbacks import MyProfileCallback, ReviewManagementCallback
 from config import ADMIN_ID_LIST, TOKEN
+from db import get_db_session, session_commit
 from enums.bot_entity import BotEntity
 from enums.cryptocurrency import Cryptocurrency
 from enums.language import Language
+from enums.outbox_event_type import OutboxEventType
 from enums.user_role import UserRole
 from models.buy import RefundDTO, BuyDTO
+from models.outbox import AdminNotificationPayloadDTO
 from models.payment import ProcessingPaymentDTO, TablePaymentDTO
 from models.referral import ReferralBonusDTO
 from models.review import ReviewDTO
 from models.user import UserDTO
 from models.withdrawal import WithdrawalDTO
 from services.multibot import MultibotService
-from utils.telegram import create_bot
+from utils.telegram import get_bot
 from repositories.buyItem import BuyItemRepository
 from repositories.category import CategoryRepository
 from repositories.item import ItemRepository
+from repositories.outbox import OutboxRepository
 from repositories.subcategory import SubcategoryRepository
 from utils.utils import get_text
 
@@ -44,7 +48,7 @@ class NotificationService:
     async def get_preferred_user_link(user_dto: UserDTO) -> str | None:
         if user_dto.telegram_id is None:
             return NotificationService.get_username_link(user_dto)
-        bot = create_bot(TOKEN)
+        bot = get_bot(TOKEN)
         try:
             chat = await bot.get_chat(user_dto.telegram_id)
             if chat.has_private_forwards is not True:
@@ -55,8 +59,6 @@ class NotificationService:
                 user_dto.telegram_id,
                 exception
             )
-        finally:
-            await bot.session.close()
         return NotificationService.get_username_link(user_dto)
 
     @staticmethod
@@ -119,59 +121,86 @@ class NotificationService:
         await NotificationService.add_user_button(kb_builder, user_dto)
         return kb_builder.as_markup() if list(kb_builder.buttons) else None
 
+    @staticmethod
+    async def send_to_admin(admin_id: int,
+                            message: str | BufferedInputFile,
+                            reply_markup: types.InlineKeyboardMarkup | None):
+        bot = get_bot(TOKEN)
+        if isinstance(message, str):
+            async def _send(current_markup):
+                return await bot.send_message(admin_id, f"<b>{message}</b>", reply_markup=current_markup)
+        else:
+            async def _send(current_markup):
+                return await bot.send_document(admin_id, message, reply_markup=current_markup)
+        await NotificationService._execute_with_privacy_fallback(
+            operation_name="send_to_admins",
+            execute=_send,
+            reply_markup=reply_markup,
+            chat_id=admin_id
+        )
+
+    @staticmethod
+    async def _send_to_admin_safely(admin_id: int,
+                                    message: str | BufferedInputFile,
+                                    reply_markup: types.InlineKeyboardMarkup | None):
+        try:
+            await NotificationService.send_to_admin(admin_id, message, reply_markup)
+        except Exception as e:
+            logging.error(e)
+
+    @staticmethod
+    async def _enqueue_for_admins(message: str, reply_markup: types.InlineKeyboardMarkup | None):
+        # Imported here because services.outbox imports this module to handle the events
+        from services.outbox import OutboxService
+
+        async with get_db_session() as session:
+            for admin_id in ADMIN_ID_LIST:
+                payload = AdminNotificationPayloadDTO(admin_id=admin_id, message=message, reply_markup=reply_markup)
+                await OutboxRepository.add(OutboxEventType.ADMIN_NOTIFICATION, payload, session)
+            await session_commit(session)
+        OutboxService.wake_up()
+
     @staticmethod
     async def send_to_admins(message: str | BufferedInputFile, reply_markup: types.InlineKeyboardMarkup | None):
-        bot = create_bot(TOKEN)
-        for admin_id in ADMIN_ID_LIST:
+        """
+        In background mode text notifications become one outbox event per admin, so they survive restarts
+        and are retried per admin. Files and failed enqueues are sent right away.
+        """
+        if config.ADMIN_NOTIFICATIONS_IN_BACKGROUND and isinstance(message, str):
             try:
-                if isinstance(message, str):
-                    async def _send(current_markup):
-                        return await bot.send_message(admin_id, f"<b>{message}</b>", reply_markup=current_markup)
-                else:
-                    async def _send(current_markup):
-                        return await bot.send_document(admin_id, message, reply_markup=current_markup)
-                await NotificationService._execute_with_privacy_fallback(
-                    operation_name="send_to_admins",
-                    execute=_send,
-                    reply_markup=reply_markup,
-                    chat_id=admin_id
-                )
+                await NotificationService._enqueue_for_admins(message, reply_markup)
+                return
             except Exception as e:
-                logging.error(e)
-        await bot.session.close()
+                logging.error(f"Admin notification could not be queued, sending it now: {e}")
+        await asyncio.gather(*[NotificationService._send_to_admin_safely(admin_id, message, reply_markup)
+                               for admin_id in ADMIN_ID_LIST])
 
     @staticmethod
     async def send_to_user(message: str, telegram_id: int, reply_markup: types.InlineKeyboardMarkup | None = None):
         if config.MULTIBOT:
             await MultibotService.send_message_to_user(message, telegram_id, reply_markup=reply_markup)
             return
-        bot = create_bot(TOKEN)
+        bot = get_bot(TOKEN)
         try:
             await bot.send_message(telegram_id, message, reply_markup=reply_markup)
         except Exception as e:
             logging.error(e)
-        finally:
-            await bot.session.close()
 
     @staticmethod
     async def edit_message(message: str, source_message_id: int, chat_id: int):
-        bot = create_bot(TOKEN)
+        bot = get_bot(TOKEN)
         try:
             await bot.edit_message_text(text=message, chat_id=chat_id, message_id=source_message_id)
         except Exception as e:
             logging.error(e)
-        finally:
-            await bot.session.close()
 
     @staticmethod
     async def edit_caption(caption: str, source_message_id: int, chat_id: int):
-        bot = create_bot(TOKEN)
+        bot = get_bot(TOKEN)
         try:
             await bot.edit_message_caption(caption=caption, chat_id=chat_id, message_id=source_message_id)
         except Exception as e:
             logging.error(e)
-        finally:
-            await bot.session.close()
 
     @staticmethod
     async def payment_expired(user_dto: UserDTO, payment_dto: ProcessingPaymentDTO, table_payment_dto: TablePaymentDTO):
@@ -259,7 +288,7 @@ class NotificationService:
         await NotificationService.send_to_admins(message, admin_kb_markup)
 
     @staticmethod
-    async def new_buy(buy: BuyDTO, user: UserDTO, session: AsyncSession | Session):
+    async def new_buy(buy: BuyDTO, user: UserDTO, session: AsyncSession):
         admin_kb_markup = await NotificationService.make_user_button(user)
         admin_kb_builder = InlineKeyboardBuilder()
         if admin_kb_markup:
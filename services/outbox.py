@@ -0,0 +1,134 @@
+import asyncio
+import logging
+import time
+from datetime import datetime, timezone
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from crypto_api.CryptoApiWrapper import CryptoApiWrapper
+from db import get_db_session, session_commit
+from enums.outbox_event_type import OutboxEventType
+from models.outbox import OutboxEventDTO, NewDepositPayloadDTO, NewBuyPayloadDTO, CryptoWithdrawalPayloadDTO, \
+    AdminNotificationPayloadDTO
+from models.payment import ProcessingPaymentDTO
+from models.withdrawal import WithdrawalDTO
+from repositories.outbox import OutboxRepository
+from services.notification import NotificationService
+from services.payment import PaymentService
+from utils.metrics import metrics
+
+
+class OutboxService:
+    POLL_SECONDS = 5
+    MAX_ATTEMPTS = 5
+    RETRY_BASE_SECONDS = 10
+    MAX_RETRY_SECONDS = 600
+    # Losing a payment event loses the deposit, so these are retried until they succeed
+    RETRY_FOREVER_EVENT_TYPES = (OutboxEventType.PAYMENT_EVENT,)
+    # Repeating these has external side effects, so they're committed as in flight first and never retried
+    AT_MOST_ONCE_EVENT_TYPES = (OutboxEventType.CRYPTO_WITHDRAWAL,)
+    WORKERS = 4
+    DISPATCHER_TASKS: list[asyncio.Task] = []
+    _wake_up_event = asyncio.Event()
+
+    @staticmethod
+    async def _handle(outbox_event: OutboxEventDTO, session: AsyncSession):
+        if outbox_event.event_type == OutboxEventType.PAYMENT_EVENT:
+            await PaymentService.process_event(ProcessingPaymentDTO.model_validate(outbox_event.payload), session)
+        elif outbox_event.event_type == OutboxEventType.NEW_DEPOSIT:
+            payload = NewDepositPayloadDTO.model_validate(outbox_event.payload)
+            await NotificationService.new_deposit(payload.payment, payload.user, payload.table_payment,
+                                                  payload.referral_bonus)
+        elif outbox_event.event_type == OutboxEventType.NEW_BUY:
+            payload = NewBuyPayloadDTO.model_validate(outbox_event.payload)
+            await NotificationService.new_buy(payload.buy, payload.user, session)
+        elif outbox_event.event_type == OutboxEventType.CRYPTO_WITHDRAWAL:
+            payload = CryptoWithdrawalPayloadDTO.model_validate(outbox_event.payload)
+            withdraw_dto = await CryptoApiWrapper.withdrawal(
+                payload.cryptocurrency,
+                payload.cryptocurrency.get_forwarding_address(),
+                False,
+                payload.payment_id,
+            )
+            # The admin notification is a separate event, so a failed send never repeats the withdrawal
+            await OutboxRepository.add(OutboxEventType.WITHDRAWAL_NOTIFICATION, withdraw_dto, session)
+        elif outbox_event.event_type == OutboxEventType.WITHDRAWAL_NOTIFICATION:
+            await NotificationService.withdrawal(WithdrawalDTO.model_validate(outbox_event.payload))
+        elif outbox_event.event_type == OutboxEventType.ADMIN_NOTIFICATION:
+            payload = AdminNotificationPayloadDTO.model_validate(outbox_event.payload)
+            await NotificationService.send_to_admin(payload.admin_id, payload.message, payload.reply_markup)
+
+    @staticmethod
+    async def dispatch_next() -> bool:
+        async with get_db_session() as session:
+            outbox_event = await OutboxRepository.get_next_due(session)
+            if outbox_event is None:
+                return False
+            is_at_most_once = outbox_event.event_type in OutboxService.AT_MOST_ONCE_EVENT_TYPES
+            if is_at_most_once:
+                # An IN_FLIGHT row is never claimed again, even if the process dies mid-call
+                await OutboxRepository.mark_in_flight(outbox_event.id, session)
+                await session_commit(session)
+            metric_prefix = f"outbox_{outbox_event.event_type.value.lower()}"
+            if outbox_event.created_at is not None:
+                metrics.observe(f"{metric_prefix}_wait_seconds",
+                                (datetime.now(timezone.utc) - outbox_event.created_at).total_seconds())
+            started_at = time.perf_counter()
+            try:
+                async with session.begin_nested():
+                    await OutboxService._handle(outbox_event, session)
+            except Exception as exception:
+                logging.exception(f"Outbox event {outbox_event.id} failed: {exception}")
+                attempts = outbox_event.attempts + 1
+                retry_in_seconds = None
+                if is_at_most_once:
+                    logging.error(f"Outbox event {outbox_event.id} ({outbox_event.event_type.value}) "
+                                  f"failed and is not retried, check its outcome manually")
+                elif (attempts < OutboxService.MAX_ATTEMPTS or
+                      outbox_event.event_type in OutboxService.RETRY_FOREVER_EVENT_TYPES):
+                    retry_in_seconds = min(OutboxService.RETRY_BASE_SECONDS * 2 ** min(attempts - 1, 16),
+                                           OutboxService.MAX_RETRY_SECONDS)
+                else:
+                    logging.error(f"Outbox event {outbox_event.id} ({outbox_event.event_type.value}) "
+                                  f"failed permanently after {attempts} attempts and needs manual attention")
+                await OutboxRepository.mark_failed(outbox_event.id, str(exception), retry_in_seconds, session)
+            else:
+                await OutboxRepository.mark_delivered(outbox_event.id, session)
+            await session_commit(session)
+            metrics.observe(f"{metric_prefix}_handle_seconds", time.perf_counter() - started_at)
+            return True
+
+    @staticmethod
+    def wake_up():
+        OutboxService._wake_up_event.set()
+
+    @staticmethod
+    async def run_dispatcher():
+        while True:
+            OutboxService._wake_up_event.clear()
+            try:
+                if await OutboxService.dispatch_next():
+                    continue
+            except Exception as exception:
+                logging.exception(exception)
+            try:
+                await asyncio.wait_for(OutboxService._wake_up_event.wait(), OutboxService.POLL_SECONDS)
+            except TimeoutError:
+                pass
+
+    @staticmethod
+    def start_dispatcher() -> list[asyncio.Task]:
+        """
+        Workers claim events with SKIP LOCKED, so several of them never handle the same event at once.
+        """
+        if not any(not dispatcher_task.done() for dispatcher_task in OutboxService.DISPATCHER_TASKS):
+            OutboxService.DISPATCHER_TASKS = [asyncio.create_task(OutboxService.run_dispatcher())
+                                              for _ in range(OutboxService.WORKERS)]
+        return OutboxService.DISPATCHER_TASKS
+
+    @staticmethod
+    async def stop_dispatcher():
+        for dispatcher_task in OutboxService.DISPATCHER_TASKS:
+            dispatcher_task.cancel()
+        await asyncio.gather(*OutboxService.DISPATCHER_TASKS, return_exceptions=True)
+        OutboxService.DISPATCHER_TASKS = []
@@ -15,11 +15,18 @@ from db import session_commit
 from enums.bot_entity import BotEntity
 from enums.cryptocurrency import Cryptocurrency
 from enums.language import Language
+from enums.outbox_event_type import OutboxEventType
 from enums.payment import PaymentType
 from handlers.user.constants import UserStates
+from models.deposit import DepositDTO
+from models.outbox import NewDepositPayloadDTO, CryptoWithdrawalPayloadDTO
 from models.payment import ProcessingPaymentDTO
+from repositories.deposit import DepositRepository
+from repositories.outbox import OutboxRepository
 from repositories.payment import PaymentRepository
 from repositories.user import UserRepository
+from services.notification import NotificationService
+from services.referral import ReferralService
 from utils.utils import get_text, get_bot_photo_id
 
 
@@ -170,3 +177,34 @@ class PaymentService:
             )
             qr_code_file = PaymentService.__create_qr_code(payment_dto)
             return InputMediaPhoto(media=qr_code_file, caption=caption), kb_builder
+
+    @staticmethod
+    async def process_event(payment_dto: ProcessingPaymentDTO, session: AsyncSession):
+        user = await PaymentRepository.get_user_by_payment_id(payment_dto.id, session)
+        if payment_dto.isPaid is True:
+            # Only the callback that flips is_paid credits the deposit, duplicates update no rows
+            table_payment_dto = await PaymentRepository.set_paid(payment_dto.id, session)
+            if table_payment_dto is None:
+                return
+            await DepositRepository.create(DepositDTO(
+                user_id=user.id,
+                network=payment_dto.cryptoCurrency,
+                amount=int(payment_dto.cryptoAmount * pow(10, payment_dto.cryptoCurrency.get_decimals())),
+                fiat_amount=payment_dto.fiatAmount,
+                deposit_datetime=datetime.now()
+            ), session)
+            referral_bonus_dto = await ReferralService.apply_referral_logic(payment_dto, user, session)
+            await OutboxRepository.add(OutboxEventType.NEW_DEPOSIT, NewDepositPayloadDTO(
+                payment=payment_dto,
+                user=user,
+                table_payment=table_payment_dto,
+                referral_bonus=referral_bonus_dto
+            ), session)
+            if config.CRYPTO_FORWARDING_MODE:
+                await OutboxRepository.add(OutboxEventType.CRYPTO_WITHDRAWAL, CryptoWithdrawalPayloadDTO(
+                    cryptocurrency=payment_dto.cryptoCurrency,
+                    payment_id=payment_dto.id
+                ), session)
+        elif payment_dto.isPaid is False:
+            table_payment_dto = await PaymentRepository.get_by_processing_payment_id(payment_dto.id, session)
+            await NotificationService.payment_expired(user, payment_dto, table_payment_dto)
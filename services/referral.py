@@ -9,6 +9,7 @@ import config
 from callbacks import MyProfileCallback
 from enums.bot_entity import BotEntity
 from enums.language import Language
+from enums.ledger_entry_type import LedgerEntryType
 from models.payment import ProcessingPaymentDTO
 from models.referral import ReferralBonusDTO
 from models.user import UserDTO
@@ -55,14 +56,17 @@ class ReferralService:
                 config.REFERRER_BONUS_CAP_PERCENT / 100)
         if referrer_bonus > referrer_bonus_cap:
             referrer_bonus = referrer_bonus_cap
-        referrer_user_dto.top_up_amount += referrer_bonus
-        await UserRepository.update(referrer_user_dto, session)
+        await UserRepository.apply_balance_delta(referrer_user_dto.id, referrer_bonus, 0.0,
+                                                 LedgerEntryType.REFERRER_BONUS, session)
 
     @staticmethod
     async def apply_referral_logic(payment_dto: ProcessingPaymentDTO,
                                    user_dto: UserDTO,
                                    session: AsyncSession) -> ReferralBonusDTO:
+        referral_code = user_dto.referral_code
         await ReferralService.create_referral_code(user_dto, session)
+        if user_dto.referral_code != referral_code:
+            await UserRepository.set_referral_code(user_dto.id, user_dto.referral_code, session)
 
         referral_bonus = 0
         referrer_bonus = 0
@@ -90,12 +94,16 @@ class ReferralService:
             referrer_bonus = min(raw_referrer_bonus, max(0, remaining_cap))
 
             if referrer_bonus > 0:
-                referrer_user_dto = await UserRepository.get_user_entity(user_dto.referred_by_user_id, session)
-                referrer_user_dto.top_up_amount += referrer_bonus
-                await UserRepository.update(referrer_user_dto, session)
-
-        user_dto.top_up_amount += payment_dto.fiatAmount + referral_bonus
-        await UserRepository.update(user_dto, session)
+                referrer_user_dto = await UserRepository.apply_balance_delta(user_dto.referred_by_user_id,
+                                                                             referrer_bonus, 0.0,
+                                                                             LedgerEntryType.REFERRER_BONUS,
+                                                                             session)
+
+        user_dto = await UserRepository.apply_balance_delta(user_dto.id, payment_dto.fiatAmount, 0.0,
+                                                            LedgerEntryType.DEPOSIT, session)
+        if referral_bonus > 0:
+            user_dto = await UserRepository.apply_balance_delta(user_dto.id, referral_bonus, 0.0,
+                                                                LedgerEntryType.REFERRAL_BONUS, session)
         referral_bonus_dto = ReferralBonusDTO(
             referral_user_id=user_dto.id,
             referral_user_dto=user_dto,
@@ -264,19 +264,20 @@ class ReviewService:
         reviews = await ReviewRepository.get_reviews_paginated(callback_data.page, session)
         kb_builder = InlineKeyboardBuilder()
         for review in reviews:
-            buyItem_dto = await BuyItemRepository.get_by_id(review.buyItem_id, session)
-            item_dto = await ItemRepository.get_by_id(buyItem_dto.item_ids[0], session)
-            subcategory_dto = await SubcategoryRepository.get_by_id(item_dto.subcategory_id, session)
-            kb_builder.button(
-                text=get_text(language, BotEntity.USER, "review_button").format(
-                    subcategory_name=subcategory_dto.name,
-                    price=len(buyItem_dto.item_ids) * item_dto.price,
+            if review.subcategory_name is None:
+                button_text = get_text(language, BotEntity.USER, "review_button_item_unavailable")
+            else:
+                button_text = get_text(language, BotEntity.USER, "review_button").format(
+                    subcategory_name=review.subcategory_name,
+                    price=review.total_price,
                     currency_sym=config.CURRENCY.get_localized_symbol()
-                ),
+                )
+            kb_builder.button(
+                text=button_text,
                 callback_data=callback_data.model_copy(update={
                     "level": callback_data.level + 1,
                     "review_id": review.id,
-                    "buy_id": buyItem_dto.buy_id,
+                    "buy_id": review.buy_id,
                     "buyItem_id": review.buyItem_id,
                     "page": callback_data.page
                 })
@@ -2,7 +2,6 @@ from aiogram.fsm.context import FSMContext
 from aiogram.types import InputMediaVideo, InputMediaAnimation, InputMediaPhoto
 from aiogram.utils.keyboard import InlineKeyboardBuilder
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import Session
 
 import config
 from callbacks import AllCategoriesCallback
@@ -37,14 +36,10 @@ class SubcategoryService:
                                                                          callback_data.category_id,
                                                                          callback_data.page, session)
         for item in items:
-            available_qty = await ItemRepository.get_available_qty(item_type=item.item_type,
-                                                                   category_id=item.category_id,
-                                                                   subcategory_id=item.subcategory_id,
-                                                                   session=session)
             kb_builder.button(text=get_text(language, BotEntity.USER, "subcategory_button").format(
                 subcategory_name=item.subcategory_name,
                 subcategory_price=item.price,
-                available_quantity=available_qty,
+                available_quantity=item.available_qty,
                 currency_sym=config.CURRENCY.get_localized_symbol()),
                 callback_data=AllCategoriesCallback.create(
                     level=callback_data.level + 1,
@@ -124,7 +119,7 @@ class SubcategoryService:
 
     @staticmethod
     async def get_add_to_cart_buttons(callback_data: AllCategoriesCallback,
-                                      session: AsyncSession | Session,
+                                      session: AsyncSession,
                                       language: Language) -> tuple[
         str, InlineKeyboardBuilder]:
         item = await ItemRepository.get_single(callback_data.item_type, callback_data.category_id,
@@ -4,7 +4,6 @@ from aiogram.fsm.context import FSMContext
 from aiogram.types import InputMediaPhoto, InputMediaVideo, InputMediaAnimation
 from aiogram.utils.keyboard import InlineKeyboardBuilder
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import Session
 
 import config
 from callbacks import MyProfileCallback, AdminMenuCallback
@@ -20,6 +19,7 @@ from models.user import User, UserDTO
 from repositories.button_media import ButtonMediaRepository
 from repositories.buy import BuyRepository
 from repositories.cart import CartRepository
+from repositories.ledger import LedgerRepository
 from repositories.user import UserRepository
 from services.media import MediaService
 from utils.utils import get_text
@@ -30,7 +30,7 @@ class UserService:
     @staticmethod
     async def create_if_not_exist(user_dto: UserDTO,
                                   referrer_code: str | None,
-                                  session: AsyncSession | Session) -> None:
+                                  session: AsyncSession) -> None:
         user = await UserRepository.get_by_tgid(user_dto.telegram_id, session)
         match user:
             case None:
@@ -52,7 +52,7 @@ class UserService:
                 await session_commit(session)
 
     @staticmethod
-    async def get(user_dto: UserDTO, session: AsyncSession | Session) -> User | None:
+    async def get(user_dto: UserDTO, session: AsyncSession) -> User | None:
         return await UserRepository.get_by_tgid(user_dto.telegram_id, session)
 
     @staticmethod
@@ -66,6 +66,8 @@ class UserService:
                           callback_data=MyProfileCallback.create(level=1))
         kb_builder.button(text=get_text(language, BotEntity.USER, "purchase_history_button"),
                           callback_data=MyProfileCallback.create(level=3))
+        kb_builder.button(text=get_text(language, BotEntity.USER, "balance_history_button"),
+                          callback_data=MyProfileCallback.create(level=8))
         kb_builder.button(text=get_text(Language.EN, BotEntity.USER, "referral_button"),
                           callback_data=MyProfileCallback.create(level=7))
         kb_builder.button(text=get_text(Language.EN, BotEntity.USER, "language"),
@@ -139,6 +141,30 @@ class UserService:
             caption = get_text(language, BotEntity.USER, "no_purchases")
         return caption, kb_builder
 
+    @staticmethod
+    async def get_balance_history(telegram_id: int,
+                                  callback_data: MyProfileCallback,
+                                  session: AsyncSession,
+                                  language: Language) -> tuple[str, InlineKeyboardBuilder]:
+        user = await UserRepository.get_by_tgid(telegram_id, session)
+        ledger_entries = await LedgerRepository.get_by_user_id(user.id, callback_data.page, session)
+        if ledger_entries:
+            msg = get_text(language, BotEntity.USER, "balance_history")
+            for ledger_entry in ledger_entries:
+                msg += "\n" + get_text(language, BotEntity.USER, "balance_history_entry").format(
+                    created_at=ledger_entry.created_at.strftime("%m/%d/%Y, %I:%M %p"),
+                    entry_type=ledger_entry.entry_type.get_localized(language),
+                    amount=ledger_entry.credit - ledger_entry.debit,
+                    balance_after=ledger_entry.balance_after,
+                    currency_sym=config.CURRENCY.get_localized_symbol())
+        else:
+            msg = get_text(language, BotEntity.USER, "no_balance_history")
+        kb_builder = InlineKeyboardBuilder()
+        kb_builder = await add_pagination_buttons(kb_builder, callback_data,
+                                                  LedgerRepository.get_max_page(user.id, session),
+                                                  callback_data.get_back_button(language, 0), language)
+        return msg, kb_builder
+
     @staticmethod
     async def edit_language(telegram_id: int,
                             callback_data: MyProfileCallback,
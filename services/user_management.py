@@ -9,6 +9,7 @@ from db import session_commit
 from enums.bot_entity import BotEntity
 from enums.entity_type import EntityType
 from enums.language import Language
+from enums.ledger_entry_type import LedgerEntryType
 from enums.sort_property import SortProperty
 from enums.user_management_operation import UserManagementOperation
 from handlers.admin.constants import AdminConstants, UserManagementStates
@@ -82,13 +83,11 @@ class UserManagementService:
             amount = float(message.text)
             assert (amount > 0)
             if operation == UserManagementOperation.ADD_BALANCE:
-                user.top_up_amount += float(message.text)
-                await UserRepository.update(user, session)
+                await UserRepository.apply_balance_delta(user.id, amount, 0.0, LedgerEntryType.ADMIN_CREDIT, session)
                 await session_commit(session)
                 msg = get_text(language, BotEntity.ADMIN, "credit_management_added_success")
             else:
-                user.consume_records += float(message.text)
-                await UserRepository.update(user, session)
+                await UserRepository.apply_balance_delta(user.id, 0.0, amount, LedgerEntryType.ADMIN_DEBIT, session)
                 await session_commit(session)
                 msg = get_text(language, BotEntity.ADMIN, "credit_management_reduced_success")
             await state.clear()
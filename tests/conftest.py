@@ -1,3 +1,4 @@
+import importlib
 import sys
 from types import ModuleType, SimpleNamespace
 from pathlib import Path
@@ -23,6 +24,7 @@ def _build_config_module() -> ModuleType:
     )
     config.PAGE_ENTRIES = 8
     config.WEBHOOK_URL = "https://example.com/"
+    config.WEBHOOK_PATH = "/"
     config.KRYPTO_EXPRESS_API_KEY = "test-api-key"
     config.KRYPTO_EXPRESS_API_URL = "https://kryptoexpress.pro/api"
     config.KRYPTO_EXPRESS_API_SECRET = "test-secret"
@@ -40,14 +42,24 @@ def _build_config_module() -> ModuleType:
     config.TOKEN = "token"
     config.MULTIBOT = False
     config.TELEGRAM_PROXY_URL = None
+    config.ADMIN_NOTIFICATIONS_IN_BACKGROUND = False
     config.REDIS_HOST = "localhost"
     config.REDIS_PASSWORD = "password"
+    config.USER_CACHE_TTL_SECONDS = 60
     config.CURRENCY = currency
     config.DB_USER = "postgres"
     config.DB_PASS = "postgres"
     config.DB_HOST = "localhost"
     config.DB_PORT = 5432
     config.DB_NAME = "test"
+    config.DB_ECHO = False
+    config.DB_POOL_SIZE = 5
+    config.DB_MAX_OVERFLOW = 10
+    config.DB_POOL_TIMEOUT = 30
+    config.DB_POOL_RECYCLE = 1800
+    config.DB_POOL_PRE_PING = True
+    config.DB_STATEMENT_CACHE_SIZE = 100
+    config.METRICS_TOKEN = None
     config.JWT_EXPIRE_MINUTES = 30
     config.JWT_SECRET_KEY = "secret"
     config.JWT_ALGORITHM = "HS256"
@@ -119,9 +131,21 @@ async def _noop_async(*args, **kwargs):
     return None
 
 
+def _add_after_commit_callback(session, callback):
+    session.info.setdefault("after_commit_callbacks", []).append(callback)
+
+
 db_module.session_execute = _noop_async
+db_module.session_stream = _noop_async
 db_module.session_flush = _noop_async
 db_module.session_commit = _noop_async
 db_module.get_db_session = _noop_async
 db_module.create_db_and_tables = _noop_async
+db_module.add_after_commit_callback = _add_after_commit_callback
 sys.modules.setdefault("db", db_module)
+
+# The real db module imports every model, which lets relationship() targets resolve in isolated test runs
+for model_module in ("item", "item_stock", "cart", "cartItem", "user", "buy", "buyItem", "category", "subcategory",
+                     "deposit", "button_media", "payment", "coupon", "shipping_option", "review", "referral",
+                     "broadcast", "outbox", "ledger"):
+    importlib.import_module(f"models.{model_module}")
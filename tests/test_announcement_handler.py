@@ -27,7 +27,8 @@ async def test_send_generated_msg_sends_first_chunk_with_keyboard_only(monkeypat
     callback = _FakeCallback()
 
     async def _fake_create_announcement_message(*args, **kwargs):
-        return ["chunk-1", "chunk-2", "chunk-3"]
+        for chunk in ["chunk-1", "chunk-2", "chunk-3"]:
+            yield chunk
 
     monkeypatch.setattr(
         "handlers.admin.announcement.ItemService.create_announcement_message",
@@ -0,0 +1,142 @@
+import asyncio
+
+import pytest
+from aiogram.exceptions import TelegramForbiddenError, TelegramRetryAfter
+from aiogram.methods import SendMessage
+
+from enums.delivery_status import DeliveryStatus
+from services.broadcast import BroadcastService
+
+
+async def _iter_recipients(telegram_ids):
+    for cursor, telegram_id in enumerate(telegram_ids, start=1):
+        await asyncio.sleep(0)
+        yield cursor, telegram_id
+
+
+@pytest.mark.asyncio
+async def test_broadcast_retries_after_flood_wait_and_batches_blocked_users(monkeypatch):
+    monkeypatch.setattr(BroadcastService, "BLOCKED_BATCH_SIZE", 2)
+    method = SendMessage(chat_id=1, text="text")
+    attempts = {}
+    blocked_batches = []
+
+    async def _send(telegram_id):
+        attempts[telegram_id] = attempts.get(telegram_id, 0) + 1
+        if telegram_id == 1 and attempts[telegram_id] == 1:
+            raise TelegramRetryAfter(method=method, message="Flood control exceeded", retry_after=0)
+        if telegram_id in (2, 3, 4):
+            raise TelegramForbiddenError(method=method, message="Forbidden: bot was blocked by the user")
+        if telegram_id == 5:
+            return DeliveryStatus.FAILED
+        return DeliveryStatus.SENT
+
+    async def _on_blocked(telegram_ids):
+        blocked_batches.append(sorted(telegram_ids))
+
+    async def _on_checkpoint(stats, cursor):
+        return True
+
+    stats = await BroadcastService.broadcast(_iter_recipients(range(1, 7)), _send, _on_blocked, _on_checkpoint)
+
+    assert attempts[1] == 2
+    assert (stats.sent, stats.blocked, stats.failed) == (2, 3, 1)
+    assert sorted(telegram_id for batch in blocked_batches for telegram_id in batch) == [2, 3, 4]
+
+
+@pytest.mark.asyncio
+async def test_broadcast_gives_up_after_max_attempts(monkeypatch):
+    monkeypatch.setattr(BroadcastService, "MAX_ATTEMPTS", 2)
+    method = SendMessage(chat_id=1, text="text")
+    attempts = []
+
+    async def _send(telegram_id):
+        attempts.append(telegram_id)
+        raise TelegramRetryAfter(method=method, message="Flood control exceeded", retry_after=0)
+
+    async def _noop(*args):
+        return True
+
+    stats = await BroadcastService.broadcast(_iter_recipients([1]), _send, _noop, _noop)
+
+    assert attempts == [1, 1]
+    assert stats.failed == 1
+
+
+@pytest.mark.asyncio
+async def test_broadcast_stops_after_in_flight_recipients_when_job_is_paused(monkeypatch):
+    monkeypatch.setattr(BroadcastService, "CHECKPOINT_EVERY", 1)
+    sent = []
+    checkpoints = []
+
+    async def _send(telegram_id):
+        sent.append(telegram_id)
+        return DeliveryStatus.SENT
+
+    async def _on_blocked(telegram_ids):
+        return None
+
+    async def _on_checkpoint(stats, cursor):
+        checkpoints.append((cursor, stats.sent))
+        return False
+
+    stats = await BroadcastService.broadcast(_iter_recipients([101, 102, 103, 104]), _send, _on_blocked,
+                                             _on_checkpoint)
+
+    assert len(sent) < 4
+    assert sorted(sent) == [101 + offset for offset in range(len(sent))]
+    assert checkpoints[-1] == (len(sent), len(sent))
+    assert stats.sent == len(sent)
+
+
+@pytest.mark.asyncio
+async def test_broadcast_checkpoint_never_passes_in_flight_recipient(monkeypatch):
+    monkeypatch.setattr(BroadcastService, "CHECKPOINT_EVERY", 1)
+    release_first = asyncio.Event()
+    checkpoints = []
+
+    async def _send(telegram_id):
+        if telegram_id == 1:
+            await release_first.wait()
+        return DeliveryStatus.SENT
+
+    async def _on_blocked(telegram_ids):
+        return None
+
+    async def _on_checkpoint(stats, cursor):
+        checkpoints.append(cursor)
+        return True
+
+    async def _recipients():
+        async for cursor, telegram_id in _iter_recipients([1, 2, 3]):
+            yield cursor, telegram_id
+        for _ in range(5):
+            await asyncio.sleep(0)
+        assert checkpoints == []
+        release_first.set()
+
+    stats = await BroadcastService.broadcast(_recipients(), _send, _on_blocked, _on_checkpoint)
+
+    assert checkpoints == [3]
+    assert stats.sent == 3
+
+
+@pytest.mark.asyncio
+async def test_broadcast_checkpoints_every_n_recipients(monkeypatch):
+    monkeypatch.setattr(BroadcastService, "CHECKPOINT_EVERY", 3)
+    checkpoints = []
+
+    async def _send(telegram_id):
+        return DeliveryStatus.SENT
+
+    async def _on_blocked(telegram_ids):
+        return None
+
+    async def _on_checkpoint(stats, cursor):
+        checkpoints.append(cursor)
+        return True
+
+    stats = await BroadcastService.broadcast(_iter_recipients(range(1, 8)), _send, _on_blocked, _on_checkpoint)
+
+    assert checkpoints == [3, 6, 7]
+    assert stats.sent == 7
@@ -0,0 +1,133 @@
+from types import SimpleNamespace
+
+import pytest
+
+from callbacks import CartCallback
+from enums.bot_entity import BotEntity
+from enums.item_type import ItemType
+from enums.language import Language
+from enums.ledger_entry_type import LedgerEntryType
+from models.item import ItemAvailabilityDTO, ItemDTO
+from services.cart import CartService
+from utils.utils import get_text
+
+
+class _State:
+    async def get_data(self):
+        return {}
+
+
+class _Session:
+    def __init__(self):
+        self.rollbacks = 0
+
+    async def rollback(self):
+        self.rollbacks += 1
+
+
+@pytest.mark.asyncio
+async def test_buy_processing_rolls_back_when_items_are_taken_concurrently(monkeypatch):
+    cart_item = SimpleNamespace(id=1, item_type=ItemType.DIGITAL, category_id=2, subcategory_id=3, quantity=2)
+    availability = ItemAvailabilityDTO(item_type=ItemType.DIGITAL, category_id=2, subcategory_id=3,
+                                       price=5.0, description="description", available_qty=2)
+    removed_cart_items = []
+
+    async def _fake_get_user(telegram_id, session):
+        return SimpleNamespace(id=7, top_up_amount=100.0, consume_records=0.0)
+
+    async def _fake_get_cart_items(user_id, session):
+        return [cart_item]
+
+    async def _fake_get_availability(cart_items, session):
+        return {(ItemType.DIGITAL, 2, 3): availability}
+
+    async def _fake_create_buy(buy_dto, session):
+        return buy_dto.model_copy(update={"id": 11})
+
+    async def _fake_sell_unsold(item_type, category_id, subcategory_id, quantity, session):
+        return [ItemDTO(id=99, item_type=item_type, category_id=category_id, subcategory_id=subcategory_id)]
+
+    async def _fake_remove_from_cart(cart_item_id, session):
+        removed_cart_items.append(cart_item_id)
+
+    async def _fake_get_subcategories(subcategory_ids, session):
+        return [SimpleNamespace(id=3, name="Keys")]
+
+    async def _fake_apply_balance_delta(user_id, top_up_delta, consume_delta, entry_type, session,
+                                        require_sufficient_funds=False, reference_id=None):
+        return SimpleNamespace(id=user_id, top_up_amount=100.0, consume_records=consume_delta)
+
+    monkeypatch.setattr("services.cart.UserRepository.get_by_tgid", _fake_get_user)
+    monkeypatch.setattr("services.cart.CartItemRepository.get_all_by_user_id", _fake_get_cart_items)
+    monkeypatch.setattr("services.cart.ItemRepository.get_availability_by_cart_items", _fake_get_availability)
+    monkeypatch.setattr("services.cart.BuyRepository.create", _fake_create_buy)
+    monkeypatch.setattr("services.cart.ItemRepository.sell_unsold", _fake_sell_unsold)
+    monkeypatch.setattr("services.cart.CartItemRepository.remove_from_cart", _fake_remove_from_cart)
+    monkeypatch.setattr("services.cart.SubcategoryRepository.get_by_ids", _fake_get_subcategories)
+    monkeypatch.setattr("services.cart.UserRepository.apply_balance_delta", _fake_apply_balance_delta)
+    session = _Session()
+
+    msg, _ = await CartService.buy_processing(
+        SimpleNamespace(from_user=SimpleNamespace(id=123)),
+        CartCallback.create(level=5, confirmation=True),
+        _State(),
+        session,
+        Language.EN
+    )
+
+    assert session.rollbacks == 1
+    assert removed_cart_items == []
+    assert msg == get_text(Language.EN, BotEntity.USER, "out_of_stock") + "Keys\n"
+
+
+@pytest.mark.asyncio
+async def test_buy_processing_rolls_back_when_guarded_debit_fails(monkeypatch):
+    cart_item = SimpleNamespace(id=1, item_type=ItemType.DIGITAL, category_id=2, subcategory_id=3, quantity=1)
+    availability = ItemAvailabilityDTO(item_type=ItemType.DIGITAL, category_id=2, subcategory_id=3,
+                                       price=5.0, description="description", available_qty=1)
+    debits = []
+
+    async def _fake_get_user(telegram_id, session):
+        return SimpleNamespace(id=7, top_up_amount=10.0, consume_records=0.0)
+
+    async def _fake_get_cart_items(user_id, session):
+        return [cart_item]
+
+    async def _fake_get_availability(cart_items, session):
+        return {(ItemType.DIGITAL, 2, 3): availability}
+
+    async def _fake_create_buy(buy_dto, session):
+        return buy_dto.model_copy(update={"id": 11})
+
+    async def _fake_sell_unsold(item_type, category_id, subcategory_id, quantity, session):
+        return [ItemDTO(id=99, item_type=item_type, category_id=category_id, subcategory_id=subcategory_id)]
+
+    async def _noop(*args):
+        return None
+
+    async def _fake_apply_balance_delta(user_id, top_up_delta, consume_delta, entry_type, session,
+                                        require_sufficient_funds=False, reference_id=None):
+        debits.append((user_id, consume_delta, entry_type, require_sufficient_funds, reference_id))
+        return None
+
+    monkeypatch.setattr("services.cart.UserRepository.get_by_tgid", _fake_get_user)
+    monkeypatch.setattr("services.cart.CartItemRepository.get_all_by_user_id", _fake_get_cart_items)
+    monkeypatch.setattr("services.cart.ItemRepository.get_availability_by_cart_items", _fake_get_availability)
+    monkeypatch.setattr("services.cart.BuyRepository.create", _fake_create_buy)
+    monkeypatch.setattr("services.cart.ItemRepository.sell_unsold", _fake_sell_unsold)
+    monkeypatch.setattr("services.cart.BuyItemRepository.create_single", _noop)
+    monkeypatch.setattr("services.cart.CartItemRepository.remove_from_cart", _noop)
+    monkeypatch.setattr("services.cart.UserRepository.apply_balance_delta", _fake_apply_balance_delta)
+    session = _Session()
+
+    msg, _ = await CartService.buy_processing(
+        SimpleNamespace(from_user=SimpleNamespace(id=123)),
+        CartCallback.create(level=5, confirmation=True),
+        _State(),
+        session,
+        Language.EN
+    )
+
+    assert debits == [(7, 5.0, LedgerEntryType.PURCHASE, True, 11)]
+    assert session.rollbacks == 1
+    assert msg == get_text(Language.EN, BotEntity.USER, "insufficient_funds")
@@ -0,0 +1,64 @@
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from enums.item_type import ItemType
+from models.item import ItemDTO
+from repositories.item import ItemRepository
+
+
+class _ScalarsResult:
+    def __init__(self, values):
+        self._values = values
+
+    def scalars(self):
+        return self
+
+    def all(self):
+        return self._values
+
+
+@pytest.mark.asyncio
+async def test_sell_unsold_subtracts_stock_in_the_sale_transaction(monkeypatch):
+    sold_items = [ItemDTO(id=item_id, item_type=ItemType.DIGITAL, category_id=1, subcategory_id=10)
+                  for item_id in (1, 2)]
+    statements = []
+    checkout_session = SimpleNamespace(info={})
+
+    async def _fake_session_execute(stmt, session):
+        statements.append((stmt.compile(dialect=postgresql.dialect()), session))
+        return _ScalarsResult(sold_items)
+
+    monkeypatch.setattr("repositories.item.session_execute", _fake_session_execute)
+    monkeypatch.setattr("repositories.item_stock.session_execute", _fake_session_execute)
+
+    items = await ItemRepository.sell_unsold(ItemType.DIGITAL, 1, 10, 2, checkout_session)
+
+    assert [item.id for item in items] == [1, 2]
+    (sell, _), (subtract, subtract_session) = statements
+    assert sell.string.startswith("UPDATE items SET is_sold")
+    assert subtract.string.startswith("UPDATE item_stock SET ")
+    assert "available_qty=greatest(item_stock.available_qty - %(available_qty_1)s" in subtract.string
+    assert subtract_session is checkout_session
+    assert subtract.params["available_qty_1"] == 2
+    assert ("price=coalesce((SELECT items.price \nFROM items \nWHERE items.item_type = %(item_type_1)s "
+            "AND items.category_id = %(category_id_1)s AND items.subcategory_id = %(subcategory_id_1)s "
+            "AND items.is_sold = false ORDER BY items.id \n LIMIT %(param_1)s), item_stock.price)") in subtract.string
+    assert "description=coalesce((SELECT items.description" in subtract.string
+    assert "after_commit_callbacks" not in checkout_session.info
+
+
+@pytest.mark.asyncio
+async def test_sell_unsold_leaves_stock_alone_when_nothing_was_sold(monkeypatch):
+    statements = []
+
+    async def _fake_session_execute(stmt, session):
+        statements.append(stmt)
+        return _ScalarsResult([])
+
+    monkeypatch.setattr("repositories.item.session_execute", _fake_session_execute)
+    monkeypatch.setattr("repositories.item_stock.session_execute", _fake_session_execute)
+
+    assert await ItemRepository.sell_unsold(ItemType.DIGITAL, 1, 10, 2, SimpleNamespace(info={})) == []
+    assert len(statements) == 1
@@ -1,95 +1,185 @@
+import io
+import json
 from types import SimpleNamespace
 
 import pytest
 
+from callbacks import AddType
 from enums.announcement_type import AnnouncementType
+from enums.item_type import ItemType
 from enums.language import Language
+from models.item import SubcategorySummaryDTO
 from services.item import ItemService
 
 
-def _build_item(category_id: int, subcategory_id: int, price: float = 10.0):
-    return SimpleNamespace(category_id=category_id, subcategory_id=subcategory_id, price=price)
+class _RollbackSession:
+    def __init__(self):
+        self.rolled_back = False
 
+    async def rollback(self):
+        self.rolled_back = True
 
-@pytest.mark.asyncio
-async def test_create_announcement_message_returns_single_chunk_for_short_content(monkeypatch):
-    async def _fake_get_items(session):
-        return [
-            _build_item(1, 10),
-            _build_item(1, 11),
-        ]
-
-    async def _fake_get_categories(ids, session):
-        return [SimpleNamespace(id=1, name="Category 1")]
-
-    async def _fake_get_subcategories(ids, session):
-        return [
-            SimpleNamespace(id=10, name="Sub 1"),
-            SimpleNamespace(id=11, name="Sub 2"),
-        ]
-
-    monkeypatch.setattr("services.item.ItemRepository.get_in_stock", _fake_get_items)
-    monkeypatch.setattr("services.item.CategoryRepository.get_by_ids", _fake_get_categories)
-    monkeypatch.setattr("services.item.SubcategoryRepository.get_by_ids", _fake_get_subcategories)
-
-    messages = await ItemService.create_announcement_message(
-        AnnouncementType.CURRENT_STOCK,
+
+def _build_summary(category_name: str, subcategory_name: str, available_qty: int = 1, price: float = 10.0):
+    return SubcategorySummaryDTO(category_name=category_name, subcategory_name=subcategory_name,
+                                 available_qty=available_qty, price=price)
+
+
+def _fake_summaries(summaries):
+    async def _get_summary(session):
+        for summary in summaries:
+            yield summary
+
+    return _get_summary
+
+
+async def _collect_messages(announcement_type: AnnouncementType) -> list[str]:
+    return [message async for message in ItemService.create_announcement_message(
+        announcement_type,
         session=None,
         language=Language.EN
-    )
+    )]
+
+
+@pytest.mark.asyncio
+async def test_create_announcement_message_returns_single_chunk_for_short_content(monkeypatch):
+    monkeypatch.setattr("services.item.ItemStockRepository.get_subcategory_summary", _fake_summaries([
+        _build_summary("Category 1", "Sub 1", available_qty=3),
+        _build_summary("Category 1", "Sub 2"),
+    ]))
+
+    messages = await _collect_messages(AnnouncementType.CURRENT_STOCK)
 
     assert len(messages) == 1
     assert messages[0].startswith("<b>")
     assert "Category 1" in messages[0]
+    assert "Qty: 3" in messages[0]
 
 
 @pytest.mark.asyncio
 async def test_create_announcement_message_splits_long_content_by_category(monkeypatch):
-    async def _fake_get_items(session):
-        return [_build_item(category_id=index, subcategory_id=index) for index in range(1, 60)]
+    monkeypatch.setattr("services.item.ItemStockRepository.get_subcategory_summary", _fake_summaries([
+        _build_summary(f"Category {index} {'X' * 80}", f"Subcategory {index} {'Y' * 60}")
+        for index in range(1, 60)
+    ]))
 
-    async def _fake_get_categories(ids, session):
-        return [SimpleNamespace(id=index, name=f"Category {index} {'X' * 80}") for index in ids]
+    messages = await _collect_messages(AnnouncementType.CURRENT_STOCK)
 
-    async def _fake_get_subcategories(ids, session):
-        return [SimpleNamespace(id=index, name=f"Subcategory {index} {'Y' * 60}") for index in ids]
+    assert len(messages) > 1
+    assert all(len(message) < ItemService.ANNOUNCEMENT_MESSAGE_LIMIT for message in messages)
+    assert "Category 1" in messages[0]
 
-    monkeypatch.setattr("services.item.ItemRepository.get_in_stock", _fake_get_items)
-    monkeypatch.setattr("services.item.CategoryRepository.get_by_ids", _fake_get_categories)
-    monkeypatch.setattr("services.item.SubcategoryRepository.get_by_ids", _fake_get_subcategories)
 
-    messages = await ItemService.create_announcement_message(
-        AnnouncementType.CURRENT_STOCK,
-        session=None,
-        language=Language.EN
-    )
+@pytest.mark.asyncio
+async def test_create_announcement_message_splits_large_single_category_without_losing_header(monkeypatch):
+    monkeypatch.setattr("services.item.ItemRepository.get_new_subcategory_summary", _fake_summaries([
+        _build_summary("Single Category", f"Subcategory {index} {'Z' * 70}") for index in range(1, 80)
+    ]))
+
+    messages = await _collect_messages(AnnouncementType.RESTOCKING)
 
     assert len(messages) > 1
+    assert all("Single Category" in message for message in messages)
     assert all(len(message) < ItemService.ANNOUNCEMENT_MESSAGE_LIMIT for message in messages)
-    assert "Category 1" in messages[0]
 
 
 @pytest.mark.asyncio
-async def test_create_announcement_message_splits_large_single_category_without_losing_header(monkeypatch):
-    async def _fake_get_items(session):
-        return [_build_item(category_id=1, subcategory_id=index) for index in range(1, 80)]
+async def test_create_announcement_message_returns_header_for_empty_stock(monkeypatch):
+    monkeypatch.setattr("services.item.ItemStockRepository.get_subcategory_summary", _fake_summaries([]))
 
-    async def _fake_get_categories(ids, session):
-        return [SimpleNamespace(id=1, name="Single Category")]
+    messages = await _collect_messages(AnnouncementType.CURRENT_STOCK)
 
-    async def _fake_get_subcategories(ids, session):
-        return [SimpleNamespace(id=index, name=f"Subcategory {index} {'Z' * 70}") for index in ids]
+    assert len(messages) == 1
 
-    monkeypatch.setattr("services.item.ItemRepository.get_new", _fake_get_items)
-    monkeypatch.setattr("services.item.CategoryRepository.get_by_ids", _fake_get_categories)
-    monkeypatch.setattr("services.item.SubcategoryRepository.get_by_ids", _fake_get_subcategories)
 
-    messages = await ItemService.create_announcement_message(
-        AnnouncementType.RESTOCKING,
-        session=None,
-        language=Language.EN
-    )
+def test_parse_items_json_streams_array_across_reads(tmp_path, monkeypatch):
+    monkeypatch.setattr(ItemService, "IMPORT_READ_SIZE", 16)
+    path = tmp_path / "items.json"
+    path.write_text(json.dumps([
+        {"item_type": "digital", "category": "Keys", "subcategory": "Steam", "price": 5,
+         "description": "Key", "private_data": "AAAA-BBBB"},
+        {"item_type": "physical", "category": "Goods", "subcategory": "Mugs", "price": 12.5,
+         "description": "Mug", "private_data": None},
+    ], indent=2), encoding="utf-8")
 
-    assert len(messages) > 1
-    assert all("Single Category" in message for message in messages)
-    assert all(len(message) < ItemService.ANNOUNCEMENT_MESSAGE_LIMIT for message in messages)
+    rows = list(ItemService.parse_items_json(str(path)))
+
+    assert rows == [
+        (ItemType.DIGITAL, "Keys", "Steam", "Key", 5.0, "AAAA-BBBB"),
+        (ItemType.PHYSICAL, "Goods", "Mugs", "Mug", 12.5, None),
+    ]
+
+
+@pytest.mark.parametrize("read_size", [7, 1024 * 64])
+def test_iter_json_array_yields_every_item_whatever_the_read_size(monkeypatch, read_size):
+    monkeypatch.setattr(ItemService, "IMPORT_READ_SIZE", read_size)
+    items = [{"index": index, "text": "x" * (index % 13)} for index in range(300)]
+
+    assert list(ItemService._iter_json_array(io.StringIO(json.dumps(items)))) == items
+    assert list(ItemService._iter_json_array(io.StringIO(" [ ] "))) == []
+
+
+def test_iter_json_array_raises_on_truncated_file(monkeypatch):
+    monkeypatch.setattr(ItemService, "IMPORT_READ_SIZE", 8)
+
+    with pytest.raises(json.JSONDecodeError):
+        list(ItemService._iter_json_array(io.StringIO('[{"index": 1}, {"index"')))
+
+
+@pytest.mark.asyncio
+async def test_add_items_copies_chunks_and_resolves_each_name_once(tmp_path, monkeypatch):
+    monkeypatch.setattr(ItemService, "IMPORT_CHUNK_SIZE", 2)
+    path = tmp_path / "items.txt"
+    path.write_text("".join(f"DIGITAL;Keys;Steam;Key;5.0;KEY-{index}\n" for index in range(5)), encoding="utf-8")
+    resolved_names = []
+    copied_chunks = []
+    progress = []
+
+    async def _fake_get_or_create(name, session):
+        resolved_names.append(name)
+        return SimpleNamespace(id=len(resolved_names))
+
+    async def _fake_copy_many(items, session):
+        copied_chunks.append(items)
+
+    async def _fake_progress(imported):
+        progress.append(imported)
+        assert upserted_stock == []
+
+    async def _fake_upsert(stock_rows, session):
+        upserted_stock.append(list(stock_rows.values()))
+
+    upserted_stock = []
+    monkeypatch.setattr("services.item.CategoryRepository.get_or_create", _fake_get_or_create)
+    monkeypatch.setattr("services.item.SubcategoryRepository.get_or_create", _fake_get_or_create)
+    monkeypatch.setattr("services.item.ItemRepository.copy_many", _fake_copy_many)
+    monkeypatch.setattr("services.item.ItemStockRepository.upsert", _fake_upsert)
+
+    msg = await ItemService.add_items(str(path), AddType.TXT, None, Language.EN, _fake_progress)
+
+    assert msg == "✅ <b>Successfully added 5 items!</b>"
+    assert resolved_names == ["Keys", "Steam"]
+    assert [len(chunk) for chunk in copied_chunks] == [2, 2, 1]
+    assert copied_chunks[0][1].private_data == "KEY-1"
+    assert progress == [2, 4, 5]
+    assert len(upserted_stock) == 1
+    assert [row["available_qty"] for row in upserted_stock[0]] == [5]
+    assert not path.exists()
+
+
+@pytest.mark.asyncio
+async def test_add_items_rolls_back_when_import_fails(tmp_path, monkeypatch):
+    path = tmp_path / "items.txt"
+    path.write_text("DIGITAL;Keys;Steam;Key;5.0;KEY-1\n", encoding="utf-8")
+    session = _RollbackSession()
+
+    async def _fake_get_or_create(name, session):
+        raise RuntimeError("database is gone")
+
+    monkeypatch.setattr("services.item.CategoryRepository.get_or_create", _fake_get_or_create)
+
+    msg = await ItemService.add_items(str(path), AddType.TXT, session, Language.EN)
+
+    assert "database is gone" in msg
+    assert session.rolled_back is True
+    assert not path.exists()
@@ -0,0 +1,56 @@
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from enums.item_type import ItemType
+from models.item import ItemDTO
+from repositories.item_stock import ItemStockRepository
+
+
+def _build_item(subcategory_id: int, price: float = 10.0) -> ItemDTO:
+    return ItemDTO(item_type=ItemType.DIGITAL, category_id=1, subcategory_id=subcategory_id,
+                   private_data="secret", price=price, description="description")
+
+
+@pytest.fixture
+def executed_statements(monkeypatch):
+    statements = []
+
+    async def _fake_session_execute(stmt, session):
+        statements.append(stmt.compile(dialect=postgresql.dialect()))
+
+    monkeypatch.setattr("repositories.item_stock.session_execute", _fake_session_execute)
+    return statements
+
+
+@pytest.mark.asyncio
+async def test_add_upserts_one_row_per_stock_key(executed_statements):
+    await ItemStockRepository.add([_build_item(10), _build_item(10, price=20.0), _build_item(11)], session=None)
+
+    assert len(executed_statements) == 1
+    compiled = executed_statements[0]
+    assert "ON CONFLICT (item_type, category_id, subcategory_id) DO UPDATE" in compiled.string
+    assert compiled.params["subcategory_id_m0"] == 10
+    assert compiled.params["available_qty_m0"] == 2
+    assert compiled.params["price_m0"] == 10.0
+    assert compiled.params["subcategory_id_m1"] == 11
+    assert compiled.params["available_qty_m1"] == 1
+
+
+@pytest.mark.asyncio
+async def test_add_skips_empty_item_list(executed_statements):
+    await ItemStockRepository.add([], session=None)
+
+    assert executed_statements == []
+
+
+
+@pytest.mark.asyncio
+async def test_refresh_takes_price_and_description_from_oldest_unsold_item(executed_statements):
+    await ItemStockRepository.refresh([(ItemType.DIGITAL, 1, 10)], session=None)
+
+    zero_out, upsert = executed_statements
+    assert "UPDATE item_stock SET available_qty" in zero_out.string
+    assert "row_number() OVER (PARTITION BY items.item_type, items.category_id, items.subcategory_id " \
+           "ORDER BY items.id)" in upsert.string
+    assert "items.is_sold = false" in upsert.string
+    assert "price = excluded.price, description = excluded.description" in upsert.string
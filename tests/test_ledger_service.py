@@ -0,0 +1,77 @@
+import asyncio
+from contextlib import asynccontextmanager
+
+import pytest
+
+from models.ledger import LedgerMismatchDTO, LedgerChainBreakDTO
+from services.ledger import LedgerService
+
+
+class _RowsResult:
+    def __init__(self, rows):
+        self._rows = rows
+
+    def all(self):
+        return self._rows
+
+
+@asynccontextmanager
+async def _fake_get_db_session():
+    yield None
+
+
+@pytest.mark.asyncio
+async def test_verify_balances_reports_drifted_totals_and_broken_chain(monkeypatch):
+    results = [
+        [(7, 50.0, 20.0, 45.0, 20.0)],
+        [(7, 12, 30.0, 25.0)],
+    ]
+    statements = []
+
+    async def _fake_session_execute(stmt, session):
+        statements.append(stmt)
+        return _RowsResult(results[len(statements) - 1])
+
+    monkeypatch.setattr("services.ledger.get_db_session", _fake_get_db_session)
+    monkeypatch.setattr("repositories.ledger.session_execute", _fake_session_execute)
+
+    ledger_replay = await LedgerService.verify_balances()
+
+    assert ledger_replay.mismatches == [LedgerMismatchDTO(user_id=7, top_up_amount=50.0, consume_records=20.0,
+                                                          ledger_credit=45.0, ledger_debit=20.0)]
+    assert ledger_replay.chain_breaks == [LedgerChainBreakDTO(user_id=7, ledger_entry_id=12, balance_after=30.0,
+                                                              replayed_balance=25.0)]
+    assert "GROUP BY ledger_entries.user_id" in statements[0].compile().string
+    assert "OVER (PARTITION BY ledger_entries.user_id ORDER BY ledger_entries.id)" in statements[1].compile().string
+
+
+@pytest.mark.asyncio
+async def test_start_verification_runs_in_background_and_survives_errors(monkeypatch):
+    async def _failing_verify_balances():
+        raise RuntimeError("database is unavailable")
+
+    monkeypatch.setattr(LedgerService, "verify_balances", _failing_verify_balances)
+
+    task = LedgerService.start_verification()
+    assert task in LedgerService.VERIFICATION_TASKS
+    await task
+
+    assert task not in LedgerService.VERIFICATION_TASKS
+
+
+@pytest.mark.asyncio
+async def test_stop_verification_cancels_running_replay(monkeypatch):
+    started = asyncio.Event()
+
+    async def _slow_verify_balances():
+        started.set()
+        await asyncio.sleep(3600)
+
+    monkeypatch.setattr(LedgerService, "verify_balances", _slow_verify_balances)
+
+    task = LedgerService.start_verification()
+    await started.wait()
+    await LedgerService.stop_verification()
+
+    assert task.cancelled()
+    assert LedgerService.VERIFICATION_TASKS == set()
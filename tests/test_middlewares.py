@@ -0,0 +1,96 @@
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+
+import pytest
+
+from enums.language import Language
+from middleware.bot_reachability import BotReachabilityMiddleware
+from middleware.database import DBSessionMiddleware
+from middleware.language import I18nMiddleware
+from models.user import UserDTO
+from utils.custom_filters import IsUserBannedFilter, IsUserExistFilter
+
+
+def _fake_session_factory(opened_sessions: list):
+    @asynccontextmanager
+    async def _get_db_session():
+        session = object()
+        opened_sessions.append(session)
+        yield session
+
+    return _get_db_session
+
+
+@pytest.mark.asyncio
+async def test_db_session_middleware_resolves_user_once_per_update(monkeypatch):
+    opened_sessions = []
+    lookups = []
+    user = UserDTO(id=1, telegram_id=42, language=Language.DE)
+
+    async def _fake_get_by_tgid(telegram_id, session):
+        lookups.append((telegram_id, session))
+        return user
+
+    monkeypatch.setattr("middleware.database.get_db_session", _fake_session_factory(opened_sessions))
+    monkeypatch.setattr("middleware.database.UserRepository.get_by_tgid", _fake_get_by_tgid)
+
+    async def _handler(event, data):
+        return await I18nMiddleware()(_inner_handler, event, data)
+
+    async def _inner_handler(event, data):
+        return data
+
+    event = SimpleNamespace(from_user=SimpleNamespace(id=42, language_code="en"))
+    data = await DBSessionMiddleware()(_handler, event, {"event_from_user": event.from_user})
+
+    assert len(opened_sessions) == 1
+    assert lookups == [(42, opened_sessions[0])]
+    assert data["session"] is opened_sessions[0]
+    assert data["user_dto"] is user
+    assert data["language"] == Language.DE
+
+
+@pytest.mark.asyncio
+async def test_i18n_middleware_falls_back_to_locale_for_unknown_user():
+    async def _handler(event, data):
+        return data
+
+    event = SimpleNamespace(from_user=SimpleNamespace(id=42, language_code="en"))
+    data = await I18nMiddleware()(_handler, event, {"user_dto": None})
+
+    assert data["language"] == Language.EN
+
+
+@pytest.mark.asyncio
+async def test_user_filters_use_injected_user_dto():
+    message = SimpleNamespace(from_user=SimpleNamespace(id=42))
+    banned_user = UserDTO(telegram_id=42, is_banned=True)
+    banned_admin = UserDTO(telegram_id=1, is_banned=True)
+
+    assert await IsUserExistFilter()(message, user_dto=None) is False
+    assert await IsUserExistFilter()(message, user_dto=banned_user) is True
+    assert await IsUserBannedFilter()(message, user_dto=None) is False
+    assert await IsUserBannedFilter()(message, user_dto=banned_user) is True
+    assert await IsUserBannedFilter()(message, user_dto=banned_admin) is False
+
+
+@pytest.mark.asyncio
+async def test_bot_reachability_middleware_records_bot_for_user(monkeypatch):
+    recorded = []
+
+    async def _fake_record_user_bot(telegram_id, bot_id):
+        recorded.append((telegram_id, bot_id))
+
+    async def _handler(event, data):
+        return "handled"
+
+    monkeypatch.setattr("middleware.bot_reachability.MultibotService.record_user_bot_if_changed",
+                        _fake_record_user_bot)
+
+    result = await BotReachabilityMiddleware()(_handler, object(), {
+        "event_from_user": SimpleNamespace(id=42),
+        "bot": SimpleNamespace(id=222)
+    })
+
+    assert result == "handled"
+    assert recorded == [(42, 222)]
@@ -1,11 +1,15 @@
+from collections import OrderedDict
+from contextlib import asynccontextmanager
 from types import SimpleNamespace
 
 import pytest
-from aiogram.exceptions import TelegramUnauthorizedError
+from aiogram.exceptions import TelegramForbiddenError, TelegramRetryAfter, TelegramUnauthorizedError
 
 import config
 from enums.announcement_type import AnnouncementType
+from enums.broadcast_status import BroadcastStatus
 from enums.language import Language
+from models.broadcast import BroadcastJobDTO
 from models.user import UserDTO
 from multibot import command_add_bot, on_startup
 from services.announcement import AnnouncementService
@@ -16,6 +20,8 @@ from services.notification import NotificationService
 class _FakeRedis:
     def __init__(self):
         self.values = set()
+        self.hashes = {}
+        self.writes = 0
         self.closed = False
 
     async def smembers(self, key):
@@ -33,6 +39,13 @@ class _FakeRedis:
         self.values.discard(value)
         return 1
 
+    async def hget(self, key, field):
+        return self.hashes.get(field)
+
+    async def hset(self, key, field, value):
+        self.writes += 1
+        self.hashes[field] = value
+
     async def close(self):
         self.closed = True
 
@@ -49,6 +62,7 @@ class _FakeBot:
         self.session = _FakeSession()
         self.sent_messages = []
         self.copied_messages = []
+        self.deleted_messages = []
         self.webhooks = []
 
     async def get_me(self):
@@ -73,6 +87,9 @@ class _FakeBot:
             raise action
         self.sent_messages.append((chat_id, text, reply_markup))
 
+    async def delete_message(self, chat_id, message_id):
+        self.deleted_messages.append((chat_id, message_id))
+
     async def copy_message(self, chat_id, from_chat_id, message_id):
         action = self.behavior.get("copy_message")
         if isinstance(action, Exception):
@@ -94,12 +111,23 @@ class _FakeMessage:
         return None
 
 
+@asynccontextmanager
+async def _fake_get_db_session():
+    yield object()
+
+
 class _FakeCallback:
     def __init__(self):
         self.message = _FakeMessage()
         self.bot = _FakeBot("main-token")
 
 
+@pytest.fixture(autouse=True)
+def _reset_multibot_bots(monkeypatch):
+    monkeypatch.setattr(MultibotService, "RATE_LIMITERS", {})
+    monkeypatch.setattr(MultibotService, "KNOWN_USER_BOTS", OrderedDict())
+
+
 @pytest.mark.asyncio
 async def test_multibot_token_storage_ignores_main_token():
     redis = _FakeRedis()
@@ -206,30 +234,127 @@ async def test_restore_child_bot_webhooks_removes_unauthorized_token(monkeypatch
 
 
 @pytest.mark.asyncio
-async def test_send_to_user_multibot_uses_all_tokens_and_sleep(monkeypatch):
-    sleep_calls = []
-    built_bots = []
+async def test_send_to_user_multibot_stops_at_first_reachable_bot_and_remembers_it(monkeypatch):
+    redis = _FakeRedis()
+    built_bots = {}
 
     async def _fake_get_all_tokens(redis_client=None):
-        return ["main-token", "child-token"]
+        return ["111:main", "222:child", "333:spare"]
 
-    async def _fake_sleep(delay):
-        sleep_calls.append(delay)
+    def _fake_build_bot(token):
+        if token in built_bots:
+            return built_bots[token]
+        behavior = {}
+        if token == "111:main":
+            behavior["send_message"] = TelegramForbiddenError(method=SimpleNamespace(__api_method__="sendMessage"),
+                                                              message="Forbidden: bot was blocked by the user")
+        built_bots[token] = _FakeBot(token, behavior=behavior)
+        return built_bots[token]
+
+    monkeypatch.setattr("services.multibot.MultibotService.get_all_tokens_with_main", _fake_get_all_tokens)
+    monkeypatch.setattr("services.multibot.MultibotService.build_bot", _fake_build_bot)
+
+    assert await MultibotService.send_message_to_user("hello", 100500, redis_client=redis) == 1
+    assert await MultibotService.send_message_to_user("again", 100500, redis_client=redis) == 1
+
+    assert built_bots["111:main"].sent_messages == []
+    assert built_bots["222:child"].sent_messages == [(100500, "hello", None), (100500, "again", None)]
+    assert built_bots["333:spare"].sent_messages == []
+    assert (await MultibotService.get_user_bot(100500, redis)).bot_id == 222
+
+
+@pytest.mark.asyncio
+async def test_send_to_user_multibot_skips_flood_limited_bot(monkeypatch):
+    redis = _FakeRedis()
+    await MultibotService.record_user_bot(42, 111, redis)
+    built_bots = {}
+
+    async def _fake_get_all_tokens(redis_client=None):
+        return ["111:main", "222:child"]
 
     def _fake_build_bot(token):
-        bot = _FakeBot(token)
-        built_bots.append(bot)
-        return bot
+        behavior = {}
+        if token == "111:main":
+            behavior["send_message"] = TelegramRetryAfter(method=SimpleNamespace(__api_method__="sendMessage"),
+                                                          message="Flood control exceeded", retry_after=30)
+        built_bots[token] = _FakeBot(token, behavior=behavior)
+        return built_bots[token]
+
+    monkeypatch.setattr("services.multibot.MultibotService.get_all_tokens_with_main", _fake_get_all_tokens)
+    monkeypatch.setattr("services.multibot.MultibotService.build_bot", _fake_build_bot)
+
+    sent_count, had_only_forbidden_errors = await MultibotService.send_message_to_user_verbose(
+        "hello", 42, redis_client=redis
+    )
+
+    assert (sent_count, had_only_forbidden_errors) == (1, False)
+    assert MultibotService.RATE_LIMITERS["111:main"].paused is True
+    assert (await MultibotService.get_user_bot(42, redis)).bot_id == 222
+
+    tokens, _ = await MultibotService._get_delivery_tokens(42, redis)
+    assert tokens == ["222:child", "111:main"]
+
+
+@pytest.mark.asyncio
+async def test_copy_message_raises_retry_after_when_every_bot_is_flood_limited(monkeypatch):
+    redis = _FakeRedis()
+
+    async def _fake_get_all_tokens(redis_client=None):
+        return ["111:main", "222:child"]
+
+    def _fake_build_bot(token):
+        retry_after = 30 if token == "111:main" else 5
+        return _FakeBot(token, behavior={
+            "copy_message": TelegramRetryAfter(method=SimpleNamespace(__api_method__="copyMessage"),
+                                               message="Flood control exceeded", retry_after=retry_after)
+        })
 
     monkeypatch.setattr("services.multibot.MultibotService.get_all_tokens_with_main", _fake_get_all_tokens)
     monkeypatch.setattr("services.multibot.MultibotService.build_bot", _fake_build_bot)
-    monkeypatch.setattr("services.multibot.asyncio.sleep", _fake_sleep)
 
-    sent_count = await MultibotService.send_message_to_user("hello", 100500)
+    with pytest.raises(TelegramRetryAfter) as exception_info:
+        await MultibotService.copy_message_to_user(77, 501, 42, redis_client=redis)
+
+    assert exception_info.value.retry_after == 5
+
+
+@pytest.mark.asyncio
+async def test_record_user_bot_if_changed_writes_only_when_bot_changes():
+    redis = _FakeRedis()
+    await MultibotService.record_user_bot(42, 111, redis)
+    MultibotService.KNOWN_USER_BOTS.clear()
+
+    await MultibotService.record_user_bot_if_changed(42, 111, redis)
+    await MultibotService.record_user_bot_if_changed(42, 111, redis)
+    assert redis.writes == 1
 
-    assert sent_count == 2
-    assert [bot.token for bot in built_bots] == ["main-token", "child-token"]
-    assert sleep_calls == [0.3]
+    await MultibotService.record_user_bot_if_changed(42, 222, redis)
+    await MultibotService.record_user_bot_if_changed(42, 222, redis)
+    assert redis.writes == 2
+    assert (await MultibotService.get_user_bot(42, redis)).bot_id == 222
+
+
+@pytest.mark.asyncio
+async def test_send_to_user_multibot_routes_to_bot_the_user_talks_to(monkeypatch):
+    redis = _FakeRedis()
+    built_bots = {}
+
+    async def _fake_get_all_tokens(redis_client=None):
+        return ["111:main", "222:child", "333:spare"]
+
+    def _fake_build_bot(token):
+        built_bots[token] = _FakeBot(token)
+        return built_bots[token]
+
+    monkeypatch.setattr("services.multibot.MultibotService.get_all_tokens_with_main", _fake_get_all_tokens)
+    monkeypatch.setattr("services.multibot.MultibotService.build_bot", _fake_build_bot)
+    await MultibotService.record_user_bot(42, 333, redis)
+
+    assert await MultibotService.send_message_to_user("hello", 42, redis_client=redis) == 1
+
+    assert built_bots["333:spare"].sent_messages == [(42, "hello", None)]
+    assert built_bots["111:main"].sent_messages == []
+    assert built_bots["222:child"].sent_messages == []
 
 
 @pytest.mark.asyncio
@@ -248,115 +373,108 @@ async def test_notification_service_send_to_user_uses_multibot_service(monkeypat
     assert called == [("hello", 42, None)]
 
 
-@pytest.mark.asyncio
-async def test_announcement_service_counts_multibot_successes(monkeypatch):
-    callback = _FakeCallback()
-    updates = []
-    user = UserDTO(telegram_id=777, can_receive_messages=True)
+def _patch_broadcast_job(monkeypatch, announcement_type, users, messages=None):
+    broadcast_job = BroadcastJobDTO(id=1, announcement_type=announcement_type, status=BroadcastStatus.RUNNING,
+                                    language=Language.EN, source_chat_id=77, source_message_id=501,
+                                    progress_chat_id=123, progress_message_id=900, messages=messages, cursor=0,
+                                    total_count=len(users), sent_count=0, blocked_count=0, failed_count=0)
+    progress_updates = []
 
-    monkeypatch.setattr("config.MULTIBOT", True)
-    
-    async def _fake_get_active(session):
-        return [user]
+    async def _fake_get_by_id(broadcast_job_id, session):
+        return broadcast_job.model_copy()
 
-    async def _fake_get_all_count(session):
-        return 1
+    async def _fake_claim(broadcast_job_id, owner, session):
+        return True
 
-    async def _fake_create_announcement_message(announcement_type, session, language):
-        return ["chunk-1", "chunk-2"]
+    async def _fake_save_checkpoint(broadcast_job_id, owner, cursor, stats, session):
+        broadcast_job.cursor = cursor
+        broadcast_job.sent_count = stats.sent
+        return broadcast_job.status
 
-    async def _fake_send_message_to_user_verbose(text, telegram_id, reply_markup=None, redis_client=None):
-        return 2, False
+    async def _fake_set_status(broadcast_job_id, status, from_statuses, session):
+        if broadcast_job.status not in from_statuses:
+            return False
+        broadcast_job.status = status
+        return True
+
+    async def _fake_get_active_recipients(after_user_id, session):
+        for user in users:
+            if user.id > after_user_id:
+                yield user.id, user.telegram_id
+
+    async def _fake_get_all_count(session):
+        return len(users)
 
     async def _fake_edit_message(message, source_message_id, chat_id):
-        updates.append(message)
+        progress_updates.append(message)
 
     async def _fake_session_commit(session):
         return None
 
-    monkeypatch.setattr("services.announcement.UserRepository.get_active", _fake_get_active)
+    monkeypatch.setattr("services.announcement.BroadcastJobRepository.get_by_id", _fake_get_by_id)
+    monkeypatch.setattr("services.announcement.BroadcastJobRepository.claim", _fake_claim)
+    monkeypatch.setattr("services.announcement.BroadcastJobRepository.save_checkpoint", _fake_save_checkpoint)
+    monkeypatch.setattr("services.announcement.BroadcastJobRepository.set_status", _fake_set_status)
+    monkeypatch.setattr("services.announcement.UserRepository.get_active_recipients", _fake_get_active_recipients)
     monkeypatch.setattr("services.announcement.UserRepository.get_all_count", _fake_get_all_count)
-    monkeypatch.setattr("services.announcement.ItemService.create_announcement_message", _fake_create_announcement_message)
-    monkeypatch.setattr("services.announcement.MultibotService.send_message_to_user_verbose",
-                        _fake_send_message_to_user_verbose)
     monkeypatch.setattr("services.announcement.NotificationService.edit_message", _fake_edit_message)
     monkeypatch.setattr("services.announcement.session_commit", _fake_session_commit)
+    monkeypatch.setattr("services.announcement.get_db_session", _fake_get_db_session)
+    return broadcast_job, progress_updates
 
-    await AnnouncementService.send_announcement(
-        callback,
-        SimpleNamespace(announcement_type=AnnouncementType.CURRENT_STOCK),
-        object(),
-        Language.EN
+
+@pytest.mark.asyncio
+async def test_announcement_service_counts_multibot_successes(monkeypatch):
+    monkeypatch.setattr("config.MULTIBOT", True)
+    broadcast_job, progress_updates = _patch_broadcast_job(
+        monkeypatch, AnnouncementType.CURRENT_STOCK, [UserDTO(id=1, telegram_id=777)], ["chunk-1", "chunk-2"]
     )
 
-    assert any("1" in message for message in updates)
+    async def _fake_send_message_to_user_verbose(text, telegram_id, reply_markup=None, redis_client=None):
+        return 2, False
+
+    monkeypatch.setattr("services.announcement.MultibotService.send_message_to_user_verbose",
+                        _fake_send_message_to_user_verbose)
+
+    await AnnouncementService._run_broadcast_job(1, _FakeBot("main-token"))
+
+    assert broadcast_job.status == BroadcastStatus.FINISHED
+    assert broadcast_job.cursor == 1
+    assert "Message sent to 1 out of 1" in progress_updates[-1]
 
 
 @pytest.mark.asyncio
 async def test_announcement_service_marks_user_inactive_when_all_multibot_attempts_forbidden(monkeypatch):
-    callback = _FakeCallback()
     updated_users = []
-    user = UserDTO(telegram_id=777, can_receive_messages=True)
-
     monkeypatch.setattr("config.MULTIBOT", True)
-    
-    async def _fake_get_active(session):
-        return [user]
-
-    async def _fake_get_all_count(session):
-        return 1
-
-    async def _fake_create_announcement_message(announcement_type, session, language):
-        return ["chunk-1", "chunk-2"]
+    _patch_broadcast_job(
+        monkeypatch, AnnouncementType.CURRENT_STOCK, [UserDTO(id=1, telegram_id=777)], ["chunk-1", "chunk-2"]
+    )
 
     async def _fake_send_message_to_user_verbose(text, telegram_id, reply_markup=None, redis_client=None):
         return 0, True
 
-    async def _fake_update(user_dto, session):
-        updated_users.append(user_dto)
-
-    async def _fake_edit_message(message, source_message_id, chat_id):
-        return None
-
-    async def _fake_session_commit(session):
-        return None
+    async def _fake_set_can_receive_messages(telegram_ids, can_receive_messages, session):
+        updated_users.append((telegram_ids, can_receive_messages))
 
-    monkeypatch.setattr("services.announcement.UserRepository.get_active", _fake_get_active)
-    monkeypatch.setattr("services.announcement.UserRepository.get_all_count", _fake_get_all_count)
-    monkeypatch.setattr("services.announcement.ItemService.create_announcement_message", _fake_create_announcement_message)
     monkeypatch.setattr("services.announcement.MultibotService.send_message_to_user_verbose",
                         _fake_send_message_to_user_verbose)
-    monkeypatch.setattr("services.announcement.UserRepository.update", _fake_update)
-    monkeypatch.setattr("services.announcement.NotificationService.edit_message", _fake_edit_message)
-    monkeypatch.setattr("services.announcement.session_commit", _fake_session_commit)
+    monkeypatch.setattr("services.announcement.UserRepository.set_can_receive_messages",
+                        _fake_set_can_receive_messages)
 
-    await AnnouncementService.send_announcement(
-        callback,
-        SimpleNamespace(announcement_type=AnnouncementType.CURRENT_STOCK),
-        object(),
-        Language.EN
-    )
+    await AnnouncementService._run_broadcast_job(1, _FakeBot("main-token"))
 
-    assert updated_users
-    assert updated_users[0].can_receive_messages is False
+    assert updated_users == [([777], False)]
 
 
 @pytest.mark.asyncio
 async def test_announcement_service_marks_restocking_not_new_once(monkeypatch):
-    callback = _FakeCallback()
     set_not_new_calls = []
-    user = UserDTO(telegram_id=777, can_receive_messages=True)
-
     monkeypatch.setattr("config.MULTIBOT", True)
-
-    async def _fake_get_active(session):
-        return [user, user]
-
-    async def _fake_get_all_count(session):
-        return 2
-
-    async def _fake_create_announcement_message(announcement_type, session, language):
-        return ["chunk-1"]
+    _patch_broadcast_job(
+        monkeypatch, AnnouncementType.RESTOCKING,
+        [UserDTO(id=1, telegram_id=777), UserDTO(id=2, telegram_id=778)], ["chunk-1"]
+    )
 
     async def _fake_send_message_to_user_verbose(text, telegram_id, reply_markup=None, redis_client=None):
         return 1, False
@@ -364,48 +482,92 @@ async def test_announcement_service_marks_restocking_not_new_once(monkeypatch):
     async def _fake_set_not_new(session):
         set_not_new_calls.append(True)
 
-    async def _fake_edit_message(message, source_message_id, chat_id):
-        return None
-
-    async def _fake_session_commit(session):
-        return None
-
-    monkeypatch.setattr("services.announcement.UserRepository.get_active", _fake_get_active)
-    monkeypatch.setattr("services.announcement.UserRepository.get_all_count", _fake_get_all_count)
-    monkeypatch.setattr("services.announcement.ItemService.create_announcement_message", _fake_create_announcement_message)
     monkeypatch.setattr("services.announcement.MultibotService.send_message_to_user_verbose",
                         _fake_send_message_to_user_verbose)
     monkeypatch.setattr("services.announcement.ItemRepository.set_not_new", _fake_set_not_new)
-    monkeypatch.setattr("services.announcement.NotificationService.edit_message", _fake_edit_message)
-    monkeypatch.setattr("services.announcement.session_commit", _fake_session_commit)
 
-    await AnnouncementService.send_announcement(
-        callback,
-        SimpleNamespace(announcement_type=AnnouncementType.RESTOCKING),
-        object(),
-        Language.EN
-    )
+    await AnnouncementService._run_broadcast_job(1, _FakeBot("main-token"))
 
     assert len(set_not_new_calls) == 1
 
 
+@pytest.mark.asyncio
+async def test_announcement_service_resumes_job_after_cursor(monkeypatch):
+    bot = _FakeBot("main-token")
+    broadcast_job, _ = _patch_broadcast_job(
+        monkeypatch, AnnouncementType.FROM_RECEIVING_MESSAGE,
+        [UserDTO(id=user_id, telegram_id=700 + user_id) for user_id in (1, 2, 3)]
+    )
+    broadcast_job.cursor = 2
+    broadcast_job.sent_count = 2
+
+    await AnnouncementService._run_broadcast_job(1, bot)
+
+    assert bot.copied_messages == [(703, 77, 501)]
+    assert bot.deleted_messages == [(77, 501)]
+    assert broadcast_job.sent_count == 3
+    assert broadcast_job.status == BroadcastStatus.FINISHED
+
+
 @pytest.mark.asyncio
 async def test_multibot_startup_restores_child_webhooks(monkeypatch):
     restored = []
     created = []
+    stock_initialized = []
+    resumed = []
+    dispatchers = []
+    verifications = []
 
     async def _fake_create_db_and_tables():
         created.append(True)
 
+    async def _fake_init_stock():
+        stock_initialized.append(True)
+
     async def _fake_restore(url):
         restored.append(url)
 
+    async def _fake_resume_broadcast_jobs(bot):
+        resumed.append(bot.token)
+
     bot = _FakeBot("main-token")
 
     monkeypatch.setattr("multibot.create_db_and_tables", _fake_create_db_and_tables)
+    monkeypatch.setattr("multibot.ItemStockRepository.init_stock", _fake_init_stock)
+    monkeypatch.setattr("multibot.AnnouncementService.resume_broadcast_jobs", _fake_resume_broadcast_jobs)
     monkeypatch.setattr("multibot.MultibotService.restore_child_bot_webhooks", _fake_restore)
+    monkeypatch.setattr("multibot.OutboxService.start_dispatcher", lambda: dispatchers.append(True))
+    monkeypatch.setattr("multibot.LedgerService.start_verification", lambda: verifications.append(True))
 
     await on_startup(SimpleNamespace(), bot)
 
     assert created == [True]
+    assert stock_initialized == [True]
+    assert resumed == ["main-token"]
+    assert dispatchers == [True]
+    assert verifications == [True]
     assert restored == ["https://example.com/webhook/bot/{bot_token}"]
+
+
+@pytest.mark.asyncio
+async def test_announcement_service_skips_job_leased_by_another_process(monkeypatch):
+    sent = []
+    broadcast_job, progress_updates = _patch_broadcast_job(
+        monkeypatch, AnnouncementType.CURRENT_STOCK, [UserDTO(id=1, telegram_id=777)], ["chunk-1"]
+    )
+
+    async def _fake_claim(broadcast_job_id, owner, session):
+        return False
+
+    async def _fake_send_generated_announcement_to_user(bot, telegram_id, messages):
+        sent.append(telegram_id)
+
+    monkeypatch.setattr("services.announcement.BroadcastJobRepository.claim", _fake_claim)
+    monkeypatch.setattr(AnnouncementService, "_send_generated_announcement_to_user",
+                        _fake_send_generated_announcement_to_user)
+
+    await AnnouncementService._run_broadcast_job(1, _FakeBot("main-token"))
+
+    assert sent == []
+    assert progress_updates == []
+    assert broadcast_job.status == BroadcastStatus.RUNNING
@@ -1,9 +1,13 @@
+import asyncio
+from contextlib import asynccontextmanager
+
 import pytest
 from aiogram.exceptions import TelegramBadRequest
 from aiogram.methods import SendMessage
 from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup
 from types import SimpleNamespace
 
+from enums.outbox_event_type import OutboxEventType
 from services.notification import NotificationService
 
 
@@ -81,16 +85,10 @@ async def test_non_privacy_errors_are_not_swallowed():
 @pytest.mark.asyncio
 async def test_preferred_user_link_uses_tgid_when_private_forwards_allowed(monkeypatch):
     class _Bot:
-        def __init__(self, *args, **kwargs):
-            self.session = SimpleNamespace(close=self._close)
-
         async def get_chat(self, user_id):
             return SimpleNamespace(has_private_forwards=False)
 
-        async def _close(self):
-            return None
-
-    monkeypatch.setattr("services.notification.create_bot", lambda token: _Bot())
+    monkeypatch.setattr("services.notification.get_bot", lambda token: _Bot())
 
     link = await NotificationService.get_preferred_user_link(
         SimpleNamespace(telegram_id=123, telegram_username="demo")
@@ -102,19 +100,92 @@ async def test_preferred_user_link_uses_tgid_when_private_forwards_allowed(monke
 @pytest.mark.asyncio
 async def test_preferred_user_link_falls_back_to_username(monkeypatch):
     class _Bot:
-        def __init__(self, *args, **kwargs):
-            self.session = SimpleNamespace(close=self._close)
-
         async def get_chat(self, user_id):
             return SimpleNamespace(has_private_forwards=True)
 
-        async def _close(self):
-            return None
-
-    monkeypatch.setattr("services.notification.create_bot", lambda token: _Bot())
+    monkeypatch.setattr("services.notification.get_bot", lambda token: _Bot())
 
     link = await NotificationService.get_preferred_user_link(
         SimpleNamespace(telegram_id=123, telegram_username="demo")
     )
 
     assert link == "https://t.me/demo"
+
+
+class _SlowAdminBot:
+    def __init__(self):
+        self.started = []
+        self.release = asyncio.Event()
+
+    async def send_message(self, chat_id, text, reply_markup=None):
+        self.started.append(chat_id)
+        await self.release.wait()
+
+
+@pytest.mark.asyncio
+async def test_send_to_admins_notifies_admins_concurrently(monkeypatch):
+    bot = _SlowAdminBot()
+    monkeypatch.setattr("services.notification.ADMIN_ID_LIST", [1, 2, 3])
+    monkeypatch.setattr("services.notification.get_bot", lambda token: bot)
+
+    sending = asyncio.create_task(NotificationService.send_to_admins("new buy", None))
+    await asyncio.sleep(0)
+    await asyncio.sleep(0)
+
+    assert bot.started == [1, 2, 3]
+    bot.release.set()
+    await sending
+
+
+@pytest.mark.asyncio
+async def test_send_to_admins_in_background_queues_one_outbox_event_per_admin(monkeypatch):
+    bot = _SlowAdminBot()
+    queued = []
+    committed = []
+    woken_up = []
+    monkeypatch.setattr("config.ADMIN_NOTIFICATIONS_IN_BACKGROUND", True)
+    monkeypatch.setattr("services.notification.ADMIN_ID_LIST", [1, 2])
+    monkeypatch.setattr("services.notification.get_bot", lambda token: bot)
+
+    @asynccontextmanager
+    async def _fake_get_db_session():
+        yield "session"
+
+    async def _fake_add(event_type, payload, session):
+        queued.append((event_type, payload.admin_id, payload.message, session))
+
+    async def _fake_session_commit(session):
+        committed.append(session)
+
+    monkeypatch.setattr("services.notification.get_db_session", _fake_get_db_session)
+    monkeypatch.setattr("services.notification.OutboxRepository.add", _fake_add)
+    monkeypatch.setattr("services.notification.session_commit", _fake_session_commit)
+    monkeypatch.setattr("services.outbox.OutboxService.wake_up", lambda: woken_up.append(True))
+
+    await NotificationService.send_to_admins("new buy", None)
+
+    assert queued == [(OutboxEventType.ADMIN_NOTIFICATION, 1, "new buy", "session"),
+                      (OutboxEventType.ADMIN_NOTIFICATION, 2, "new buy", "session")]
+    assert committed == ["session"]
+    assert woken_up == [True]
+    assert bot.started == []
+
+
+@pytest.mark.asyncio
+async def test_send_to_admins_in_background_sends_now_when_queueing_fails(monkeypatch):
+    bot = _SlowAdminBot()
+    bot.release.set()
+    monkeypatch.setattr("config.ADMIN_NOTIFICATIONS_IN_BACKGROUND", True)
+    monkeypatch.setattr("services.notification.ADMIN_ID_LIST", [1])
+    monkeypatch.setattr("services.notification.get_bot", lambda token: bot)
+
+    @asynccontextmanager
+    async def _broken_get_db_session():
+        raise RuntimeError("database is gone")
+        yield
+
+    monkeypatch.setattr("services.notification.get_db_session", _broken_get_db_session)
+
+    await NotificationService.send_to_admins("new buy", None)
+
+    assert bot.started == [1]
@@ -0,0 +1,191 @@
+from contextlib import asynccontextmanager
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from enums.cryptocurrency import Cryptocurrency
+from enums.currency import Currency
+from enums.outbox_event_type import OutboxEventType
+from enums.withdraw_type import WithdrawType
+from models.outbox import OutboxEventDTO
+from models.payment import ProcessingPaymentDTO
+from models.withdrawal import WithdrawalDTO
+from repositories.outbox import OutboxRepository
+from services.outbox import OutboxService
+
+
+class _FakeSession:
+    @asynccontextmanager
+    async def begin_nested(self):
+        yield
+
+
+def _patch_outbox(monkeypatch, outbox_event):
+    session = _FakeSession()
+    results = []
+
+    @asynccontextmanager
+    async def _fake_get_db_session():
+        yield session
+
+    async def _fake_get_next_due(session):
+        return outbox_event
+
+    async def _fake_mark_delivered(outbox_event_id, session):
+        results.append(("delivered", outbox_event_id))
+
+    async def _fake_mark_failed(outbox_event_id, error, retry_in_seconds, session):
+        results.append(("failed", outbox_event_id, error, retry_in_seconds))
+
+    async def _fake_mark_in_flight(outbox_event_id, session):
+        results.append(("in_flight", outbox_event_id))
+
+    async def _fake_session_commit(session):
+        results.append(("commit",))
+
+    monkeypatch.setattr("services.outbox.get_db_session", _fake_get_db_session)
+    monkeypatch.setattr("services.outbox.OutboxRepository.get_next_due", _fake_get_next_due)
+    monkeypatch.setattr("services.outbox.OutboxRepository.mark_delivered", _fake_mark_delivered)
+    monkeypatch.setattr("services.outbox.OutboxRepository.mark_failed", _fake_mark_failed)
+    monkeypatch.setattr("services.outbox.OutboxRepository.mark_in_flight", _fake_mark_in_flight)
+    monkeypatch.setattr("services.outbox.session_commit", _fake_session_commit)
+    return results
+
+
+def _withdrawal_event(attempts: int = 0) -> OutboxEventDTO:
+    return OutboxEventDTO(id=7,
+                          event_type=OutboxEventType.CRYPTO_WITHDRAWAL,
+                          payload={"cryptocurrency": Cryptocurrency.BTC.value, "payment_id": 99},
+                          attempts=attempts)
+
+
+@pytest.mark.asyncio
+async def test_withdrawal_event_enqueues_admin_notification(monkeypatch):
+    results = _patch_outbox(monkeypatch, _withdrawal_event())
+    added = []
+    withdraw_dto = WithdrawalDTO(withdrawType=WithdrawType.ALL, cryptoCurrency=Cryptocurrency.BTC,
+                                 toAddress="btc-forward", onlyCalculate=False, paymentId=99)
+
+    async def _fake_withdrawal(cryptocurrency, to_address, only_calculate, payment_id):
+        assert (cryptocurrency, to_address, payment_id) == (Cryptocurrency.BTC, "btc-forward", 99)
+        return withdraw_dto
+
+    async def _fake_add(event_type, payload, session):
+        added.append((event_type, payload))
+
+    monkeypatch.setattr("services.outbox.CryptoApiWrapper.withdrawal", _fake_withdrawal)
+    monkeypatch.setattr("services.outbox.OutboxRepository.add", _fake_add)
+
+    assert await OutboxService.dispatch_next() is True
+
+    assert added == [(OutboxEventType.WITHDRAWAL_NOTIFICATION, withdraw_dto)]
+    assert results == [("in_flight", 7), ("commit",), ("delivered", 7), ("commit",)]
+
+
+def _notification_event(attempts: int = 0) -> OutboxEventDTO:
+    return OutboxEventDTO(id=9,
+                          event_type=OutboxEventType.WITHDRAWAL_NOTIFICATION,
+                          payload={"withdrawType": WithdrawType.ALL.value, "cryptoCurrency": Cryptocurrency.BTC.value,
+                                   "toAddress": "btc-forward", "onlyCalculate": False},
+                          attempts=attempts)
+
+
+@pytest.mark.asyncio
+async def test_failed_event_is_retried_with_backoff_then_given_up(monkeypatch):
+    async def _fake_withdrawal_notification(withdrawal_dto):
+        raise RuntimeError("telegram unavailable")
+
+    monkeypatch.setattr("services.outbox.NotificationService.withdrawal", _fake_withdrawal_notification)
+
+    results = _patch_outbox(monkeypatch, _notification_event(attempts=1))
+    await OutboxService.dispatch_next()
+    assert results == [("failed", 9, "telegram unavailable", OutboxService.RETRY_BASE_SECONDS * 2), ("commit",)]
+
+    results = _patch_outbox(monkeypatch, _notification_event(attempts=OutboxService.MAX_ATTEMPTS - 1))
+    await OutboxService.dispatch_next()
+    assert results == [("failed", 9, "telegram unavailable", None), ("commit",)]
+
+
+@pytest.mark.asyncio
+async def test_withdrawal_is_committed_in_flight_before_the_call_and_never_retried(monkeypatch):
+    results = _patch_outbox(monkeypatch, _withdrawal_event())
+
+    async def _fake_withdrawal(*args):
+        assert results == [("in_flight", 7), ("commit",)]
+        raise TimeoutError("processor timed out")
+
+    monkeypatch.setattr("services.outbox.CryptoApiWrapper.withdrawal", _fake_withdrawal)
+
+    await OutboxService.dispatch_next()
+
+    assert results == [("in_flight", 7), ("commit",), ("failed", 7, "processor timed out", None), ("commit",)]
+
+
+@pytest.mark.asyncio
+async def test_dispatch_next_returns_false_when_outbox_is_empty(monkeypatch):
+    results = _patch_outbox(monkeypatch, None)
+
+    assert await OutboxService.dispatch_next() is False
+    assert results == []
+
+
+@pytest.mark.asyncio
+async def test_payment_event_is_never_given_up_and_backoff_is_capped(monkeypatch):
+    async def _fake_process_event(payment_dto, session):
+        raise RuntimeError("database is unavailable")
+
+    monkeypatch.setattr("services.outbox.PaymentService.process_event", _fake_process_event)
+    payment_event = OutboxEventDTO(id=8,
+                                   event_type=OutboxEventType.PAYMENT_EVENT,
+                                   payload={"id": 42, "fiatCurrency": "USD", "cryptoCurrency": "BTC", "isPaid": True,
+                                            "cryptoAmount": 0.001, "fiatAmount": 50.0},
+                                   attempts=OutboxService.MAX_ATTEMPTS * 10)
+    results = _patch_outbox(monkeypatch, payment_event)
+
+    await OutboxService.dispatch_next()
+
+    assert results == [("failed", 8, "database is unavailable", OutboxService.MAX_RETRY_SECONDS), ("commit",)]
+
+
+@pytest.mark.asyncio
+async def test_add_unique_requeues_failed_duplicate(monkeypatch):
+    statements = []
+
+    class _Result:
+        def scalar(self):
+            return 5
+
+    async def _fake_session_execute(stmt, session):
+        statements.append(stmt)
+        return _Result()
+
+    monkeypatch.setattr("repositories.outbox.session_execute", _fake_session_execute)
+
+    payment_dto = ProcessingPaymentDTO(id=42, fiatCurrency=Currency.USD, cryptoCurrency=Cryptocurrency.BTC,
+                                       isPaid=True)
+
+    assert await OutboxRepository.add_unique(OutboxEventType.PAYMENT_EVENT, payment_dto, "payment:42:paid",
+                                             session=None) is True
+
+    compiled = statements[0].compile(dialect=postgresql.dialect()).string
+    assert "ON CONFLICT (dedup_key) DO UPDATE" in compiled
+    assert "WHERE outbox_events.status = %(status_1)s" in compiled
+
+
+@pytest.mark.asyncio
+async def test_admin_notification_failure_is_retried(monkeypatch):
+    results = _patch_outbox(monkeypatch, OutboxEventDTO(id=11, event_type=OutboxEventType.ADMIN_NOTIFICATION,
+                                                        payload={"admin_id": 5, "message": "new buy"},
+                                                        attempts=0))
+    sent = []
+
+    async def _fake_send_to_admin(admin_id, message, reply_markup):
+        sent.append((admin_id, message, reply_markup))
+        raise RuntimeError("telegram is down")
+
+    monkeypatch.setattr("services.outbox.NotificationService.send_to_admin", _fake_send_to_admin)
+
+    assert await OutboxService.dispatch_next() is True
+
+    assert sent == [(5, "new buy", None)]
+    assert results == [("failed", 11, "telegram is down", OutboxService.RETRY_BASE_SECONDS), ("commit",)]
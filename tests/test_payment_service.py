@@ -1,3 +1,4 @@
+from contextlib import asynccontextmanager
 from decimal import Decimal
 from types import SimpleNamespace
 
@@ -5,10 +6,18 @@ import pytest
 
 from enums.bot_entity import BotEntity
 from enums.cryptocurrency import Cryptocurrency
+from enums.currency import Currency
 from enums.language import Language
+from enums.ledger_entry_type import LedgerEntryType
+from enums.outbox_event_type import OutboxEventType
 from handlers.user.constants import UserStates
 from handlers.user.my_profile import receive_top_up_amount
+from models.payment import ProcessingPaymentDTO, TablePaymentDTO
+from models.referral import ReferralBonusDTO
+from models.user import UserDTO
+from processing.processing import fetch_crypto_event
 from services.payment import PaymentService
+from services.referral import ReferralService
 from utils.utils import get_text
 
 
@@ -108,3 +117,108 @@ async def test_stablecoin_invalid_amount_returns_localized_retry_screen(monkeypa
     media, _ = await PaymentService.create(message, None, state, session=None, language=Language.EN)
 
     assert get_text(Language.EN, BotEntity.USER, "top_up_balance_invalid_fiat_amount").split("\n")[0] in media.caption
+
+
+@pytest.mark.asyncio
+async def test_payment_webhook_only_enqueues_event(monkeypatch):
+    queued = []
+
+    class _Session:
+        pass
+
+    @asynccontextmanager
+    async def _fake_get_db_session():
+        yield _Session()
+
+    async def _fake_add_unique(event_type, payload, dedup_key, session):
+        queued.append((event_type, payload.id, payload.callbackSecret, dedup_key))
+        return True
+
+    async def _fail_process_event(payment_dto, session):
+        raise AssertionError("payment events are processed by the outbox dispatcher")
+
+    class _Request:
+        headers = {"X-Signature": "signature"}
+
+        async def body(self):
+            return b"{}"
+
+    monkeypatch.setattr("processing.processing.CryptoApiWrapper.verify_callback_signature", lambda header, body: True)
+    monkeypatch.setattr("processing.processing.get_db_session", _fake_get_db_session)
+    monkeypatch.setattr("processing.processing.OutboxRepository.add_unique", _fake_add_unique)
+    monkeypatch.setattr("services.payment.PaymentService.process_event", _fail_process_event)
+    payment_dto = ProcessingPaymentDTO(id=42, fiatCurrency=Currency.USD, cryptoCurrency=Cryptocurrency.BTC,
+                                       isPaid=True, callbackSecret="secret")
+
+    assert await fetch_crypto_event(payment_dto, _Request()) == "200"
+    assert queued == [(OutboxEventType.PAYMENT_EVENT, 42, None, "payment:42:paid")]
+
+
+@pytest.mark.asyncio
+async def test_process_event_credits_paid_payment_once_and_queues_notification(monkeypatch):
+    user = UserDTO(id=1, telegram_id=100)
+    table_payment = TablePaymentDTO(id=5, user_id=1, processing_payment_id=42, message_id=9, is_paid=True)
+    unpaid_payment_ids = {42}
+    deposits = []
+    outbox_events = []
+
+    async def _fake_get_user(payment_id, session):
+        return user
+
+    async def _fake_set_paid(processing_payment_id, session):
+        if processing_payment_id not in unpaid_payment_ids:
+            return None
+        unpaid_payment_ids.remove(processing_payment_id)
+        return table_payment
+
+    async def _fake_create_deposit(deposit_dto, session):
+        deposits.append(deposit_dto)
+
+    async def _fake_apply_referral_logic(payment_dto, user_dto, session):
+        return ReferralBonusDTO()
+
+    async def _fake_add(event_type, payload, session):
+        outbox_events.append(event_type)
+
+    monkeypatch.setattr("services.payment.PaymentRepository.get_user_by_payment_id", _fake_get_user)
+    monkeypatch.setattr("services.payment.PaymentRepository.set_paid", _fake_set_paid)
+    monkeypatch.setattr("services.payment.DepositRepository.create", _fake_create_deposit)
+    monkeypatch.setattr("services.payment.ReferralService.apply_referral_logic", _fake_apply_referral_logic)
+    monkeypatch.setattr("services.payment.OutboxRepository.add", _fake_add)
+    payment_dto = ProcessingPaymentDTO(id=42, fiatCurrency=Currency.USD, cryptoCurrency=Cryptocurrency.BTC,
+                                       isPaid=True, cryptoAmount=0.001, fiatAmount=50.0)
+
+    await PaymentService.process_event(payment_dto, session=None)
+    await PaymentService.process_event(payment_dto, session=None)
+
+    assert len(deposits) == 1
+    assert deposits[0].amount == 100000
+    assert outbox_events == [OutboxEventType.NEW_DEPOSIT]
+
+
+@pytest.mark.asyncio
+async def test_apply_referral_logic_credits_balance_in_sql(monkeypatch):
+    user = UserDTO(id=1, telegram_id=100, top_up_amount=10.0, referral_code="U_ABCDEF")
+    increments = []
+
+    async def _fake_get_sum(user_id, session):
+        return 0.0
+
+    async def _fake_apply_balance_delta(user_id, top_up_delta, consume_delta, entry_type, session,
+                                        require_sufficient_funds=False, reference_id=None):
+        increments.append((user_id, top_up_delta, consume_delta, entry_type))
+        return user.model_copy(update={"top_up_amount": user.top_up_amount + top_up_delta})
+
+    async def _fail_update(user_dto, session):
+        raise AssertionError("balance must not be written from a stale read")
+
+    monkeypatch.setattr("services.referral.DepositRepository.get_sum", _fake_get_sum)
+    monkeypatch.setattr("services.referral.UserRepository.apply_balance_delta", _fake_apply_balance_delta)
+    monkeypatch.setattr("services.referral.UserRepository.update", _fail_update)
+    payment_dto = ProcessingPaymentDTO(id=42, fiatCurrency=Currency.USD, cryptoCurrency=Cryptocurrency.BTC,
+                                       isPaid=True, cryptoAmount=0.001, fiatAmount=50.0)
+
+    referral_bonus_dto = await ReferralService.apply_referral_logic(payment_dto, user, session=None)
+
+    assert increments == [(1, 50.0, 0.0, LedgerEntryType.DEPOSIT)]
+    assert referral_bonus_dto.referral_user_dto.top_up_amount == 60.0
@@ -0,0 +1,30 @@
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from repositories.review import ReviewRepository
+
+
+class _MappingsResult:
+    def mappings(self):
+        return self
+
+    def all(self):
+        return [{"id": 3, "buyItem_id": 5, "buy_id": 8, "subcategory_name": None, "total_price": None}]
+
+
+@pytest.mark.asyncio
+async def test_get_reviews_paginated_keeps_reviews_of_deleted_items(monkeypatch):
+    statements = []
+
+    async def _fake_session_execute(stmt, session):
+        statements.append(stmt.compile(dialect=postgresql.dialect()).string)
+        return _MappingsResult()
+
+    monkeypatch.setattr("repositories.review.session_execute", _fake_session_execute)
+
+    reviews = await ReviewRepository.get_reviews_paginated(0, session=None)
+
+    assert [review.id for review in reviews] == [3]
+    assert reviews[0].subcategory_name is None
+    assert "LEFT OUTER JOIN items" in statements[0]
+    assert "LEFT OUTER JOIN subcategories" in statements[0]
@@ -4,6 +4,7 @@ import pytest
 
 from callbacks import ReviewManagementCallback
 from enums.language import Language
+from models.review import ReviewListingDTO
 from services.review import ReviewService
 
 
@@ -83,3 +84,56 @@ async def test_create_review_checks_duplicate_by_buy_item_id(monkeypatch):
 
     assert requested_ids == [22]
     assert media.caption
+
+
+@pytest.mark.asyncio
+async def test_get_reviews_paginated_builds_buttons_from_single_query(monkeypatch):
+    async def _fake_get_reviews(page, session):
+        return [ReviewListingDTO(id=3, buyItem_id=5, buy_id=8, subcategory_name="Subcategory", total_price=30.0)]
+
+    async def _fail_lookup(*args, **kwargs):
+        raise AssertionError("review listing must not query entities per review")
+
+    async def _fake_get_max_page(session):
+        return 0
+
+    async def _fake_get_button_media(button, session):
+        return SimpleNamespace(media_id="0photo-id")
+
+    monkeypatch.setattr("services.review.ReviewRepository.get_reviews_paginated", _fake_get_reviews)
+    monkeypatch.setattr("services.review.ReviewRepository.get_max_page", _fake_get_max_page)
+    monkeypatch.setattr("services.review.ButtonMediaRepository.get_by_button", _fake_get_button_media)
+    monkeypatch.setattr("services.review.BuyItemRepository.get_by_id", _fail_lookup)
+    monkeypatch.setattr("services.review.ItemRepository.get_by_id", _fail_lookup)
+    monkeypatch.setattr("services.review.SubcategoryRepository.get_by_id", _fail_lookup)
+
+    _, kb_builder = await ReviewService.get_reviews_paginated(None, session=None, language=Language.EN)
+
+    button = kb_builder.as_markup().inline_keyboard[0][0]
+    callback_data = ReviewManagementCallback.unpack(button.callback_data)
+    assert "Subcategory" in button.text
+    assert callback_data.review_id == 3
+    assert callback_data.buy_id == 8
+    assert callback_data.buyItem_id == 5
+
+
+@pytest.mark.asyncio
+async def test_get_reviews_paginated_lists_reviews_of_deleted_items(monkeypatch):
+    async def _fake_get_reviews(page, session):
+        return [ReviewListingDTO(id=3, buyItem_id=5, buy_id=8, subcategory_name=None, total_price=None)]
+
+    async def _fake_get_max_page(session):
+        return 0
+
+    async def _fake_get_button_media(button, session):
+        return SimpleNamespace(media_id="0photo-id")
+
+    monkeypatch.setattr("services.review.ReviewRepository.get_reviews_paginated", _fake_get_reviews)
+    monkeypatch.setattr("services.review.ReviewRepository.get_max_page", _fake_get_max_page)
+    monkeypatch.setattr("services.review.ButtonMediaRepository.get_by_button", _fake_get_button_media)
+
+    _, kb_builder = await ReviewService.get_reviews_paginated(None, session=None, language=Language.EN)
+
+    button = kb_builder.as_markup().inline_keyboard[0][0]
+    assert "no longer available" in button.text
+    assert ReviewManagementCallback.unpack(button.callback_data).review_id == 3
@@ -0,0 +1,52 @@
+import pytest
+
+from callbacks import AllCategoriesCallback
+from enums.item_type import ItemType
+from enums.language import Language
+from models.item import ItemDTO
+from services.subcategory import SubcategoryService
+
+
+class _State:
+    def __init__(self, data=None):
+        self._data = data or {}
+
+    async def get_data(self):
+        return dict(self._data)
+
+    async def update_data(self, **kwargs):
+        self._data.update(kwargs)
+
+
+@pytest.mark.asyncio
+async def test_get_buttons_uses_quantity_from_paginated_query(monkeypatch):
+    async def _fake_get_paginated(sort_pairs, filters, item_type, category_id, page, session):
+        return [
+            ItemDTO(item_type=ItemType.DIGITAL, category_id=1, subcategory_id=10,
+                    subcategory_name="Sub 1", price=5.0, available_qty=3),
+            ItemDTO(item_type=ItemType.DIGITAL, category_id=1, subcategory_id=11,
+                    subcategory_name="Sub 2", price=7.0, available_qty=12),
+        ]
+
+    async def _fail_get_available_qty(*args, **kwargs):
+        raise AssertionError("available quantity must come from the paginated query")
+
+    async def _fake_get_maximum_page(category_id, filters, session):
+        return 0
+
+    monkeypatch.setattr("services.subcategory.SubcategoryRepository.get_paginated_by_category_id",
+                        _fake_get_paginated)
+    monkeypatch.setattr("services.subcategory.SubcategoryRepository.get_maximum_page", _fake_get_maximum_page)
+    monkeypatch.setattr("services.subcategory.ItemRepository.get_available_qty", _fail_get_available_qty)
+    monkeypatch.setattr("services.subcategory.get_bot_photo_id", lambda: "photo-id")
+
+    _, kb_builder = await SubcategoryService.get_buttons(
+        AllCategoriesCallback.create(2, item_type=ItemType.DIGITAL),
+        _State(),
+        session=None,
+        language=Language.EN
+    )
+
+    button_texts = [row[0].text for row in kb_builder.as_markup().inline_keyboard[:2]]
+    assert button_texts[0].endswith("Qty: 3")
+    assert button_texts[1].endswith("Qty: 12")
@@ -2,7 +2,7 @@ from types import SimpleNamespace
 
 import pytest
 
-from utils.telegram import create_telegram_session, create_bot
+from utils.telegram import close_bots, create_telegram_session, create_bot, get_bot, get_telegram_session
 
 
 def test_create_telegram_session_without_proxy(monkeypatch):
@@ -38,3 +38,28 @@ def test_create_bot_uses_proxy_session_by_default(monkeypatch):
 
     assert captured["token"] == "123:ABC"
     assert captured["session"] is fake_session
+
+
+@pytest.mark.asyncio
+async def test_get_bot_reuses_bots_and_shared_session(monkeypatch):
+    closed = []
+
+    class _FakeSession:
+        async def close(self):
+            closed.append(self)
+
+    monkeypatch.setattr("utils.telegram.create_telegram_session", _FakeSession)
+    monkeypatch.setattr("utils.telegram.Bot", lambda token, session, default: SimpleNamespace(token=token,
+                                                                                            session=session))
+
+    main_bot = get_bot("123:ABC")
+    child_bot = get_bot("456:DEF")
+
+    assert get_bot("123:ABC") is main_bot
+    assert main_bot.session is child_bot.session is get_telegram_session()
+
+    await close_bots()
+
+    assert closed == [main_bot.session]
+    assert get_bot("123:ABC") is not main_bot
+    await close_bots()
@@ -0,0 +1,177 @@
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from enums.language import Language
+from models.user import UserDTO, UserAdmin
+from repositories.user import UserRepository
+from repositories.user_cache import UserCacheRepository
+
+
+class _FakeRedis:
+    def __init__(self):
+        self.storage = {}
+        self.deleted_batches = []
+
+    async def get(self, key):
+        return self.storage.get(key)
+
+    async def set(self, key, value, ex=None):
+        self.storage[key] = value
+
+    async def delete(self, *keys):
+        self.deleted_batches.append(keys)
+        for key in keys:
+            self.storage.pop(key, None)
+
+
+class _BrokenRedis:
+    async def get(self, key):
+        raise ConnectionError("redis is down")
+
+    async def set(self, key, value, ex=None):
+        raise ConnectionError("redis is down")
+
+
+class _ScalarResult:
+    def __init__(self, value):
+        self._value = value
+
+    def scalar(self):
+        return self._value
+
+
+def _user_orm(**overrides):
+    values = dict(id=7, telegram_username="tester", telegram_id=123456, top_up_amount=10.0,
+                  consume_records=0.0, registered_at=None, can_receive_messages=True,
+                  language=Language.EN, is_banned=False, referral_code="REF123",
+                  referred_by_user_id=None, referred_at=None)
+    values.update(overrides)
+    return SimpleNamespace(**values)
+
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    redis_client = _FakeRedis()
+    monkeypatch.setattr(UserCacheRepository, "_redis_client", redis_client)
+    return redis_client
+
+
+@pytest.mark.asyncio
+async def test_get_by_tgid_reads_database_once_then_cache(monkeypatch, fake_redis):
+    calls = []
+
+    async def fake_session_execute(stmt, session):
+        calls.append(stmt)
+        return _ScalarResult(_user_orm())
+
+    monkeypatch.setattr("repositories.user.session_execute", fake_session_execute)
+    session = SimpleNamespace(info={})
+
+    first = await UserRepository.get_by_tgid(123456, session)
+    second = await UserRepository.get_by_tgid(123456, session)
+
+    assert len(calls) == 1
+    assert first == second
+    assert second.language == Language.EN
+
+
+@pytest.mark.asyncio
+async def test_update_invalidates_and_bypasses_cache_until_commit(monkeypatch, fake_redis):
+    db_rows = [_user_orm(top_up_amount=10.0)]
+
+    async def fake_session_execute(stmt, session):
+        return _ScalarResult(db_rows[-1])
+
+    monkeypatch.setattr("repositories.user.session_execute", fake_session_execute)
+    session = SimpleNamespace(info={})
+
+    await UserRepository.get_by_tgid(123456, session)
+    db_rows.append(_user_orm(top_up_amount=25.0))
+    await UserRepository.update(UserDTO(telegram_id=123456, top_up_amount=25.0), session)
+
+    assert fake_redis.storage == {}
+    user = await UserRepository.get_by_tgid(123456, session)
+    assert user.top_up_amount == 25.0
+    assert fake_redis.storage == {}
+
+    fake_redis.storage["user:tgid:123456"] = "stale"
+    for callback in session.info.pop("after_commit_callbacks"):
+        await callback()
+
+    assert fake_redis.storage == {}
+    assert UserCacheRepository.is_dirty(123456, session) is False
+
+
+@pytest.mark.asyncio
+async def test_get_by_tgid_falls_back_to_database_when_redis_fails(monkeypatch):
+    monkeypatch.setattr(UserCacheRepository, "_redis_client", _BrokenRedis())
+
+    async def fake_session_execute(stmt, session):
+        return _ScalarResult(_user_orm())
+
+    monkeypatch.setattr("repositories.user.session_execute", fake_session_execute)
+
+    user = await UserRepository.get_by_tgid(123456, SimpleNamespace(info={}))
+
+    assert user.telegram_id == 123456
+
+
+@pytest.mark.asyncio
+async def test_get_by_tgid_reads_database_when_redis_client_is_not_set(monkeypatch):
+    monkeypatch.setattr(UserCacheRepository, "_redis_client", None)
+    calls = []
+
+    async def fake_session_execute(stmt, session):
+        calls.append(stmt)
+        return _ScalarResult(_user_orm())
+
+    monkeypatch.setattr("repositories.user.session_execute", fake_session_execute)
+
+    await UserRepository.get_by_tgid(123456, SimpleNamespace(info={}))
+    user = await UserRepository.get_by_tgid(123456, SimpleNamespace(info={}))
+
+    assert user.telegram_id == 123456
+    assert len(calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_set_can_receive_messages_updates_all_users_in_one_statement(monkeypatch, fake_redis):
+    statements = []
+
+    async def fake_session_execute(stmt, session):
+        statements.append(stmt.compile(dialect=postgresql.dialect()))
+
+    monkeypatch.setattr("repositories.user.session_execute", fake_session_execute)
+    session = SimpleNamespace(info={})
+    fake_redis.storage = {"user:tgid:1": "cached", "user:tgid:2": "cached", "user:tgid:3": "cached"}
+
+    await UserRepository.set_can_receive_messages([1, 2], False, session)
+
+    assert len(statements) == 1
+    assert "users.telegram_id = ANY (%(telegram_ids)s::BIGINT[])" in statements[0].string
+    assert statements[0].params["telegram_ids"] == [1, 2]
+    assert fake_redis.deleted_batches == [("user:tgid:1", "user:tgid:2")]
+    assert list(fake_redis.storage) == ["user:tgid:3"]
+    assert UserCacheRepository.is_dirty(1, session) and UserCacheRepository.is_dirty(2, session)
+
+    for callback in session.info.pop("after_commit_callbacks"):
+        await callback()
+
+    assert UserCacheRepository.is_dirty(1, session) is False
+    assert len(fake_redis.deleted_batches) == 2
+
+
+@pytest.mark.asyncio
+async def test_user_admin_edit_invalidates_cached_profile(fake_redis):
+    await UserCacheRepository.set(UserDTO(id=7, telegram_id=123456, is_banned=False))
+    request = SimpleNamespace(state=SimpleNamespace())
+    user = SimpleNamespace(telegram_id=123456)
+    user_admin = UserAdmin()
+
+    await user_admin.on_model_change({"is_banned": True}, user, False, request)
+    user.is_banned = True
+    await user_admin.after_model_change({"is_banned": True}, user, False, request)
+
+    assert await UserCacheRepository.get(123456) is None
@@ -1,6 +1,7 @@
 import pytest
 
 from enums.language import Language
+from enums.ledger_entry_type import LedgerEntryType
 from models.user import UserDTO
 from repositories.user import UserRepository
 
@@ -12,6 +13,9 @@ class _ScalarResult:
     def scalar_one_or_none(self):
         return self._value
 
+    def scalar(self):
+        return self._value
+
 
 class _UserOrm:
     id = 7
@@ -39,3 +43,95 @@ async def test_get_by_referrer_code_returns_dto(monkeypatch):
 
     assert isinstance(user, UserDTO)
     assert user.referral_code == "REF123"
+
+
+class _RowsResult:
+    def __init__(self, rows):
+        self._rows = rows
+
+    def all(self):
+        return self._rows
+
+
+@pytest.mark.asyncio
+async def test_get_active_recipients_pages_by_primary_key(monkeypatch):
+    pages = [[(1, 101), (4, 104)], [(9, 109)]]
+    statements = []
+
+    async def fake_session_execute(stmt, session):
+        statements.append(stmt)
+        return _RowsResult(pages[len(statements) - 1])
+
+    monkeypatch.setattr("repositories.user.session_execute", fake_session_execute)
+    monkeypatch.setattr(UserRepository, "RECIPIENTS_PAGE_SIZE", 2)
+
+    recipients = [recipient async for recipient in UserRepository.get_active_recipients(0, session=None)]
+
+    assert recipients == [(1, 101), (4, 104), (9, 109)]
+    assert len(statements) == 2
+    compiled = statements[1].compile()
+    assert "OFFSET" not in compiled.string
+    assert compiled.params["id_1"] == 4
+    assert [column.name for column in statements[1].selected_columns] == ["id", "telegram_id"]
+
+
+@pytest.mark.asyncio
+async def test_apply_balance_delta_records_ledger_entry(monkeypatch):
+    user_orm = _UserOrm()
+    user_orm.top_up_amount = 50.0
+    user_orm.consume_records = 20.0
+    ledger_entries = []
+
+    async def fake_session_execute(stmt, session):
+        return _ScalarResult(user_orm)
+
+    async def fake_create(ledger_entry_dto, session):
+        ledger_entries.append(ledger_entry_dto)
+
+    monkeypatch.setattr("repositories.user.session_execute", fake_session_execute)
+    monkeypatch.setattr("repositories.user.LedgerRepository.create", fake_create)
+
+    user = await UserRepository.apply_balance_delta(7, 0.0, 20.0, LedgerEntryType.PURCHASE, session=None,
+                                                    require_sufficient_funds=True, reference_id=11)
+
+    assert user.consume_records == 20.0
+    assert [(entry.user_id, entry.entry_type, entry.credit, entry.debit, entry.balance_after, entry.reference_id)
+            for entry in ledger_entries] == [(7, LedgerEntryType.PURCHASE, 0.0, 20.0, 30.0, 11)]
+
+
+@pytest.mark.asyncio
+async def test_apply_balance_delta_skips_ledger_when_funds_are_insufficient(monkeypatch):
+    statements = []
+
+    async def fake_session_execute(stmt, session):
+        statements.append(stmt)
+        return _ScalarResult(None)
+
+    async def fail_create(ledger_entry_dto, session):
+        raise AssertionError("a rejected debit must not be recorded")
+
+    monkeypatch.setattr("repositories.user.session_execute", fake_session_execute)
+    monkeypatch.setattr("repositories.user.LedgerRepository.create", fail_create)
+
+    user = await UserRepository.apply_balance_delta(7, 0.0, 20.0, LedgerEntryType.PURCHASE, session=None,
+                                                    require_sufficient_funds=True)
+
+    assert user is None
+    assert "users.top_up_amount - users.consume_records >=" in statements[0].compile().string
+
+
+@pytest.mark.asyncio
+async def test_update_never_writes_balance_columns(monkeypatch):
+    statements = []
+
+    async def fake_session_execute(stmt, session):
+        statements.append(stmt)
+
+    monkeypatch.setattr("repositories.user.session_execute", fake_session_execute)
+
+    await UserRepository.update(UserDTO(id=7, telegram_id=123456, top_up_amount=50.0, consume_records=20.0,
+                                        is_banned=True), session=None)
+
+    updated_columns = {column.key for column in statements[0]._values}
+    assert "is_banned" in updated_columns
+    assert updated_columns.isdisjoint({"id", "top_up_amount", "consume_records"})
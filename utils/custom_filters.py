@@ -3,10 +3,7 @@ from aiogram.filters import BaseFilter
 from aiogram.types import Message
 
 from config import ADMIN_ID_LIST
-from db import get_db_session
 from models.user import UserDTO
-from repositories.user import UserRepository
-from services.user import UserService
 
 
 class AdminIdFilter(BaseFilter):
@@ -16,17 +13,13 @@ class AdminIdFilter(BaseFilter):
 
 
 class IsUserExistFilter(BaseFilter):
-    async def __call__(self, message: Message) -> bool:
-        async with get_db_session() as session:
-            is_exist = await UserService.get(UserDTO(telegram_id=message.from_user.id), session)
-            return is_exist is not None
+    async def __call__(self, message: Message, user_dto: UserDTO | None = None) -> bool:
+        return user_dto is not None
 
 
 class IsUserBannedFilter(BaseFilter):
-    async def __call__(self, message: Message):
-        async with get_db_session() as session:
-            user = await UserRepository.get_by_tgid(message.from_user.id, session)
-            if user:
-                return user.is_banned and user.is_admin is False
-            else:
-                return False
+    async def __call__(self, message: Message, user_dto: UserDTO | None = None):
+        if user_dto:
+            return user_dto.is_banned and user_dto.telegram_id not in ADMIN_ID_LIST
+        else:
+            return False
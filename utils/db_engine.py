@@ -0,0 +1,66 @@
+import time
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, ConnectionPoolEntry
+
+import config
+from utils.metrics import metrics
+
+
+class InstrumentedAsyncQueuePool(AsyncAdaptedQueuePool):
+
+    def _do_get(self) -> ConnectionPoolEntry:
+        started_at = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            metrics.observe("db_pool_checkout_seconds", time.perf_counter() - started_at)
+            self._report_usage()
+
+    def _do_return_conn(self, record: ConnectionPoolEntry) -> None:
+        super()._do_return_conn(record)
+        self._report_usage()
+
+    def capacity(self) -> int:
+        if self._max_overflow < 0:
+            return self.size()
+        return self.size() + self._max_overflow
+
+    def _report_usage(self) -> None:
+        checked_out = self.checkedout()
+        capacity = self.capacity()
+        metrics.set_gauge("db_pool_checked_out", checked_out)
+        metrics.set_gauge("db_pool_capacity", capacity)
+        metrics.set_gauge("db_pool_saturation", checked_out / capacity if capacity else 0.0)
+
+
+def get_engine_kwargs() -> dict:
+    return {
+        "echo": config.DB_ECHO,
+        "poolclass": InstrumentedAsyncQueuePool,
+        "pool_size": config.DB_POOL_SIZE,
+        "max_overflow": config.DB_MAX_OVERFLOW,
+        "pool_timeout": config.DB_POOL_TIMEOUT,
+        "pool_recycle": config.DB_POOL_RECYCLE,
+        "pool_pre_ping": config.DB_POOL_PRE_PING,
+        "connect_args": {
+            "statement_cache_size": config.DB_STATEMENT_CACHE_SIZE,
+            "prepared_statement_cache_size": config.DB_STATEMENT_CACHE_SIZE,
+        },
+    }
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    context.query_started_at = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    metrics.observe("db_query_seconds", time.perf_counter() - context.query_started_at)
+
+
+def create_engine(url: str) -> AsyncEngine:
+    engine = create_async_engine(url, **get_engine_kwargs())
+    event.listen(engine.sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine.sync_engine, "after_cursor_execute", _after_cursor_execute)
+    return engine
@@ -0,0 +1,34 @@
+from threading import Lock
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = Lock()
+        self._summaries: dict[str, dict[str, float]] = {}
+        self._gauges: dict[str, float] = {}
+
+    def observe(self, name: str, value: float) -> None:
+        with self._lock:
+            summary = self._summaries.setdefault(name, {"count": 0, "sum": 0.0, "max": 0.0})
+            summary["count"] += 1
+            summary["sum"] += value
+            summary["max"] = max(summary["max"], value)
+
+    def set_gauge(self, name: str, value: float) -> None:
+        with self._lock:
+            self._gauges[name] = value
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            summaries = {}
+            for name, summary in self._summaries.items():
+                summaries[name] = {**summary, "avg": summary["sum"] / summary["count"]}
+            return {"summaries": summaries, "gauges": dict(self._gauges)}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._summaries.clear()
+            self._gauges.clear()
+
+
+metrics = MetricsRegistry()
@@ -19,3 +19,38 @@ def create_bot(token: str, session: AiohttpSession | None = None) -> Bot:
         session=session,
         default=DefaultBotProperties(parse_mode=ParseMode.HTML)
     )
+
+
+_telegram_session: AiohttpSession | None = None
+_bots: dict[str, Bot] = {}
+
+
+def get_telegram_session() -> AiohttpSession:
+    global _telegram_session
+    if _telegram_session is None:
+        _telegram_session = create_telegram_session()
+    return _telegram_session
+
+
+def get_bot(token: str) -> Bot:
+    """
+    Bots are cached per token and share one HTTP session, so connections to the Bot API are kept alive
+    between calls. The session is closed by close_bots on application shutdown.
+    """
+    bot = _bots.get(token)
+    if bot is None:
+        bot = create_bot(token, get_telegram_session())
+        _bots[token] = bot
+    return bot
+
+
+def release_bot(token: str) -> None:
+    _bots.pop(token, None)
+
+
+async def close_bots() -> None:
+    global _telegram_session
+    _bots.clear()
+    if _telegram_session is not None:
+        await _telegram_session.close()
+        _telegram_session = None